@@ -0,0 +1,62 @@
+"""
+Benchmark of the per-paper mm/wm/mw/ww aggregation.
+
+Compares a row loop over the references (as the notebook computes its per-column values) with
+class_count_table, which classifies all the references at once and counts the classes of every
+citing paper with a single bincount.
+
+Usage: python benchmarks/bench_citation_classes.py [n_references]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_PATH, "src", "data"))
+from citation_classes import CLASSES, OTHER, class_count_table, class_percentages  # noqa: E402
+from records import GENDERS  # noqa: E402
+
+N_REFERENCES = 1_000_000
+# the row loop is only timed on this many references, and extrapolated
+N_LOOP = 50_000
+
+
+def synthetic_references(n, rng):
+    return pd.DataFrame({
+        "citing_doi": [f"10.0000/citing{i}" for i in rng.integers(0, max(n // 50, 1), n)],
+        "first_author_gender": rng.choice(GENDERS, n).astype(object),
+        "first_author_gender_accuracy": rng.choice([np.nan, 50, 99, 100], n),
+        "last_author_gender": rng.choice(GENDERS, n).astype(object),
+        "last_author_gender_accuracy": rng.choice([np.nan, 50, 99, 100], n),
+    })
+
+
+def loop_counts(df):
+    letters = {"male": "m", "female": "w"}
+    counts = {}
+    for _, row in df.iterrows():
+        first, last = letters.get(row["first_author_gender"]), letters.get(row["last_author_gender"])
+        cls = first + last if first and last else OTHER
+        paper_counts = counts.setdefault(row["citing_doi"], dict.fromkeys(CLASSES + [OTHER], 0))
+        paper_counts[cls] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_REFERENCES
+    df = synthetic_references(n, np.random.default_rng(0))
+
+    start = time.perf_counter()
+    loop_counts(df.head(N_LOOP))
+    loop_time = (time.perf_counter() - start) * n / min(n, N_LOOP)
+
+    start = time.perf_counter()
+    percentages = class_percentages(class_count_table(df))
+    table_time = time.perf_counter() - start
+
+    print(f"{n} references, {len(percentages)} citing papers")
+    print(f"row loop (extrapolated): {loop_time:8.2f} s")
+    print(f"class_count_table:       {table_time:8.2f} s")
@@ -0,0 +1,67 @@
+"""
+Benchmark of looking up already found DOIs.
+
+Compares the DataFrame scans make_dataset.py used to do for every DOI (doi in df["doi"].values,
+then df[df["doi"] == doi].iloc[0], and membership in list(df["doi"].values)) with DoiIndex, on
+data/citing_papers.csv and on a synthetic 100k-row table.
+
+Usage: python benchmarks/bench_doi_index.py
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+REPO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_PATH, "src", "data"))
+from doi_index import DATA_FIELDS, DoiIndex  # noqa: E402
+
+DATAFILE_PATH = os.path.join(REPO_PATH, "data", "citing_papers.csv")
+N_LOOKUPS = 1_000
+
+
+def synthetic_papers(n):
+    return pd.DataFrame({
+        "doi": [f"10.0000/ref{i}" for i in range(n)],
+        "first_author_name": "Jane", "first_author_gender": "female",
+        "first_author_gender_accuracy": 100.0,
+        "last_author_name": "John", "last_author_gender": "male",
+        "last_author_gender_accuracy": 100.0,
+    })
+
+
+def lookup_dataframe(df, dois):
+    for doi in dois:
+        if doi in df["doi"].values:
+            df[df["doi"] == doi].iloc[0][DATA_FIELDS]
+        doi in list(df["doi"].values)
+
+
+def lookup_index(index, dois):
+    for doi in dois:
+        index.get(doi)
+        doi in index
+
+
+def per_lookup_us(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) / N_LOOKUPS * 1e6
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    print(f"{'table':>22}  {'rows':>7}  {'build (ms)':>10}  {'DataFrame (us)':>14}  {'DoiIndex (us)':>13}")
+    for name, df in [("citing_papers.csv", pd.read_csv(DATAFILE_PATH)),
+                     ("synthetic", synthetic_papers(100_000))]:
+        # half of the looked up DOIs are in the table
+        dois = [random.choice(df["doi"].dropna().values) for _ in range(N_LOOKUPS // 2)]
+        dois += [f"10.0000/missing{i}" for i in range(N_LOOKUPS - len(dois))]
+        start = time.perf_counter()
+        index = DoiIndex.from_frame(df)
+        build_ms = (time.perf_counter() - start) * 1e3
+        before = per_lookup_us(lookup_dataframe, df, dois)
+        after = per_lookup_us(lookup_index, index, dois)
+        print(f"{name:>22}  {len(df):>7}  {build_ms:>10.1f}  {before:>14.1f}  {after:>13.2f}")
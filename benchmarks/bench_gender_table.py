@@ -0,0 +1,76 @@
+"""
+Benchmark of the precompiled gender table.
+
+Compares the startup time and the bulk labelling of names (as names_to_genders does for a
+reference list) with the gender-guesser detector and with a memory-mapped GenderTable, and
+checks that both give the same genders.
+
+Usage: python benchmarks/bench_gender_table.py [n_names]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_PATH, "src", "data"))
+import gender_guesser.detector as gender_detecor  # noqa: E402
+from gender_table import GenderTable  # noqa: E402
+from name_normalization import normalize  # noqa: E402
+
+N_NAMES = 1_000_000
+NAME_DICT_PATH = os.path.join(REPO_PATH, "src", "data", "name_dict.json")
+
+
+def detector_genders(detector, names, name_dict):
+    genders = []
+    for name in names:
+        gender = detector.get_gender(name)
+        if gender == "unknown" and name in name_dict:
+            gender = name_dict[name]["gender"]
+        genders.append(gender)
+    return np.array(genders, dtype=object)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_NAMES
+    with open(NAME_DICT_PATH, "r") as name_dict_file:
+        name_dict = json.load(name_dict_file)
+    # the names are looked up normalized, and initials aren't looked up (see name_to_gender)
+    normalized_dict = {normalize(name): value for name, value in name_dict.items() if len(normalize(name)) >= 2}
+
+    start = time.perf_counter()
+    detector = gender_detecor.Detector(case_sensitive=False)
+    detector_startup = time.perf_counter() - start
+
+    # known names, gender API names, and names nobody knows, like in reference lists
+    rng = np.random.default_rng(0)
+    pool = list(detector.names)[:5000] + list(normalized_dict) + [f"name{i}" for i in range(500)]
+    names = np.array(pool, dtype=str)[rng.integers(0, len(pool), n)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        table_path = os.path.join(directory, "gender_table")
+        GenderTable.build(name_dict).save(table_path)
+
+        start = time.perf_counter()
+        table = GenderTable.load(table_path)
+        table_startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = detector_genders(detector, names, normalized_dict)
+        detector_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, genders, _ = table.lookup(names)
+        table_time = time.perf_counter() - start
+
+        assert (genders == expected).all()
+
+    print(f"{n} names, {len(table)} names in the table")
+    print(f"detector startup:   {1000 * detector_startup:8.1f} ms")
+    print(f"table startup:      {1000 * table_startup:8.1f} ms")
+    print(f"detector labelling: {detector_time:8.2f} s")
+    print(f"table labelling:    {table_time:8.2f} s")
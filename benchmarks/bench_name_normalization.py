@@ -0,0 +1,105 @@
+"""
+Hit rates of the name normalization.
+
+Counts the names whose gender is found without the gender API (by gender-guesser or in
+name_dict.json), with the previous extraction of first names (the first word, without dots)
+and exact lookups, and with name_normalization.normalize and the lookups of name_to_gender. The
+names are the ones of name_dict.json, the first and last author names of citing_papers.csv, and
+Crossref-like spellings of them (e.g., "J. Maria", "MARIA", "maria-j"). The names are looked up
+in a GenderTable, as make_dataset.py does by default. The hit rate of the normalize memoization
+is also reported.
+
+Usage: python benchmarks/bench_name_normalization.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_PATH, "src", "data"))
+import make_dataset  # noqa: E402
+from gender_table import GenderTable  # noqa: E402
+from name_normalization import normalize  # noqa: E402
+
+NAME_DICT_PATH = os.path.join(REPO_PATH, "src", "data", "name_dict.json")
+DATAFILE_PATH = os.path.join(REPO_PATH, "data", "citing_papers.csv")
+
+
+def previous_name(given):
+    parts = given.replace(".", " ").split()
+    return parts[0] if parts else ""
+
+
+def previous_gender(name, name_dict):
+    if len(name) < 2:
+        return "unknown"
+    gender = make_dataset._get_gender_detector().get_gender(name)
+    if gender == "unknown" and name in name_dict:
+        gender = name_dict[name]["gender"]
+    if gender == "unknown" and "-" in name:
+        return previous_gender(name.split("-")[0], name_dict)
+    return gender
+
+
+def spellings(names, rng):
+    """Spellings of the names as they can be found in the "given" field of Crossref authors."""
+    variants = [
+        lambda name: name.upper(),
+        lambda name: name.lower(),
+        lambda name: f"{name[0]}. {name}",
+        lambda name: f"{name} {name[0]}.",
+        lambda name: f"{name[0]}.-{name}",
+        lambda name: f"{name}-{name[0].lower()}",
+    ]
+    return [variants[i](name) for name, i in zip(names, rng.integers(0, len(variants), len(names)))]
+
+
+def hit_rates(label, givens, name_dict):
+    start = time.perf_counter()
+    previous = [previous_gender(previous_name(given), name_dict) != "unknown" for given in givens]
+    previous_time = time.perf_counter() - start
+
+    normalize.cache_clear()
+    start = time.perf_counter()
+    normalized = [make_dataset.name_to_gender(make_dataset.get_name_from_author_dict({"given": given}),
+                                              None, name_dict)[0] != "unknown" for given in givens]
+    normalized_time = time.perf_counter() - start
+
+    normalize.cache_clear()
+    for given in givens:
+        normalize(given)
+    cache_info = normalize.cache_info()
+
+    n_previous = len(set(previous_name(given) for given in givens))
+    n_normalized = len(set(normalize(given) for given in givens))
+    print(f"{label}: {len(givens)} names")
+    print(f"    found without the gender API: {100 * np.mean(previous):5.1f}% -> {100 * np.mean(normalized):5.1f}%")
+    print(f"    distinct names:               {n_previous:6d} -> {n_normalized:6d}")
+    print(f"    normalize cache hit rate:     {100 * cache_info.hits / max(cache_info.hits + cache_info.misses, 1):5.1f}%")
+    print(f"    time:                         {previous_time:6.2f} s -> {normalized_time:6.2f} s")
+
+
+if __name__ == "__main__":
+    with open(NAME_DICT_PATH, "r") as name_dict_file:
+        name_dict = json.load(name_dict_file)
+    df = pd.read_csv(DATAFILE_PATH)
+    names = [name for name in pd.concat([df["first_author_name"], df["last_author_name"]]).dropna()]
+    rng = np.random.default_rng(0)
+    make_dataset._get_gender_detector()
+
+    with tempfile.TemporaryDirectory() as directory:
+        GenderTable.build({}).save(os.path.join(directory, "without_name_dict"))
+        GenderTable.build(name_dict).save(os.path.join(directory, "with_name_dict"))
+
+        # the names of name_dict.json are looked up as if they weren't in it
+        make_dataset.GENDER_TABLE = GenderTable.load(os.path.join(directory, "without_name_dict"))
+        hit_rates("name_dict.json", list(name_dict), {})
+
+        make_dataset.GENDER_TABLE = GenderTable.load(os.path.join(directory, "with_name_dict"))
+        hit_rates("citing_papers.csv", names, name_dict)
+        hit_rates("Crossref-like spellings of citing_papers.csv", spellings(names, rng), name_dict)
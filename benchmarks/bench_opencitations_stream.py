@@ -0,0 +1,87 @@
+"""
+Benchmark of the streamed opencitations.net reader.
+
+Serves a synthetic citation list from a local HTTP server, and compares reading it with
+requests.get(url).json() (as get_citation_items used to) and with OpenCitationsReader.iter_dois:
+time to the first DOI, total time, and peak memory of the Python allocations (the DOIs are
+counted, not kept).
+
+Usage: python benchmarks/bench_opencitations_stream.py [n_citations ...]
+"""
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import requests
+
+REPO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_PATH, "src", "data"))
+from opencitations import OpenCitationsReader  # noqa: E402
+
+N_CITATIONS = [10_000, 100_000, 500_000]
+
+
+def citation_list(n):
+    return json.dumps([{
+        "oci": f"0200100000236{i:010d}-02001000007362",
+        "citing": f"10.1000/citing.{i}",
+        "cited": "10.1038/s41593-020-0658-y",
+        "creation": "2021-03-01",
+        "timespan": "P1Y2M",
+        "journal_sc": "no",
+        "author_sc": "no",
+    } for i in range(n)]).encode()
+
+
+class CitationsHandler(http.server.BaseHTTPRequestHandler):
+    body = b"[]"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(read):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    n = 0
+    for _ in read():
+        if first is None:
+            first = time.perf_counter() - start
+        n += 1
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return n, first, total, peak
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or N_CITATIONS
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), CitationsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_port}"
+    reader = OpenCitationsReader(api_url)
+
+    print(f"{'citations':>10} {'reader':>8} {'first DOI (ms)':>15} {'total (s)':>10} {'peak memory (MB)':>17}")
+    for n in sizes:
+        CitationsHandler.body = citation_list(n)
+        readers = {
+            "json": lambda: (item["citing"] for item in requests.get(f"{api_url}/citations/doi").json()),
+            "stream": lambda: reader.iter_dois("doi"),
+        }
+        for name, read in readers.items():
+            n_read, first, total, peak = measure(read)
+            assert n_read == n
+            print(f"{n:>10} {name:>8} {1000 * first:>15.1f} {total:>10.2f} {peak / 1e6:>17.1f}")
+    server.shutdown()
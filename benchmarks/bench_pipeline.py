@@ -0,0 +1,178 @@
+"""
+End-to-end benchmark of make_dataset.py on a synthetic corpus.
+
+For each size, generates a SyntheticCorpus with that many references, serves it with
+MockServices, and runs make_dataset.py from scratch against it (on a copy of src/data, with a
+gender API key so that the gender API is used, and an empty data directory). Records the wall
+time, the throughput (references written per second), the peak RSS of the make_dataset.py
+process (and of its worker processes, if any), the requests received by each mock service, and
+the timers and counters of the run (crawl_stats.json), and saves them as JSON.
+
+Options that aren't listed below are passed to make_dataset.py, e.g. --processes 2 or
+--no-cache. The rate limit is disabled unless --rate-limit is given. If a run of make_dataset.py
+fails, the benchmark stops with an error after saving the results so far, and prints the end of
+its log.
+
+Usage: python benchmarks/bench_pipeline.py [--sizes 1000 10000 100000] [--latency 0.02]
+           [--error-rate 0] [--seed 0] [--output pipeline_benchmark.json] [make_dataset options]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from mock_services import SERVICES, MockServices
+from synthetic_corpus import NAME_DICT_PATH, REPO_PATH, SyntheticCorpus
+
+SIZES = [1_000, 10_000, 100_000]
+SRC_DATA_PATH = os.path.join(REPO_PATH, "src", "data")
+
+
+def prepare_template(directory):
+    """Copy the code of src/data to directory, with a gender API key and a prebuilt gender table."""
+    src_data = os.path.join(directory, "src", "data")
+    os.makedirs(src_data)
+    os.makedirs(os.path.join(directory, "data"))
+    for file_name in os.listdir(SRC_DATA_PATH):
+        if file_name.endswith(".py") or file_name == "name_dict.json":
+            shutil.copy(os.path.join(SRC_DATA_PATH, file_name), src_data)
+    with open(os.path.join(src_data, "gender_api_key.txt"), "w") as key_file:
+        key_file.write("mock")
+    # built once, since it doesn't depend on the corpus
+    subprocess.run([sys.executable, os.path.join(src_data, "gender_table.py")], check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def run_pipeline(directory, options, timeout=None):
+    """
+    Run make_dataset.py in directory.
+
+    Outputs
+    -------
+    returncode : int
+    wall_seconds : float
+    peak_rss_mb : float
+        Largest resident set size of make_dataset.py and its worker processes.
+    cpu_seconds : float
+        CPU time of make_dataset.py and its worker processes (the rest of the wall time is spent
+        waiting for the mock services, or for the CPU).
+    """
+    command = [sys.executable, os.path.join(directory, "src", "data", "make_dataset.py")] + options
+    with open(os.path.join(directory, "make_dataset.log"), "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=directory, stdout=log, stderr=subprocess.STDOUT)
+        timer = threading.Timer(timeout, process.kill) if timeout else None
+        if timer is not None:
+            timer.start()
+        # wait4 gives the resource usage of this process (and its worker processes) only, unlike
+        # RUSAGE_CHILDREN which covers every process run so far
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_seconds = time.perf_counter() - start
+        if timer is not None:
+            timer.cancel()
+        process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux, and in bytes on macOS
+    peak_rss = usage.ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+    return process.returncode, wall_seconds, peak_rss, usage.ru_utime + usage.ru_stime
+
+
+def benchmark(n_references, template, options, latency, error_rate, seed, name_dict, timeout=None):
+    """Run the pipeline on a corpus of n_references references, and return its measures."""
+    corpus = SyntheticCorpus.generate(n_references, seed)
+    with tempfile.TemporaryDirectory() as directory:
+        directory = os.path.join(directory, "run")
+        shutil.copytree(template, directory)
+        with MockServices(corpus, latency, error_rate, name_dict, seed) as services:
+            urls = [value for option_url in services.urls.items() for value in option_url]
+            returncode, wall_seconds, peak_rss, cpu_seconds = run_pipeline(directory, urls + options, timeout)
+        result = {
+            "n_references": n_references,
+            "corpus": corpus.summary(),
+            "returncode": returncode,
+            "wall_seconds": wall_seconds,
+            "peak_rss_mb": peak_rss,
+            "cpu_seconds": cpu_seconds,
+            "requests": services.counts,
+        }
+        datafile_path = os.path.join(directory, "data", "citing_papers.csv")
+        if returncode == 0 and os.path.isfile(datafile_path):
+            df = pd.read_csv(datafile_path, usecols=["citing_doi"])
+            result["rows"] = len(df)
+            result["references_written"] = int(df["citing_doi"].notna().sum())
+            result["references_per_second"] = result["references_written"] / wall_seconds
+        else:
+            with open(os.path.join(directory, "make_dataset.log"), "r") as log:
+                result["log_tail"] = log.read()[-2000:]
+        stats_path = os.path.join(directory, "src", "data", "crawl_stats.json")
+        if os.path.isfile(stats_path):
+            with open(stats_path, "r") as stats_file:
+                result["stats"] = json.load(stats_file)
+    return result
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark make_dataset.py on synthetic corpora.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="numbers of references of the corpora (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="mean delay in seconds of the mock services' responses (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of the requests that the mock services answer with an HTTP 503 error "
+                             "(default: 0)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the corpora, latencies and errors (default: 0)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="maximum duration in seconds of a run of make_dataset.py (default: no limit)")
+    parser.add_argument("--output", default="pipeline_benchmark.json",
+                        help="JSON file the results are saved to (default: %(default)s)")
+    args, options = parser.parse_known_args()
+    if "--rate-limit" not in options:
+        options = ["--rate-limit", "0"] + options
+
+    with open(NAME_DICT_PATH, "r") as name_dict_file:
+        name_dict = json.load(name_dict_file)
+
+    results = {
+        "settings": {
+            "sizes": args.sizes,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "make_dataset_options": options,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_PATH,
+                                     capture_output=True, text=True).stdout.strip() or None,
+        },
+        "runs": [],
+    }
+    print(f"{'references':>10} {'status':>7} {'wall (s)':>9} {'CPU (s)':>8} {'refs/s':>8} {'peak RSS (MB)':>14} "
+          + " ".join(f"{service + ' requests':>22}" for service in SERVICES))
+    with tempfile.TemporaryDirectory() as template:
+        template = os.path.join(template, "template")
+        prepare_template(template)
+        for n in args.sizes:
+            result = benchmark(n, template, options, args.latency, args.error_rate, args.seed, name_dict,
+                               args.timeout)
+            results["runs"].append(result)
+            # saved after each run, so that the results of the small sizes aren't lost
+            with open(args.output, "w") as output_file:
+                json.dump(results, output_file, indent=4)
+            print(f"{n:>10} {result['returncode']:>7} {result['wall_seconds']:>9.2f} {result['cpu_seconds']:>8.2f} "
+                  f"{result.get('references_per_second', 0):>8.0f} {result['peak_rss_mb']:>14.1f} "
+                  + " ".join(f"{result['requests'][service]['requests']:>22}" for service in SERVICES))
+            if result["returncode"] != 0:
+                print(f"\nResults saved to {args.output}")
+                print(result.get("log_tail", ""), file=sys.stderr)
+                sys.exit(f"make_dataset.py failed with exit code {result['returncode']} on {n} references")
+    print(f"\nResults saved to {args.output}")
@@ -0,0 +1,67 @@
+"""
+Benchmark of the memory used by the per-reference author records.
+
+Compares plain dicts with AuthorRecords for the records kept in memory during a crawl, and
+object-dtype DataFrames with compact_frame for the materialised citation data.
+
+Usage: python benchmarks/bench_records.py [n_references]
+"""
+import json
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+REPO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_PATH, "src", "data"))
+from doi_index import DATA_FIELDS  # noqa: E402
+from records import AuthorRecord, GENDERS, compact_frame  # noqa: E402
+
+NAME_DICT_PATH = os.path.join(REPO_PATH, "src", "data", "name_dict.json")
+N_REFERENCES = 1_000_000
+N_IN_FLIGHT = 200_000
+
+
+def synthetic_papers(n, rng):
+    with open(NAME_DICT_PATH, "r") as name_dict_file:
+        names = np.array(list(json.load(name_dict_file)) + ["Jane", "John", "Maria", "Wei"], dtype=object)
+    n_citing = max(n // 50, 1)
+    return pd.DataFrame({
+        "doi": [f"10.0000/ref{i}" for i in rng.integers(0, n, n)],
+        "cited_doi": None, "cited_entity": None,
+        "first_author_gender": rng.choice(GENDERS, n).astype(object),
+        "first_author_gender_accuracy": rng.choice([np.nan, 50, 99, 100], n),
+        "first_author_name": rng.choice(names, n),
+        "last_author_gender": rng.choice(GENDERS, n).astype(object),
+        "last_author_gender_accuracy": rng.choice([np.nan, 50, 99, 100], n),
+        "last_author_name": rng.choice(names, n),
+        "citing_doi": [f"10.0000/citing{i}" for i in rng.integers(0, n_citing, n)],
+        "citing_entity": rng.choice(["paper citing cleanBib paper", "paper citing cleanBib preprint",
+                                     "paper citing cleanBib paper preprint"], n).astype(object),
+    }).astype({"cited_doi": object, "cited_entity": object})
+
+
+def traced_mb(build):
+    tracemalloc.start()
+    objects = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size / 1e6
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_REFERENCES
+    rng = np.random.default_rng(0)
+    df = synthetic_papers(n, rng)
+
+    rows = df[DATA_FIELDS].head(N_IN_FLIGHT).to_dict("records")
+    dict_mb = traced_mb(lambda: [dict(row) for row in rows])
+    record_mb = traced_mb(lambda: [AuthorRecord.from_row(row) for row in rows])
+    print(f"{len(rows)} records in flight: dicts {dict_mb:.1f} MB, AuthorRecords {record_mb:.1f} MB")
+
+    object_mb = df.memory_usage(deep=True).sum() / 1e6
+    compact_mb = compact_frame(df).memory_usage(deep=True).sum() / 1e6
+    print(f"{n} references materialised: object columns {object_mb:.1f} MB, compact_frame {compact_mb:.1f} MB")
@@ -0,0 +1,64 @@
+"""
+Benchmark of growing the crawl output one row at a time.
+
+Compares growing a DataFrame row by row (what make_dataset.py used to do with DataFrame.append,
+emulated with pd.concat since DataFrame.append was removed in pandas 2) with RowAccumulator.
+
+Usage: python benchmarks/bench_row_accumulator.py [--full]
+
+The DataFrame version is quadratic, so it's skipped for 100k references unless --full is given.
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "data"))
+from rows import RowAccumulator  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+MAX_QUADRATIC_SIZE = 10_000
+
+
+def synthetic_rows(n):
+    for i in range(n):
+        yield {"doi": f"10.0000/ref{i}",
+               "first_author_name": "Jane", "first_author_gender": "female",
+               "first_author_gender_accuracy": None,
+               "last_author_name": "John", "last_author_gender": "male",
+               "last_author_gender_accuracy": None,
+               "citing_entity": "paper citing cleanBib paper", "citing_doi": f"10.0000/citing{i // 50}"}
+
+
+def grow_dataframe(n):
+    df = pd.DataFrame(columns=["doi"])
+    for row in synthetic_rows(n):
+        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+    return df
+
+
+def grow_accumulator(n):
+    rows = RowAccumulator(["doi"])
+    for row in synthetic_rows(n):
+        rows.append(row)
+    return rows.to_frame()
+
+
+def timed(func, n):
+    start = time.perf_counter()
+    df = func(n)
+    assert len(df) == n
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    full = "--full" in sys.argv
+    print(f"{'references':>10}  {'DataFrame (s)':>14}  {'RowAccumulator (s)':>18}")
+    for n in SIZES:
+        if full or n <= MAX_QUADRATIC_SIZE:
+            before = "%14.2f" % timed(grow_dataframe, n)
+        else:
+            before = "%14s" % "skipped"
+        after = timed(grow_accumulator, n)
+        print(f"{n:>10}  {before}  {after:>18.3f}")
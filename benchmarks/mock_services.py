@@ -0,0 +1,205 @@
+"""
+Local mock of opencitations.net, Crossref and the gender API, serving a SyntheticCorpus.
+
+The three services share one HTTP server, under the /opencitations, /crossref and /gender-api
+paths (see MockServices.urls), and answer like the real APIs do for the requests make_dataset.py
+sends. Each service has a configurable latency and rate of errors (HTTP 503 responses), and
+its requests are counted.
+
+Usage: python benchmarks/mock_services.py [n_references] [port]
+    Serves a synthetic corpus until interrupted, e.g. to run make_dataset.py against it with
+    the printed --opencitations-api, --crossref-api and --gender-api options.
+"""
+import http.server
+import json
+import random
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlparse
+
+from synthetic_corpus import SyntheticCorpus
+
+SERVICES = ["opencitations", "crossref", "gender-api"]
+# Genders of the names the gender API doesn't know from name_dict.json, and their weights
+GENDERS = ["female", "male", "unknown"]
+GENDER_WEIGHTS = [0.45, 0.45, 0.1]
+
+
+class MockServices:
+    """
+    HTTP server mocking the APIs used by make_dataset.py, in a background thread.
+
+    Inputs
+    ------
+    corpus : SyntheticCorpus
+        The citations, references and authors that are served.
+    latency : float or dict
+        Delay in seconds before each response, either for every service or a dict mapping
+        service names (see SERVICES) to their own delay (default: 0). The delays vary uniformly
+        between half and one and a half times this value.
+    error_rate : float or dict
+        Fraction of the requests answered with an HTTP 503 error, for every service or per
+        service like latency (default: 0).
+    name_dict : dict
+        Names the gender API answers with their gender and accuracy, e.g. from name_dict.json.
+        Other names get a gender drawn with a generator seeded with the name. Optional.
+    seed : int
+        Seed of the latencies and errors (default: 0).
+    port : int
+        Port of the server (default: 0, i.e. any free port).
+    """
+
+    def __init__(self, corpus, latency=0.0, error_rate=0.0, name_dict=None, seed=0, port=0):
+        self.corpus = corpus
+        self.latency = latency
+        self.error_rate = error_rate
+        self.name_dict = {name.lower(): value for name, value in (name_dict or {}).items()}
+        self.counts = {service: {"requests": 0, "errors": 0, "items": 0} for service in SERVICES}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def urls(self):
+        """The make_dataset.py options pointing at this server."""
+        return {
+            "--opencitations-api": f"{self.url}/opencitations",
+            "--crossref-api": f"{self.url}/crossref",
+            "--gender-api": f"{self.url}/gender-api/get",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _setting(self, setting, service):
+        return setting.get(service, 0.0) if isinstance(setting, dict) else setting
+
+    def delay_and_fail(self, service):
+        """Wait for the latency of a request to a service, and return whether it fails."""
+        latency = self._setting(self.latency, service)
+        with self._lock:
+            self.counts[service]["requests"] += 1
+            delay = latency * self._random.uniform(0.5, 1.5)
+            failed = self._random.random() < self._setting(self.error_rate, service)
+            if failed:
+                self.counts[service]["errors"] += 1
+        if delay:
+            time.sleep(delay)
+        return failed
+
+    def count_items(self, service, n):
+        with self._lock:
+            self.counts[service]["items"] += n
+
+    def opencitations(self, kind, doi):
+        """The items of /citations/{doi} or /references/{doi}."""
+        if kind == "citations":
+            items = self.corpus.citations.get(doi, [])
+        else:
+            items = [{"citing": doi, "cited": ref_doi} for ref_doi in self.corpus.references.get(doi, [])]
+        return [dict(item, oci=f"{i:010d}", timespan="P1Y", journal_sc="no", author_sc="no")
+                for i, item in enumerate(items)]
+
+    def crossref(self, query):
+        """The response of /works, for the multi-DOI filter of names_from_xref_batch."""
+        filters = [f.split(":", 1) for f in query.get("filter", [""])[0].split(",") if ":" in f]
+        items = []
+        for key, value in filters:
+            if key == "doi":
+                authors = self.corpus.authors(value.lower())
+                if authors is not None:
+                    items.append({"DOI": value.lower(), "author": authors} if authors else {"DOI": value.lower()})
+        message = {"total-results": len(items), "items": items, "items-per-page": len(items)}
+        if "cursor" in query:
+            message["next-cursor"] = "mock-cursor"
+        return {"status": "ok", "message-type": "work-list", "message": message}
+
+    def gender(self, name):
+        name = name.lower()
+        if name in self.name_dict:
+            return {"name": name, **self.name_dict[name]}
+        rng = random.Random(name)
+        gender = rng.choices(GENDERS, GENDER_WEIGHTS)[0]
+        return {"name": name, "gender": gender, "accuracy": 0 if gender == "unknown" else rng.randint(50, 99)}
+
+    def gender_api(self, query):
+        """The response of /get, for one name or with the multi-name form of GenderApiClient."""
+        names = query.get("name", [""])[0].split(";")
+        if query.get("multi", ["false"])[0] == "true":
+            return {"result": [self.gender(name) for name in names], "credits_used": len(names)}
+        return self.gender(names[0])
+
+
+def _handler(services):
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        # keep the connections open, like the real APIs, so that the clients can pool them
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            service, _, path = url.path.lstrip("/").partition("/")
+            if service not in SERVICES:
+                self.send_error(404)
+                return
+            if services.delay_and_fail(service):
+                self.send_error(503, "Mock error")
+                return
+            if service == "opencitations":
+                kind, _, doi = path.partition("/")
+                response = services.opencitations(kind, unquote(doi))
+                services.count_items(service, len(response))
+            elif service == "crossref" and path == "works":
+                response = services.crossref(query)
+                services.count_items(service, len(response["message"]["items"]))
+            elif service == "gender-api" and path == "get":
+                response = services.gender_api(query)
+                services.count_items(service, len(response.get("result", [response])))
+            else:
+                self.send_error(404)
+                return
+            body = json.dumps(response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    services = MockServices(SyntheticCorpus.generate(n), port=port)
+    print(f"Serving {n} references at {services.url}, use:")
+    print(" ".join(f"{option} {url}" for option, url in services.urls.items()))
+    services.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        services.stop()
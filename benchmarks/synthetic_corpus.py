@@ -0,0 +1,213 @@
+"""
+Deterministic synthetic corpus for the pipeline benchmarks.
+
+Generates the papers citing the CITED_DOIS, their reference lists, and the authors of every
+paper, with the statistics of the real data:
+- the number of references per citing paper follows a log-normal distribution fitted to the
+  reference lists of citing_papers.csv, up to their maximum;
+- the references are drawn from a pool of papers with Zipf-like popularity, so that papers are
+  cited by several citing papers about as often as in citing_papers.csv (a heavy-tailed
+  in-degree distribution);
+- the given names of the authors are drawn with the frequencies of the first and last author
+  names of citing_papers.csv, plus the names of name_dict.json (which gender-guesser doesn't
+  know), names nobody knows (which are sent to the gender API), and Crossref-like spellings
+  ("J. Maria", "MARIA").
+
+The same n_references and seed always give the same corpus. The authors of each paper are
+derived from its DOI when they are requested, so the corpus stays small at any size.
+
+Usage: python benchmarks/synthetic_corpus.py [n_references] [seed]
+"""
+import json
+import os
+import random
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+REPO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_PATH, "src", "data"))
+from make_dataset import CITED_DOIS  # noqa: E402
+
+NAME_DICT_PATH = os.path.join(REPO_PATH, "src", "data", "name_dict.json")
+DATAFILE_PATH = os.path.join(REPO_PATH, "data", "citing_papers.csv")
+
+# Zipf exponent of the popularity of the referenced papers, and size of the pool they are drawn
+# from (times n_references). Together they give the 1.2 references per referenced paper, and
+# the most referenced paper, of citing_papers.csv.
+POPULARITY_EXPONENT = 0.6
+POOL_RATIO = 4
+# Fraction of the authors whose given name nobody knows, so their gender is asked to the gender API
+UNKNOWN_NAME_RATE = 0.05
+# Number of distinct names nobody knows (they repeat, like real names)
+N_UNKNOWN_NAMES = 2000
+# Fraction of the given names that are spelled like in some Crossref records, e.g. "J. Maria"
+VARIANT_RATE = 0.2
+# Fraction of the referenced papers that Crossref doesn't know
+MISSING_WORK_RATE = 0.03
+# Maximum number of authors of a paper, and mean number of authors
+MAX_AUTHORS = 50
+MEAN_AUTHORS = 6
+# Creation dates of the citing papers
+FIRST_DATE = np.datetime64("2020-03-01")
+LAST_DATE = np.datetime64("2024-12-31")
+
+# Syllables of the names nobody knows
+_SYLLABLES = ["ka", "lo", "mi", "ru", "zen", "ta", "vo", "shi", "bel", "dra", "qui", "yo", "fen", "gu", "xa", "pim"]
+_VARIANTS = [
+    lambda name: name.upper(),
+    lambda name: f"{name[0]}. {name}",
+    lambda name: f"{name} {name[0]}.",
+    lambda name: f"{name}-{name[0].lower()}",
+]
+
+
+def fit_statistics(datafile_path=DATAFILE_PATH, name_dict_path=NAME_DICT_PATH):
+    """
+    Get the statistics the corpus is generated with from the real data.
+
+    Outputs
+    -------
+    statistics : dict
+        "references_log_mean", "references_log_std" and "references_max" (of the number of
+        references per citing paper), "cited_shares" (fraction of the citing papers of each
+        cited entity), "no_author_rate" (fraction of the papers without authors), and "names"
+        (weights of the given names).
+    """
+    df = pd.read_csv(datafile_path)
+    citing_rows = df[df["citing_doi"].isna()]
+    n_references = df.dropna(subset=["citing_doi"]).groupby("citing_doi").size()
+    cited_shares = citing_rows["cited_entity"].value_counts(normalize=True)
+    names = Counter(pd.concat([df["first_author_name"], df["last_author_name"]]).dropna())
+    with open(name_dict_path, "r") as name_dict_file:
+        for name in json.load(name_dict_file):
+            names[name] += 1
+    return {
+        "references_log_mean": float(np.log(n_references).mean()),
+        "references_log_std": float(np.log(n_references).std()),
+        "references_max": int(n_references.max()),
+        "cited_shares": {entity: float(cited_shares.get(entity, 0)) for entity in CITED_DOIS},
+        "no_author_rate": float(df["first_author_name"].isna().mean()),
+        "names": dict(names),
+    }
+
+
+def unknown_name(i):
+    """A made-up given name, e.g. "Kalomiru", different for every i."""
+    syllables = []
+    while True:
+        i, syllable = divmod(i, len(_SYLLABLES))
+        syllables.append(_SYLLABLES[syllable])
+        if len(syllables) >= 3 and not i:
+            return "".join(syllables).capitalize()
+
+
+class SyntheticCorpus:
+    """
+    Citations, references and authors of a synthetic corpus, see generate.
+
+    Inputs
+    ------
+    citations : dict
+        Maps the CITED_DOIS to their citation items ({"citing", "cited", "creation"} dicts),
+        as listed by opencitations.net.
+    references : dict
+        Maps the citing DOIs to the DOIs of their references.
+    names : dict
+        Weights of the given names of the authors.
+    no_author_rate : float
+        Fraction of the papers without authors.
+    seed : int
+        Seed of the authors.
+    """
+
+    def __init__(self, citations, references, names, no_author_rate, seed=0):
+        self.citations = citations
+        self.references = references
+        self.no_author_rate = no_author_rate
+        self.seed = seed
+        self._names = list(names)
+        self._cum_weights = np.cumsum(list(names.values())).tolist()
+        # letters only, since digits aren't part of names (see name_normalization.normalize)
+        self._unknown_names = [unknown_name(i) for i in range(N_UNKNOWN_NAMES)]
+
+    @property
+    def n_references(self):
+        cited_dois = set(CITED_DOIS.values())
+        return sum(sum(doi not in cited_dois for doi in ref_dois) for ref_dois in self.references.values())
+
+    @classmethod
+    def generate(cls, n_references, seed=0, statistics=None):
+        """
+        Generate a corpus with n_references references in total (besides those to the
+        CITED_DOIS), with the statistics of fit_statistics (default: of the real data).
+        """
+        statistics = fit_statistics() if statistics is None else statistics
+        rng = np.random.default_rng(seed)
+        pool_size = POOL_RATIO * n_references
+        popularity = np.cumsum(1 / np.arange(1, pool_size + 1) ** POPULARITY_EXPONENT)
+        cited_entities = [entity for entity, share in statistics["cited_shares"].items() if share > 0]
+        cited_shares = np.array([statistics["cited_shares"][entity] for entity in cited_entities])
+
+        citations = {doi: [] for doi in CITED_DOIS.values()}
+        references = {}
+        n = 0
+        while n < n_references:
+            citing_doi = f"10.5555/citing.{len(references)}"
+            n_refs = int(rng.lognormal(statistics["references_log_mean"], statistics["references_log_std"]))
+            n_refs = max(min(n_refs, statistics["references_max"], n_references - n), 1)
+            # a paper lists each of its references once
+            ref_ids = dict.fromkeys(np.searchsorted(popularity, rng.random(n_refs) * popularity[-1]).tolist())
+            cited_doi = CITED_DOIS[cited_entities[rng.choice(len(cited_entities), p=cited_shares)]]
+            creation = str(FIRST_DATE + rng.integers(0, (LAST_DATE - FIRST_DATE).astype(int) + 1))
+            citations[cited_doi].append({"citing": citing_doi, "cited": cited_doi, "creation": creation})
+            references[citing_doi] = [cited_doi] + [f"10.5555/ref.{ref_id}" for ref_id in ref_ids]
+            n += len(ref_ids)
+        return cls(citations, references, statistics["names"], statistics["no_author_rate"], seed)
+
+    def authors(self, doi):
+        """
+        Get the Crossref "author" field of a paper, or None if Crossref doesn't know it.
+
+        The authors are always the same for a DOI, since they are drawn with a generator seeded
+        with it.
+        """
+        rng = random.Random(f"{self.seed}:{doi}")
+        if doi not in self.references and rng.random() < MISSING_WORK_RATE:
+            return None
+        if rng.random() < self.no_author_rate:
+            return []
+        n_authors = min(1 + int(rng.expovariate(1 / (MEAN_AUTHORS - 1))), MAX_AUTHORS)
+        authors = []
+        for i in range(n_authors):
+            if rng.random() < UNKNOWN_NAME_RATE:
+                given = rng.choice(self._unknown_names)
+            else:
+                given = rng.choices(self._names, cum_weights=self._cum_weights)[0]
+            if len(given) > 1 and rng.random() < VARIANT_RATE:
+                given = rng.choice(_VARIANTS)(given)
+            authors.append({"given": given, "family": f"Family{rng.randrange(10_000)}",
+                            "sequence": "first" if i == 0 else "additional"})
+        return authors
+
+    def summary(self):
+        """Sizes of the corpus."""
+        ref_dois = [doi for dois in self.references.values() for doi in dois]
+        return {
+            "citing_papers": len(self.references),
+            "citations": {doi: len(items) for doi, items in self.citations.items()},
+            "references": self.n_references,
+            "referenced_papers": len(set(ref_dois) - set(CITED_DOIS.values())),
+            "max_references": max((len(dois) - 1 for dois in self.references.values()), default=0),
+        }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    corpus = SyntheticCorpus.generate(n, seed)
+    print(json.dumps(corpus.summary(), indent=4))
+    for doi in list(corpus.references)[:3] + corpus.references[next(iter(corpus.references))][1:3]:
+        print(doi, [author["given"] for author in corpus.authors(doi) or []])
@@ -0,0 +1,237 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from csv_sink import CHUNK_SIZE
+
+
+# Relative paths from src/data
+DATAFILE_PATH = "../../data/citing_papers.csv"
+CLASSES_PATH = "../../data/citing_papers__classes.csv"
+
+# Classes of a reference, by the genders of its first and last authors (e.g., "wm" is a woman
+# first author and a man last author), in the order of the manually gathered data
+CLASSES = ["mm", "wm", "mw", "ww"]
+# References that don't fit in the CLASSES (e.g., an author's gender is unknown)
+OTHER = "other"
+MAN_GENDERS = ["male"]
+WOMAN_GENDERS = ["female"]
+# Only counted as man/woman genders with include_mostly=True
+MOSTLY_MAN_GENDERS = ["mostly_male"]
+MOSTLY_WOMAN_GENDERS = ["mostly_female"]
+
+
+def gender_codes(genders, accuracies=None, include_mostly=False, min_accuracy=None):
+    """
+    Code guessed genders as 0 (man), 1 (woman), or -1 (neither, or not accurate enough).
+
+    The genders are converted to a categorical, so only the categories (i.e., a handful of
+    distinct values) are compared to the gender lists.
+
+    Inputs
+    ------
+    genders : sequence of strings
+        The guessed genders (e.g., the "first_author_gender" column of citing_papers.csv).
+    accuracies : sequence of floats
+        The accuracies of the guesses, in percent. NaN accuracies (i.e., guesses made by
+        gender-guesser) are always accurate enough. Optional.
+    include_mostly : bool
+        Whether "mostly_male" and "mostly_female" count as man and woman genders (default: False).
+    min_accuracy : float
+        Guesses whose accuracy is lower are coded -1. Optional.
+
+    Outputs
+    -------
+    codes : numpy array of int8
+        The code of each gender.
+    """
+    man_genders = MAN_GENDERS + (MOSTLY_MAN_GENDERS if include_mostly else [])
+    woman_genders = WOMAN_GENDERS + (MOSTLY_WOMAN_GENDERS if include_mostly else [])
+    genders = pd.Categorical(genders)
+    categories = np.asarray(genders.categories, dtype=object)
+    category_codes = np.select([np.isin(categories, man_genders), np.isin(categories, woman_genders)], [0, 1], -1)
+    # missing genders have the code -1, which picks the -1 appended at the end
+    codes = np.append(category_codes, -1).astype(np.int8)[genders.codes]
+    if min_accuracy is not None and accuracies is not None:
+        codes[np.asarray(accuracies, dtype=float) < min_accuracy] = -1
+    return codes
+
+
+def class_codes(df, include_mostly=False, min_accuracy=None):
+    """
+    Get the class of references as its index in CLASSES, or -1 if it doesn't fit in a class.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        Reference rows, with the gender columns of citing_papers.csv (and the accuracy columns,
+        if min_accuracy is given).
+    include_mostly : bool
+        See gender_codes (default: False).
+    min_accuracy : float
+        See gender_codes. Optional.
+
+    Outputs
+    -------
+    codes : numpy array of int8
+        The class code of each reference.
+    """
+    first, last = [
+        gender_codes(df[f"{author}_author_gender"], df.get(f"{author}_author_gender_accuracy"),
+                     include_mostly, min_accuracy)
+        for author in ["first", "last"]
+    ]
+    # the first author's gender is the low bit, so that mm, wm, mw, ww are 0, 1, 2, 3
+    return np.where((first >= 0) & (last >= 0), first + 2 * last, -1).astype(np.int8)
+
+
+def classify(first_author_genders, last_author_genders, include_mostly=False):
+    """
+    Get the class (mm, wm, mw, or ww) of references from the genders of their first and last authors.
+
+    Inputs
+    ------
+    first_author_genders : sequence of strings
+        The guessed genders of the first authors (e.g., the "first_author_gender" column of
+        citing_papers.csv).
+    last_author_genders : sequence of strings
+        The guessed genders of the last authors.
+    include_mostly : bool
+        See gender_codes (default: False).
+
+    Outputs
+    -------
+    classes : numpy array of strings
+        The class of each reference, or "" if one of the genders isn't a man or woman gender.
+    """
+    codes = class_codes(pd.DataFrame({"first_author_gender": first_author_genders,
+                                      "last_author_gender": last_author_genders}), include_mostly)
+    return np.array(CLASSES + [""], dtype=object)[codes]
+
+
+def class_counts(df, include_mostly=False, min_accuracy=None):
+    """
+    Count the references of each class.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        Reference rows, see class_codes.
+    include_mostly : bool
+        See gender_codes (default: False).
+    min_accuracy : float
+        See gender_codes. Optional.
+
+    Outputs
+    -------
+    counts : pandas Series
+        Number of references in each of the CLASSES (references without a class aren't counted).
+    """
+    codes = class_codes(df, include_mostly, min_accuracy)
+    return pd.Series(np.bincount(codes[codes >= 0], minlength=len(CLASSES)), index=CLASSES)
+
+
+def class_count_table(df, by="citing_doi", include_mostly=False, min_accuracy=None):
+    """
+    Count the references of each class, for each citing paper.
+
+    The rows are grouped by factorizing the by column, and all the groups are counted at once
+    with a single bincount over the (group, class) pairs.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        Reference rows, see class_codes. Rows whose by column is empty (e.g., the citing papers
+        themselves) are skipped.
+    by : string
+        Column of the citing paper (default: "citing_doi").
+    include_mostly : bool
+        See gender_codes (default: False).
+    min_accuracy : float
+        See gender_codes. Optional.
+
+    Outputs
+    -------
+    counts : pandas DataFrame
+        One row per citing paper (indexed by its DOI, in order of appearance), with the number
+        of references in each of the CLASSES and in OTHER.
+    """
+    groups, citing_dois = pd.factorize(df[by])
+    # OTHER is the last column, coded -1 like the references without a class
+    codes = class_codes(df, include_mostly, min_accuracy).astype(np.int64) % (len(CLASSES) + 1)
+    n_columns = len(CLASSES) + 1
+    keep = groups >= 0
+    counts = np.bincount(groups[keep] * n_columns + codes[keep], minlength=len(citing_dois) * n_columns)
+    return pd.DataFrame(counts.reshape(-1, n_columns), columns=CLASSES + [OTHER],
+                        index=pd.Index(citing_dois, name="doi"))
+
+
+def class_percentages(counts):
+    """
+    Convert the counts of class_count_table to percentages of each paper's references.
+
+    Outputs
+    -------
+    percentages : pandas DataFrame
+        One row per citing paper, with its "doi" and number of references ("n_references"), and
+        the percentage of its references in each of the CLASSES and in OTHER, like the mm, wm,
+        mw, ww, and other columns of the manually gathered data.
+    """
+    n_references = counts.sum(axis=1)
+    percentages = 100 * counts.div(n_references.where(n_references > 0), axis=0)
+    percentages.insert(0, "n_references", n_references)
+    return percentages.reset_index()
+
+
+def citing_paper_classes(path, include_mostly=False, min_accuracy=None):
+    """
+    Compute the class percentages of the references of each citing paper in a citation data file.
+
+    The file is read chunk by chunk, and the counts of the chunks are summed per citing paper,
+    so a citing paper's references can be spread over several chunks.
+
+    Inputs
+    ------
+    path : string
+        Path of the CSV file (e.g., citing_papers.csv).
+    include_mostly : bool
+        See gender_codes (default: False).
+    min_accuracy : float
+        See gender_codes. Optional.
+
+    Outputs
+    -------
+    percentages : pandas DataFrame
+        See class_percentages.
+    """
+    columns = ["citing_doi", "first_author_gender", "first_author_gender_accuracy",
+               "last_author_gender", "last_author_gender_accuracy"]
+    tables = [class_count_table(chunk, "citing_doi", include_mostly, min_accuracy)
+              for chunk in pd.read_csv(path, usecols=columns, chunksize=CHUNK_SIZE)]
+    if not tables:
+        return class_percentages(pd.DataFrame(columns=CLASSES + [OTHER], index=pd.Index([], name="doi")))
+    counts = pd.concat(tables).groupby(level=0, sort=False).sum()
+    return class_percentages(counts)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Compute the mm/wm/mw/ww percentages of the references of each citing paper.")
+    parser.add_argument("--include-mostly", action="store_true",
+                        help="count the mostly_male and mostly_female genders as man and woman genders")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="minimum accuracy (in percent) of the gender API guesses that are used")
+    args = parser.parse_args()
+
+    # Get path from working dir to src/data and join it to the relative paths
+    path_to_src_data = os.path.dirname(sys.argv[0])
+    for path_name in ["DATAFILE_PATH", "CLASSES_PATH"]:
+        globals()[path_name] = os.path.join(path_to_src_data, globals()[path_name])
+
+    percentages = citing_paper_classes(DATAFILE_PATH, args.include_mostly, args.min_accuracy)
+    print(f"Saving the classes of the references of {len(percentages)} citing papers to {CLASSES_PATH}")
+    percentages.to_csv(CLASSES_PATH, index=False)
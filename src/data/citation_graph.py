@@ -0,0 +1,186 @@
+import threading
+
+import numpy as np
+
+from doi_index import normalize_doi
+
+
+class CitationGraph:
+    """
+    In-memory citation graph, with integer ids for the DOIs and CSR-style adjacency arrays.
+
+    Edges are added as they are fetched (e.g., from get_dois), and compiled into two CSR arrays
+    (references and citations) the first time they are queried, so that "references of X" and
+    "papers citing X" take O(degree). Edges added afterwards are kept in per-node lists, which
+    references and citations read along with the CSR arrays; they are only compiled in by the
+    queries over many DOIs (citing_any) and by save. The graph also remembers which DOIs'
+    reference and citation lists were fetched, so a crawl can reuse them instead of asking
+    opencitations.net again.
+
+    DOIs are matched by their normalized form, but are returned as they were first added. The
+    graph can be shared by the threads of a Crawler.
+    """
+
+    def __init__(self):
+        self.dois = []
+        self._ids = {}
+        self._new_edges = []
+        self._edge_array = np.empty((0, 2), dtype=np.int64)
+        self._csr = None
+        # neighbours of each node added since the CSR arrays were compiled
+        self._pending = {"references": {}, "citations": {}}
+        self.references_fetched = set()
+        self.citations_fetched = set()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.dois)
+
+    def __contains__(self, doi):
+        return normalize_doi(doi) in self._ids
+
+    def doi_id(self, doi, add=True):
+        """
+        Get the integer id of a DOI.
+
+        Inputs
+        ------
+        doi : string
+            The DOI.
+        add : bool
+            Whether to give the DOI a new id if it isn't in the graph yet (default: True). If False,
+            missing DOIs raise a KeyError.
+        """
+        key = normalize_doi(doi)
+        if key not in self._ids:
+            if not add:
+                raise KeyError(doi)
+            self._ids[key] = len(self.dois)
+            self.dois.append(doi)
+        return self._ids[key]
+
+    def _add_edges(self, edges):
+        self._new_edges.extend(edges)
+        for citing_id, cited_id in edges:
+            self._pending["references"].setdefault(citing_id, []).append(cited_id)
+            self._pending["citations"].setdefault(cited_id, []).append(citing_id)
+
+    def add_references(self, citing_doi, ref_dois):
+        """
+        Add the edges from a citing DOI to its references, and mark its references as fetched.
+
+        Empty reference lists aren't marked as fetched, since opencitations.net may just not have
+        indexed them yet: they are fetched again once the HTTP cache entry expires.
+        """
+        with self._lock:
+            citing_id = self.doi_id(citing_doi)
+            self._add_edges([(citing_id, self.doi_id(doi)) for doi in ref_dois])
+            if ref_dois:
+                self.references_fetched.add(citing_id)
+
+    def add_citations(self, cited_doi, citing_dois):
+        """Add the edges from the papers citing a DOI to it, and mark its citations as fetched."""
+        with self._lock:
+            cited_id = self.doi_id(cited_doi)
+            self._add_edges([(self.doi_id(doi), cited_id) for doi in citing_dois])
+            self.citations_fetched.add(cited_id)
+
+    def has_references(self, doi):
+        """Whether the (non-empty) references of a DOI were fetched."""
+        return normalize_doi(doi) in self._ids and self._ids[normalize_doi(doi)] in self.references_fetched
+
+    def has_citations(self, doi):
+        """Whether the citations of a DOI were fetched (even if it has none)."""
+        return normalize_doi(doi) in self._ids and self._ids[normalize_doi(doi)] in self.citations_fetched
+
+    def _edges(self):
+        """Get the edges, deduplicated and in the order they were added, as citing and cited ids."""
+        if self._new_edges:
+            edges = np.concatenate([self._edge_array, np.array(self._new_edges, dtype=np.int64).reshape(-1, 2)])
+            _, first = np.unique(edges, axis=0, return_index=True)
+            self._edge_array = edges[np.sort(first)]
+            self._new_edges = []
+        return self._edge_array[:, 0], self._edge_array[:, 1]
+
+    @staticmethod
+    def _build_csr(sources, targets, n_nodes):
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+        return indptr, targets[order].astype(np.int32)
+
+    def _compile(self, pending=True):
+        """Compile the CSR arrays if they weren't yet, or (if pending) if edges were added since."""
+        with self._lock:
+            if self._csr is None or (pending and self._new_edges):
+                citing, cited = self._edges()
+                self._csr = {
+                    "references": self._build_csr(citing, cited, len(self.dois)),
+                    "citations": self._build_csr(cited, citing, len(self.dois)),
+                }
+                self._pending = {"references": {}, "citations": {}}
+            return self._csr
+
+    def _neighbours(self, doi, direction):
+        doi = normalize_doi(doi)
+        if doi not in self._ids:
+            return []
+        node = self._ids[doi]
+        with self._lock:
+            indptr, indices = self._compile(pending=False)[direction]
+            # nodes added after the compilation have no row yet
+            compiled = indices[indptr[node]:indptr[node + 1]].tolist() if node + 1 < len(indptr) else []
+            ids = dict.fromkeys(compiled + self._pending[direction].get(node, []))
+        return [self.dois[i] for i in ids]
+
+    def references(self, doi):
+        """Get the DOIs cited by a DOI."""
+        return self._neighbours(doi, "references")
+
+    def citations(self, doi):
+        """Get the DOIs of the papers citing a DOI."""
+        return self._neighbours(doi, "citations")
+
+    def citing_any(self, dois):
+        """
+        Get the DOIs of the papers citing any of the given DOIs (e.g., the cleanBib DOIs).
+
+        Outputs
+        -------
+        citing_dois : list of strings
+            The citing DOIs, each listed once, in the order of their ids.
+        """
+        indptr, indices = self._compile()["citations"]
+        nodes = [self._ids[normalize_doi(doi)] for doi in dois if normalize_doi(doi) in self._ids]
+        if not nodes:
+            return []
+        citing = np.unique(np.concatenate([indices[indptr[node]:indptr[node + 1]] for node in nodes]))
+        return [self.dois[i] for i in citing]
+
+    def save(self, path):
+        """Save the graph as a .npz file."""
+        with self._lock:
+            self._compile()
+            citing, cited = self._edges()
+            np.savez_compressed(
+                path,
+                dois=np.array(self.dois, dtype=object).astype(str),
+                citing=citing, cited=cited,
+                references_fetched=np.array(sorted(self.references_fetched), dtype=np.int64),
+                citations_fetched=np.array(sorted(self.citations_fetched), dtype=np.int64),
+            )
+
+    @classmethod
+    def load(cls, path):
+        """Load a graph saved with save."""
+        graph = cls()
+        with np.load(path) as data:
+            graph.dois = data["dois"].tolist()
+            graph._ids = {normalize_doi(doi): i for i, doi in enumerate(graph.dois)}
+            graph._edge_array = np.stack([data["citing"], data["cited"]], axis=1)
+            references_fetched = data["references_fetched"]
+            # graphs saved by older versions marked empty reference lists as fetched too
+            references_fetched = references_fetched[np.isin(references_fetched, data["citing"])]
+            graph.references_fetched = set(references_fetched.tolist())
+            graph.citations_fetched = set(data["citations_fetched"].tolist())
+        return graph
@@ -0,0 +1,113 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+# HTTP statuses of the errors that are worth retrying: rate limiting, and temporary server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces out calls to each host.
+
+    Inputs
+    ------
+    requests_per_second : float or dict
+        Maximum number of calls per second. Either one number used for every host, or a dict
+        mapping host names to their own limit (hosts missing from the dict aren't limited).
+        None disables rate limiting.
+    """
+
+    def __init__(self, requests_per_second=None):
+        self.requests_per_second = requests_per_second
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def _interval(self, host):
+        rate = self.requests_per_second
+        if isinstance(rate, dict):
+            rate = rate.get(host)
+        return 1.0 / rate if rate else 0.0
+
+    def wait(self, host):
+        """Block until a call to the given host is allowed."""
+        interval = self._interval(host)
+        if not interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Crawler:
+    """
+    Bounded thread pool that fans out network lookups (e.g., get_dois or names_from_xref).
+
+    Each call is rate limited per host and retried with exponential backoff if it raises a
+    network error.
+
+    Inputs
+    ------
+    max_workers : int
+        Maximum number of concurrent lookups (default: 8).
+    requests_per_second : float or dict
+        Per-host rate limit, see RateLimiter. Optional.
+    retries : int
+        Number of times a failed call is retried before the error is raised (default: 3).
+    backoff : float
+        Delay in seconds before the first retry, doubled for each following retry (default: 1).
+    """
+
+    retry_on = (requests.exceptions.RequestException, ValueError)
+
+    def __init__(self, max_workers=8, requests_per_second=None, retries=3, backoff=1.0):
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.retries = retries
+        self.backoff = backoff
+
+    def call(self, func, item, host):
+        """
+        Call func(item), waiting for the rate limiter and retrying on network errors.
+
+        ValueError is retried too since that is what a truncated JSON response raises.
+        """
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait(host)
+            try:
+                return func(item)
+            except self.retry_on:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def map(self, func, items, host):
+        """
+        Apply func to every item concurrently.
+
+        Inputs
+        ------
+        func : callable
+            Function taking a single item, e.g. a DOI.
+        items : iterable
+            Items to look up.
+        host : string
+            Host that func sends its requests to, used for rate limiting.
+
+        Outputs
+        -------
+        results : list
+            The results of func, in the same order as items. The items are read as they are
+            submitted, so a generator of items (e.g., batches of DOIs being downloaded) is
+            processed while it is still being read.
+        """
+        if self.max_workers <= 1:
+            return [self.call(func, item, host) for item in items]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda item: self.call(func, item, host), items))
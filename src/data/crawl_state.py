@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import time
+
+import pandas as pd
+
+
+class CrawlState:
+    """
+    Checkpoint of a make_dataset.py crawl, saved in a SQLite file.
+
+    It records the rows of the new citing papers, and which citing papers have all their
+    references saved, so a crawl that dies can be resumed exactly where it stopped. The rows of
+    the references themselves are streamed to a CsvSink.
+
+    Inputs
+    ------
+    path : string
+        Path of the SQLite file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.run_id = None
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, started_at REAL, finished_at REAL);
+            CREATE TABLE IF NOT EXISTS citing_rows (run_id INTEGER, row TEXT);
+            CREATE TABLE IF NOT EXISTS done_citing (run_id INTEGER, doi TEXT, PRIMARY KEY (run_id, doi));
+        """)
+        self._db.commit()
+
+    def start(self, resume=False):
+        """
+        Start a new run, or resume the last one if it didn't finish.
+
+        Inputs
+        ------
+        resume : bool
+            Whether to resume the last unfinished run. If False, the data of unfinished runs is
+            discarded (default: False).
+
+        Outputs
+        -------
+        resumed : bool
+            Whether an unfinished run was resumed.
+        """
+        last = self._db.execute("SELECT id, finished_at FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        if resume and last is not None and last[1] is None:
+            self.run_id = last[0]
+            return True
+        with self._db:
+            unfinished = "(SELECT id FROM runs WHERE finished_at IS NULL)"
+            for table in ["citing_rows", "done_citing"]:
+                self._db.execute(f"DELETE FROM {table} WHERE run_id IN {unfinished}")
+            self._db.execute("DELETE FROM runs WHERE finished_at IS NULL")
+            self.run_id = self._db.execute(
+                "INSERT INTO runs (started_at) VALUES (?)", (time.time(),)
+            ).lastrowid
+        return False
+
+    def _insert_rows(self, table, rows):
+        self._db.executemany(
+            f"INSERT INTO {table} VALUES (?, ?)",
+            [(self.run_id, json.dumps(row)) for row in rows.to_dict("records")],
+        )
+
+    def _read_rows(self, table):
+        rows = self._db.execute(f"SELECT row FROM {table} WHERE run_id = ? ORDER BY rowid", (self.run_id,))
+        return pd.DataFrame([json.loads(row) for row, in rows])
+
+    def has_citing_rows(self):
+        """Whether the citing papers of this run were saved (i.e., the citing stage is done)."""
+        return self._db.execute(
+            "SELECT 1 FROM done_citing WHERE run_id = ? AND doi = ''", (self.run_id,)
+        ).fetchone() is not None
+
+    def save_citing_rows(self, rows):
+        """Save the rows of the new citing papers, marking the citing stage as done."""
+        with self._db:
+            self._insert_rows("citing_rows", rows)
+            # the empty DOI marks the citing stage as done, even if there are no new citing papers
+            self._db.execute("INSERT INTO done_citing VALUES (?, '')", (self.run_id,))
+
+    def citing_rows(self):
+        """Get the saved rows of the new citing papers, as a DataFrame."""
+        return self._read_rows("citing_rows")
+
+    def done_citing_dois(self):
+        """Get the set of citing DOIs whose references are done."""
+        rows = self._db.execute("SELECT doi FROM done_citing WHERE run_id = ? AND doi != ''", (self.run_id,))
+        return {doi for doi, in rows}
+
+    def save_done(self, citing_dois):
+        """Mark citing papers as done, once the rows of all their references are saved."""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO done_citing VALUES (?, ?)", [(self.run_id, doi) for doi in citing_dois]
+            )
+
+    def finish(self):
+        """Mark the run as finished, and drop its rows since they are saved in the output."""
+        with self._db:
+            for table in ["citing_rows", "done_citing"]:
+                self._db.execute(f"DELETE FROM {table} WHERE run_id = ?", (self.run_id,))
+            self._db.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+
+# Columns of citing_papers.csv, in order
+COLUMNS = ["doi", "cited_doi", "cited_entity",
+           "first_author_gender", "first_author_gender_accuracy", "first_author_name",
+           "last_author_gender", "last_author_gender_accuracy", "last_author_name",
+           "citing_doi", "citing_entity"]
+CHUNK_SIZE = 50_000
+
+
+class CsvSink:
+    """
+    Appends rows to a CSV file as they are produced, with a fixed set of columns.
+
+    The file is written without an index column. Rows are only held in memory one chunk at a
+    time, including when the file is compacted.
+
+    Inputs
+    ------
+    path : string
+        Path of the CSV file.
+    columns : list of strings
+        Columns of the file, in order (default: COLUMNS). Columns missing from the written rows
+        are left empty, and other columns are dropped.
+    """
+
+    def __init__(self, path, columns=COLUMNS):
+        self.path = path
+        self.columns = list(columns)
+
+    def has_schema(self):
+        """Whether the file is missing, or has exactly the expected header."""
+        if not os.path.isfile(self.path) or os.path.getsize(self.path) == 0:
+            return True
+        return list(pd.read_csv(self.path, nrows=0).columns) == self.columns
+
+    def write(self, rows):
+        """
+        Append rows to the file, writing the header first if the file is new.
+
+        Inputs
+        ------
+        rows : pandas DataFrame
+            The rows to append.
+        """
+        write_header = not os.path.isfile(self.path) or os.path.getsize(self.path) == 0
+        rows.reindex(columns=self.columns).to_csv(self.path, mode="a", header=write_header, index=False)
+
+    def write_csv(self, path):
+        """Append all the rows of another CSV file (e.g., another sink's file), chunk by chunk."""
+        if not os.path.isfile(path) or os.path.getsize(path) == 0:
+            return
+        for chunk in pd.read_csv(path, chunksize=CHUNK_SIZE):
+            self.write(chunk)
+
+    def compact(self):
+        """
+        Rewrite the file with the expected columns and without duplicated rows.
+
+        Columns that aren't expected (e.g., "Unnamed: 0" index columns written by older versions
+        of make_dataset.py) are dropped. The file is replaced atomically.
+
+        Rows are duplicates if their text is the same (they are read as strings, since pandas
+        infers the dtypes of each chunk separately), and the first one is kept. The rows seen so
+        far are kept in a temporary SQLite file rather than in memory.
+
+        Outputs
+        -------
+        n_dropped : int
+            Number of duplicated rows dropped.
+        """
+        if not os.path.isfile(self.path) or os.path.getsize(self.path) == 0:
+            return 0
+        tmp_path = self.path + ".tmp"
+        seen_path = self.path + ".seen"
+        for path in [tmp_path, seen_path]:
+            if os.path.isfile(path):
+                os.remove(path)
+        tmp_sink = CsvSink(tmp_path, self.columns)
+        seen = sqlite3.connect(seen_path)
+        seen.execute("PRAGMA journal_mode=OFF")
+        seen.execute("PRAGMA synchronous=OFF")
+        seen.execute("CREATE TABLE rows (n INTEGER PRIMARY KEY, row TEXT UNIQUE)")
+        n_rows = 0
+        n_dropped = 0
+        try:
+            for chunk in pd.read_csv(self.path, chunksize=CHUNK_SIZE, dtype=str, keep_default_na=False):
+                chunk = chunk.reindex(columns=self.columns).fillna("")
+                rows = chunk[self.columns[0]]
+                for column in self.columns[1:]:
+                    rows = rows + "\x1f" + chunk[column]
+                numbers = range(n_rows, n_rows + len(chunk))
+                # only the first of the identical rows is inserted
+                seen.executemany("INSERT OR IGNORE INTO rows VALUES (?, ?)", zip(numbers, rows))
+                new = {n for n, in seen.execute("SELECT n FROM rows WHERE n >= ?", (n_rows,))}
+                keep = [n in new for n in numbers]
+                n_rows += len(chunk)
+                n_dropped += len(keep) - len(new)
+                tmp_sink.write(chunk[keep])
+        finally:
+            seen.close()
+            os.remove(seen_path)
+        if not os.path.isfile(tmp_path):
+            # every chunk was empty, keep just the header
+            tmp_sink.write(pd.DataFrame(columns=self.columns))
+        os.replace(tmp_path, self.path)
+        return n_dropped
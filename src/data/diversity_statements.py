@@ -0,0 +1,164 @@
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+# Relative paths from src/data
+DATAFILE_PATH = "../../data/citing_papers__manually_gathered.csv"
+
+CLASSES = ["mm", "wm", "mw", "ww"]
+# Share of the references without a class (e.g., "and 11.5% unknown categorization")
+OTHER = "other"
+# A statement is extracted with "high" confidence if its four classes are found and its
+# percentages (with the unknown share) add up to 100 within this tolerance
+SUM_TOLERANCE = 2.0
+# validate fails if fewer statements than this agree with the hand-entered values
+MIN_AGREEMENT = 0.9
+
+# e.g. "58.6%", "18 %", "57% (n=25)", "49% were authored by"
+_PERCENTAGE = r"(?P<percentage>\d+(?:\.\d+)?)\s*%(?:\s*\(n\s*=\s*\d+\))?\s*(?:were\s+)?(?:authored\s+by\s+)?"
+# e.g. "woman", "female", "W" (uppercase only, so that it isn't an "m" or "w" in the text)
+_GENDER = r"(?:wo)?man|(?:fe)?male|(?-i:[MW])\b"
+# e.g. "(first)", "(first author)", "(last)"
+_POSITION = r"(?:\s*\((?P<{}>[^)]{{0,20}})\))?"
+# e.g. "/", "-", "–", "/-" (a line break in a PDF)
+_SEPARATOR = r"\s*[/\-–—]\s*-?\s*"
+# e.g. "woman(first)/woman(last)", "man(last)/woman(first)", "male/female", "man–man", "M/W", "WM"
+_CLASS = (rf"(?P<first>{_GENDER}){_POSITION.format('first_position')}{_SEPARATOR}"
+          rf"(?P<last>{_GENDER}){_POSITION.format('last_position')}"
+          r"|(?P<abbreviation>MM|WM|MW|WW)\b"
+          r"|(?P<unknown>unknown)")
+STATEMENT_PATTERN = re.compile(_PERCENTAGE + rf"(?:{_CLASS})", re.IGNORECASE)
+
+
+def _letter(words):
+    # woman/female -> w, man/male -> m
+    return np.where(words.str[0].str.lower().isin(["w", "f"]), "w", "m")
+
+
+def extract_percentages(statements):
+    """
+    Extract the reported percentages of each class from diversity statements.
+
+    All the statements are matched at once with STATEMENT_PATTERN (i.e., "<percentage>%
+    <first author gender>/<last author gender>", with the man/woman, male/female, M/W, and
+    MM/WM/MW/WW spellings, or "<percentage>% unknown"). Genders qualified with their position,
+    e.g. "man(last)/woman(first)", are put back in first/last order. When a statement reports a
+    class several times (e.g., it also quotes the expected percentages), the first percentage is
+    kept.
+
+    Inputs
+    ------
+    statements : pandas Series of strings
+        The diversity statements (e.g., the "diversity_statement" column of
+        citing_papers__manually_gathered.csv).
+
+    Outputs
+    -------
+    percentages : pandas DataFrame
+        One row per statement, with the same index, the percentage of each of the CLASSES and
+        OTHER (NaN if not reported), and the "confidence" of the extraction: "high" if the four
+        classes were found and add up to 100 (with OTHER, within SUM_TOLERANCE), "low" if only
+        some of them were found or they don't add up, and "none" if no class was found.
+    """
+    statements = pd.Series(statements).astype("string")
+    matches = statements.str.extractall(STATEMENT_PATTERN)
+    columns = CLASSES + [OTHER]
+    if len(matches):
+        # the genders are given last author first, e.g. "man(last)/woman(first)"
+        swapped = (matches["first_position"].str.contains("last", case=False, na=False)
+                   | matches["last_position"].str.contains("first", case=False, na=False)).to_numpy()
+        first = _letter(matches["first"].fillna(""))
+        last = _letter(matches["last"].fillna(""))
+        classes = np.where(
+            matches["abbreviation"].notna(), matches["abbreviation"].str.lower(),
+            np.where(matches["first"].notna(),
+                     np.char.add(np.where(swapped, last, first), np.where(swapped, first, last)),
+                     OTHER),
+        )
+        matches = pd.DataFrame({
+            "statement": matches.index.get_level_values(0),
+            "class": classes,
+            "percentage": matches["percentage"].astype(float).to_numpy(),
+        })
+        # the first percentage of each class in each statement
+        matches = matches.drop_duplicates(["statement", "class"])
+        percentages = matches.pivot(index="statement", columns="class", values="percentage")
+        percentages = percentages.reindex(index=statements.index, columns=columns)
+    else:
+        percentages = pd.DataFrame(np.nan, index=statements.index, columns=columns)
+    percentages.columns.name = None
+
+    n_classes = percentages[CLASSES].notna().sum(axis=1)
+    total = percentages[columns].sum(axis=1)
+    percentages["confidence"] = np.select(
+        [(n_classes == len(CLASSES)) & ((total - 100).abs() <= SUM_TOLERANCE), n_classes > 0],
+        ["high", "low"], "none",
+    )
+    return percentages
+
+
+def validate(df, tolerance=0.01):
+    """
+    Compare the percentages extracted from diversity statements with the hand-entered ones.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        Manually gathered data, with "diversity_statement" and hand-entered mm, wm, mw, and ww
+        columns.
+    tolerance : float
+        Maximum difference between an extracted and a hand-entered percentage (default: 0.01).
+
+    Outputs
+    -------
+    comparison : pandas DataFrame
+        One row per statement with hand-entered values, with the extracted percentages
+        ("<class>_extracted"), the hand-entered ones, the "confidence" of the extraction, and
+        whether all four classes agree ("agrees").
+    """
+    df = df[df[CLASSES].notna().all(axis=1)]
+    extracted = extract_percentages(df["diversity_statement"])
+    comparison = extracted[CLASSES + ["confidence"]].add_suffix("_extracted").rename(
+        columns={"confidence_extracted": "confidence"})
+    comparison = pd.concat([df[CLASSES].astype(float), comparison], axis=1)
+    differences = np.abs(extracted[CLASSES].to_numpy() - df[CLASSES].to_numpy(dtype=float))
+    comparison["agrees"] = (differences <= tolerance).all(axis=1)
+    return comparison
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Extract the mm/wm/mw/ww percentages of diversity statements, and check them against "
+                    "the hand-entered ones of the manually gathered data.")
+    parser.add_argument("--data", default=None,
+                        help=f"CSV file with a diversity_statement column (default: {DATAFILE_PATH})")
+    parser.add_argument("--output", default=None,
+                        help="save the statements' extracted percentages to this CSV file")
+    args = parser.parse_args()
+
+    # Get path from working dir to src/data and join it to the relative paths
+    path_to_src_data = os.path.dirname(sys.argv[0])
+    DATAFILE_PATH = os.path.join(path_to_src_data, DATAFILE_PATH)
+
+    df = pd.read_csv(args.data or DATAFILE_PATH)
+    if args.output:
+        extract_percentages(df["diversity_statement"]).to_csv(args.output, index=False)
+
+    if set(CLASSES) <= set(df.columns):
+        comparison = validate(df)
+        agreement = comparison["agrees"].mean()
+        print(f"{comparison['agrees'].sum()} / {len(comparison)} statements agree with the hand-entered values "
+              f"({100 * agreement:.1f}%)")
+        print(comparison["confidence"].value_counts().to_string())
+        disagreements = comparison[~comparison["agrees"]]
+        if len(disagreements):
+            print("\nStatements that don't agree:")
+            print(disagreements.to_string())
+        if agreement < MIN_AGREEMENT:
+            sys.exit(f"Less than {100 * MIN_AGREEMENT:.0f}% of the statements agree")
@@ -0,0 +1,96 @@
+from records import AuthorRecord, intern_string
+
+
+# Fields of the name/gender data of a DOI, as returned by get_data
+DATA_FIELDS = ["doi", "first_author_name", "first_author_gender", "first_author_gender_accuracy",
+               "last_author_name", "last_author_gender", "last_author_gender_accuracy"]
+
+DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:")
+
+
+def normalize_doi(doi):
+    """
+    Normalize a DOI so that different spellings of the same DOI match.
+
+    DOIs are case-insensitive, and are sometimes written as a doi.org URL.
+
+    Inputs
+    ------
+    doi : string
+        The DOI, e.g. "https://doi.org/10.1038/S41593-020-0658-Y".
+
+    Outputs
+    -------
+    doi : string
+        The normalized DOI, e.g. "10.1038/s41593-020-0658-y".
+    """
+    doi = doi.strip().lower()
+    for prefix in DOI_PREFIXES:
+        if doi.startswith(prefix):
+            return doi[len(prefix):]
+    return doi
+
+
+class DoiIndex:
+    """
+    Maps normalized DOIs to their name/gender data, for constant-time lookups of DOIs that were
+    already found.
+
+    Only the first row added for a DOI is kept, like df[df["doi"] == doi].iloc[0] would find.
+    The rows are kept as AuthorRecords, which take much less memory than dicts.
+    """
+
+    def __init__(self):
+        self._rows = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build an index from a DataFrame with a "doi" column, e.g. the saved citing_papers.csv.
+
+        Fields missing from the DataFrame are set to None.
+        """
+        index = cls()
+        index.update(df)
+        return index
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, doi):
+        return normalize_doi(doi) in self._rows
+
+    def add(self, row):
+        """
+        Add a row, unless its DOI is already in the index.
+
+        Inputs
+        ------
+        row : dict, pandas Series, or AuthorRecord
+            Row with (at least) a "doi" field.
+        """
+        doi = row.doi if isinstance(row, AuthorRecord) else row["doi"]
+        if not isinstance(doi, str):  # e.g. NaN in an empty row
+            return
+        key = normalize_doi(doi)
+        if key not in self._rows:
+            self._rows[key] = row if isinstance(row, AuthorRecord) else AuthorRecord.from_row(row)
+
+    def get(self, doi):
+        """
+        Get a copy of the data of a DOI.
+
+        Outputs
+        -------
+        data : dict
+            The fields of the first row added for the DOI, or None if the DOI isn't in the index.
+        """
+        row = self._rows.get(normalize_doi(doi))
+        return None if row is None else row.as_dict()
+
+    def update(self, df):
+        """Add all the rows of a DataFrame."""
+        columns = [df[field] if field in df.columns else [None] * len(df) for field in DATA_FIELDS]
+        for values in zip(*columns):
+            if isinstance(values[0], str) and normalize_doi(values[0]) not in self._rows:
+                self.add(AuthorRecord(*(intern_string(value) for value in values)))
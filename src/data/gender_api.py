@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from crawl import RETRY_STATUSES
+from instrumentation import STATS
+
+
+GENDER_API_URL = "https://gender-api.com/get"
+# Maximum number of names the gender API accepts in a single multi-name request
+MAX_NAMES_PER_REQUEST = 100
+
+
+class RequestsTransport:
+    """
+    Default transport of the GenderApiClient: a GET request with a pooled requests.Session.
+
+    A transport is any callable taking a URL and a dict of query parameters and returning the
+    decoded JSON response, so tests can swap in a fake one.
+
+    Network errors and responses with a RETRY_STATUSES status (e.g., 429 Too Many Requests) are
+    retried with exponential backoff, other errors are raised as requests.HTTPError.
+    """
+
+    def __init__(self, timeout=30, retries=3, backoff=1.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+
+    def __call__(self, url, params=None):
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response.json()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.backoff * 2 ** attempt)
+
+
+class GenderApiClient:
+    """
+    Client of the gender API (https://gender-api.com/) that looks up many names per request.
+
+    Unknown names are queued during a crawl stage, then sent in batches with the API's multi-name
+    form (name=a;b;c&multi=true). Each name costs one credit, so the client stops sending names
+    once the quota is used up.
+
+    Inputs
+    ------
+    api_key : string
+        The API key for the gender API.
+    url : string
+        URL of the API's "get" endpoint (default: GENDER_API_URL).
+    transport : callable
+        Function sending the requests, see RequestsTransport (default: RequestsTransport()).
+    max_workers : int
+        Maximum number of concurrent requests (default: 4).
+    batch_size : int
+        Number of names per request (default: MAX_NAMES_PER_REQUEST).
+    quota : int
+        Maximum number of credits to use. None means no limit.
+    """
+
+    def __init__(self, api_key, url=GENDER_API_URL, transport=None, max_workers=4,
+                 batch_size=MAX_NAMES_PER_REQUEST, quota=None):
+        self.api_key = api_key
+        self.url = url
+        self.transport = RequestsTransport() if transport is None else transport
+        self.max_workers = max_workers
+        self.batch_size = min(batch_size, MAX_NAMES_PER_REQUEST)
+        self.quota = quota
+        self.credits_used = 0
+        self.n_requests = 0
+        self._queue = {}
+        self._lock = threading.Lock()
+
+    @property
+    def credits_left(self):
+        return None if self.quota is None else max(self.quota - self.credits_used, 0)
+
+    def queue(self, name):
+        """Add a name to look up with the next flush. Names already queued are ignored."""
+        self._queue[name] = None
+
+    def _reserve(self, n_names):
+        """Reserve credits for up to n_names names, returning how many can be sent."""
+        with self._lock:
+            if self.quota is not None:
+                n_names = min(n_names, self.quota - self.credits_used)
+            n_names = max(n_names, 0)
+            self.credits_used += n_names
+            return n_names
+
+    def _request(self, names):
+        n_names = self._reserve(len(names))
+        names = names[:n_names]
+        if not names:
+            return {}
+        STATS.count_request(self.url)
+        response = self.transport(self.url, {"key": self.api_key, "name": ";".join(names), "multi": "true"})
+        with self._lock:
+            self.n_requests += 1
+            if "credits_used" in response:
+                self.credits_used += response["credits_used"] - n_names
+        return {result["name"]: {"gender": result["gender"], "accuracy": result["accuracy"]}
+                for result in response.get("result", [])}
+
+    def lookup(self, names):
+        """
+        Look up names with as few requests as possible.
+
+        Inputs
+        ------
+        names : iterable of strings
+            The first names to look up. Duplicates are only looked up once.
+
+        Outputs
+        -------
+        results : dict
+            Maps the names to {"gender": ..., "accuracy": ...} dicts, as stored in name_dict. Names
+            that weren't sent because the quota ran out are missing.
+        """
+        names = list(dict.fromkeys(names))
+        batches = [names[i:i + self.batch_size] for i in range(0, len(names), self.batch_size)]
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch_results in executor.map(self._request, batches):
+                results.update(batch_results)
+        # the API lowercases the names it returns, so map them back to the given spelling
+        lower_results = {name.lower(): result for name, result in results.items()}
+        return {name: lower_results[name.lower()] for name in names if name.lower() in lower_results}
+
+    def flush(self, name_dict):
+        """
+        Look up all the queued names and merge the results into name_dict in one step.
+
+        Outputs
+        -------
+        results : dict
+            The new entries of name_dict.
+        """
+        results = self.lookup(self._queue)
+        self._queue = {}
+        name_dict.update(results)
+        return results
@@ -0,0 +1,187 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import gender_guesser.detector as gender_detecor
+
+from name_cache import NameCache
+from name_normalization import normalize
+
+
+# Relative paths from src/data
+GENDER_TABLE_PATH = "gender_table"  # directory of .npy files
+NAME_DICT_PATH = "name_dict.json"  # only read to create the name cache
+NAME_CACHE_PATH = "name_cache.sqlite"
+
+# Genders of the table, by code
+GENDERS = ["unknown", "male", "female", "mostly_male", "mostly_female", "andy"]
+# Accuracy of the gender-guesser guesses, which don't have one
+NO_ACCURACY = -1
+
+
+class GenderTable:
+    """
+    Precompiled name -> (gender, accuracy) lookup table.
+
+    The table holds gender-guesser's guess for every name it knows, and the name_dict entries
+    (gender API results) of the names it doesn't know, i.e. what name_to_gender would find for a
+    name without making a request. Names are lowercased, as gender-guesser with
+    case_sensitive=False does, and the name_dict names are normalized like the names that are
+    looked up (see name_normalization.normalize). The table is made of sorted numpy arrays saved as .npy files,
+    which are memory-mapped when loaded: opening the table is almost instant (unlike creating a
+    gender-guesser Detector, which parses its whole name list), and a name is found with a single
+    binary search.
+
+    Inputs
+    ------
+    names : numpy array of strings
+        The sorted names.
+    genders : numpy array of ints
+        The gender of each name, as an index in GENDERS.
+    accuracies : numpy array of ints
+        The accuracy of each gender API guess, in percent (NO_ACCURACY for the gender-guesser
+        guesses).
+    """
+
+    ARRAYS = ["names", "genders", "accuracies"]
+
+    def __init__(self, names, genders, accuracies):
+        self.names = names
+        self.genders = genders
+        self.accuracies = accuracies
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, name_dict=None):
+        """
+        Build the table from gender-guesser's name list and the entries of a name_dict.
+
+        Inputs
+        ------
+        name_dict : dict or NameCache
+            Gender API results, see make_dataset.name_to_gender. Optional.
+
+        Outputs
+        -------
+        table : GenderTable
+        """
+        detector = gender_detecor.Detector(case_sensitive=False)
+        entries = {name: (GENDERS.index(detector.get_gender(name)), NO_ACCURACY) for name in detector.names}
+        for name, value in (name_dict or {}).items():
+            # e.g. "SHIN'YA" is found as "Shin'ya", the normalized name that is looked up
+            name = normalize(name).lower()
+            if len(name) >= 2 and name not in entries and value["gender"] in GENDERS and value["accuracy"] is not None:
+                entries[name] = (GENDERS.index(value["gender"]), value["accuracy"])
+
+        names = sorted(entries)
+        return cls(np.array(names, dtype=str),
+                   np.array([entries[name][0] for name in names], dtype=np.int8),
+                   np.array([entries[name][1] for name in names], dtype=np.int16))
+
+    def save(self, path):
+        """Save the table as a directory of .npy files."""
+        os.makedirs(path, exist_ok=True)
+        for array_name in self.ARRAYS:
+            array_path = os.path.join(path, array_name + ".npy")
+            with open(array_path + ".tmp", "wb") as array_file:
+                np.save(array_file, getattr(self, array_name))
+            os.replace(array_path + ".tmp", array_path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a table saved with save, memory-mapped."""
+        return cls(*[np.load(os.path.join(path, array_name + ".npy"), mmap_mode="r")
+                     for array_name in cls.ARRAYS])
+
+    def get(self, name, default=None):
+        """
+        Look up a name.
+
+        Inputs
+        ------
+        name : string
+            The first name (case-insensitive).
+        default : any
+            What to return if the name isn't in the table (default: None).
+
+        Outputs
+        -------
+        gender : string
+            The gender of the name, as gender-guesser or the gender API guessed it.
+
+        accuracy : int
+            The accuracy of the gender API guess, in percent (None for gender-guesser guesses).
+        """
+        name = name.lower()
+        i = self.names.searchsorted(name)
+        if i == len(self.names) or self.names[i] != name:
+            return default
+        accuracy = int(self.accuracies[i])
+        return GENDERS[self.genders[i]], None if accuracy == NO_ACCURACY else accuracy
+
+    def lookup(self, names):
+        """
+        Look up many names at once, with a single vectorized binary search.
+
+        Inputs
+        ------
+        names : sequence of strings
+            The first names (case-insensitive).
+
+        Outputs
+        -------
+        found : numpy array of bools
+            Whether each name is in the table.
+
+        genders : numpy array of strings
+            The gender of each name ("unknown" if it isn't in the table).
+
+        accuracies : numpy array of floats
+            The accuracy of each gender API guess, in percent (NaN for gender-guesser guesses and
+            names that aren't in the table).
+        """
+        names = np.char.lower(np.asarray(names, dtype=str))
+        if not len(self.names):
+            return np.zeros(len(names), dtype=bool), np.full(len(names), GENDERS[0], dtype=object), \
+                np.full(len(names), np.nan)
+        i = np.minimum(self.names.searchsorted(names), len(self.names) - 1)
+        found = self.names[i] == names
+        genders = np.asarray(GENDERS, dtype=object)[np.where(found, self.genders[i], 0)]
+        accuracies = np.where(found, self.accuracies[i], NO_ACCURACY).astype(float)
+        accuracies[accuracies == NO_ACCURACY] = np.nan
+        return found, genders, accuracies
+
+
+def open_gender_table(path, name_dict=None):
+    """
+    Load the table saved at path, or build it and save it there if there isn't one.
+
+    Names added to name_dict afterwards aren't in the table, but name_to_gender still finds them
+    in name_dict. Run this script to rebuild the table, e.g. after updating gender-guesser.
+    """
+    if os.path.isfile(os.path.join(path, GenderTable.ARRAYS[0] + ".npy")):
+        return GenderTable.load(path)
+    print(f"{path} not found, it will be built from gender-guesser's name list and the name cache.")
+    GenderTable.build(name_dict).save(path)
+    return GenderTable.load(path)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Precompile gender-guesser's name list and the name cache into a lookup table.")
+    parser.parse_args()
+
+    # Get path from working dir to src/data and join it to the relative paths
+    path_to_src_data = os.path.dirname(sys.argv[0])
+    for path_name in ["GENDER_TABLE_PATH", "NAME_DICT_PATH", "NAME_CACHE_PATH"]:
+        globals()[path_name] = os.path.join(path_to_src_data, globals()[path_name])
+
+    name_dict = NameCache(NAME_CACHE_PATH, json_path=NAME_DICT_PATH)
+    table = GenderTable.build(name_dict)
+    name_dict.close()
+    table.save(GENDER_TABLE_PATH)
+    print(f"Saved {len(table)} names to {GENDER_TABLE_PATH}")
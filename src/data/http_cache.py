@@ -0,0 +1,145 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+# Default time-to-live, in seconds, of the cached responses of each source
+DEFAULT_TTLS = {
+    "opencitations": 7 * 24 * 3600,  # citation lists grow as new papers come out
+    "crossref": 90 * 24 * 3600,  # author lists rarely change
+}
+DEFAULT_MAX_BYTES = 500 * 1024 ** 2
+
+
+class CacheMiss(KeyError):
+    """Raised in cache-only mode when a response isn't in the cache."""
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of API responses, keyed by source (e.g., "opencitations") and key
+    (e.g., endpoint and DOI).
+
+    Entries older than their source's TTL are refetched. When the cache grows past max_bytes,
+    the least recently used entries are evicted.
+
+    Inputs
+    ------
+    path : string
+        Path of the SQLite file (":memory:" for a cache that isn't saved).
+    ttls : dict
+        Maps sources to the time-to-live of their entries, in seconds. Sources that aren't
+        listed never expire (default: DEFAULT_TTLS).
+    max_bytes : int
+        Maximum total size of the cached responses (default: DEFAULT_MAX_BYTES).
+    cache_only : bool
+        If True, never fetch anything: expired entries are still used and missing entries raise
+        CacheMiss (default: False).
+    """
+
+    def __init__(self, path, ttls=None, max_bytes=DEFAULT_MAX_BYTES, cache_only=False):
+        self.path = path
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets the worker processes of make_dataset.py share the cache
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "source TEXT, key TEXT, body TEXT, size INTEGER, fetched_at REAL, last_access REAL, "
+            "PRIMARY KEY (source, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS lru ON responses (last_access)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, source, key):
+        """
+        Get a cached response.
+
+        Outputs
+        -------
+        found : bool
+            Whether a usable (i.e., not expired, unless in cache-only mode) entry was found.
+        value :
+            The cached response, or None if it wasn't found.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, fetched_at FROM responses WHERE source = ? AND key = ?", (source, key)
+            ).fetchone()
+            ttl = self.ttls.get(source)
+            if row is None or (not self.cache_only and ttl is not None and now - row[1] > ttl):
+                self.misses += 1
+                return False, None
+            self._db.execute(
+                "UPDATE responses SET last_access = ? WHERE source = ? AND key = ?", (now, source, key)
+            )
+            self._db.commit()
+            self.hits += 1
+        return True, json.loads(row[0])
+
+    def set(self, source, key, value):
+        """Cache a JSON-serializable response, evicting old entries if the cache is full."""
+        body = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            old = self._db.execute(
+                "SELECT size FROM responses WHERE source = ? AND key = ?", (source, key)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (source, key, body, len(body), now, now),
+            )
+            self._size += len(body) - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT source, key, size FROM responses ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for source, key, size in rows:
+                self._db.execute("DELETE FROM responses WHERE source = ? AND key = ?", (source, key))
+                self._size -= size
+                if self._size <= self.max_bytes:
+                    break
+
+    def fetch(self, source, key, fetch_func):
+        """
+        Get a response from the cache, or fetch and cache it.
+
+        Inputs
+        ------
+        source : string
+            Name of the API, used to pick the TTL.
+        key : string
+            Key of the response within that source, e.g. "references/<doi>".
+        fetch_func : callable
+            Function without arguments that fetches the response from the API.
+
+        Outputs
+        -------
+        value :
+            The cached or newly fetched response.
+        """
+        found, value = self.get(source, key)
+        if found:
+            return value
+        if self.cache_only:
+            raise CacheMiss(f"{source}:{key} isn't cached and the cache is in cache-only mode.")
+        value = fetch_func()
+        self.set(source, key, value)
+        return value
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,110 @@
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class RunStats:
+    """
+    Thread-safe timers and counters of a crawl.
+
+    Timers record the number of calls and the total and maximum time of a stage (e.g., get_dois).
+    Nested timers are inclusive, e.g. get_data includes the name_to_gender calls it makes.
+    Counters count events, e.g. name_dict hits or requests to a host.
+    """
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            timer = self.timers.setdefault(name, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            timer["calls"] += 1
+            timer["total_seconds"] += seconds
+            timer["max_seconds"] = max(timer["max_seconds"], seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Time a block of code, e.g. `with STATS.timer("stage/references"): ...`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator timing each call of a function."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, summary):
+        """Add the timers and counters of a summary, e.g. from a worker process."""
+        with self._lock:
+            for name, other in summary["timers"].items():
+                timer = self.timers.setdefault(name, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+                timer["calls"] += other["calls"]
+                timer["total_seconds"] += other["total_seconds"]
+                timer["max_seconds"] = max(timer["max_seconds"], other["max_seconds"])
+            for name, value in summary["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        """Clear the timers and counters."""
+        with self._lock:
+            self.timers = {}
+            self.counters = {}
+            self.started_at = time.time()
+
+    def count_request(self, url):
+        """Count a request to the host of a URL, as "requests/<host>"."""
+        self.count("requests/" + urlparse(url).netloc)
+
+    def summary(self):
+        """
+        Get the timers and counters as a JSON-serializable dict.
+
+        Outputs
+        -------
+        summary : dict
+            The "wall_seconds" since the stats were created, the "timers" (with their mean time
+            per call), and the "counters".
+        """
+        with self._lock:
+            timers = {name: dict(timer, mean_seconds=timer["total_seconds"] / timer["calls"])
+                      for name, timer in sorted(self.timers.items())}
+            return {"wall_seconds": time.time() - self.started_at, "timers": timers,
+                    "counters": dict(sorted(self.counters.items()))}
+
+    def save(self, path, **extra):
+        """Save the summary, and any extra JSON-serializable fields, as a JSON file."""
+        with open(path, "w") as stats_file:
+            json.dump(dict(self.summary(), **extra), stats_file, indent=2)
+
+    def report(self):
+        """Get the timers and counters as a human-readable table."""
+        summary = self.summary()
+        lines = [f"{'timer':<28}{'calls':>10}{'total (s)':>12}{'mean (ms)':>12}{'max (ms)':>12}"]
+        for name, timer in summary["timers"].items():
+            lines.append(f"{name:<28}{timer['calls']:>10}{timer['total_seconds']:>12.2f}"
+                         f"{1000 * timer['mean_seconds']:>12.2f}{1000 * timer['max_seconds']:>12.2f}")
+        lines.append("")
+        lines.extend(f"{name:<40}{value:>10}" for name, value in summary["counters"].items())
+        return "\n".join(lines)
+
+
+# Stats shared by the modules of a crawl (make_dataset.py, gender_api.py)
+STATS = RunStats()
@@ -0,0 +1,389 @@
+import argparse
+import os
+import random
+import sys
+from urllib.parse import urlparse
+
+import pandas as pd
+
+import make_dataset
+from citation_classes import CLASSES, class_counts
+from citation_graph import CitationGraph
+from crawl import Crawler
+from csv_sink import CHUNK_SIZE, CsvSink
+from doi_index import DoiIndex, normalize_doi
+from gender_api import GenderApiClient, RequestsTransport
+from http_cache import CacheMiss, ResponseCache
+from make_dataset import CITED_DOIS, CROSSREF_BATCH_SIZE
+from gender_table import open_gender_table
+from name_cache import NameCache
+
+
+# Relative paths from src/data
+GENDER_API_KEY_PATH = "gender_api_key.txt"
+NAME_DICT_PATH = "name_dict.json"
+NAME_CACHE_PATH = "name_cache.sqlite"
+GENDER_TABLE_PATH = "gender_table"
+DATAFILE_PATH = "../../data/citing_papers.csv"
+CONTROL_SAMPLE_PATH = "../../data/control_sample.csv"
+CONTROL_DATAFILE_PATH = "../../data/control_papers.csv"
+DISTRIBUTIONS_PATH = "../../data/class_distributions.csv"
+HTTP_CACHE_PATH = "http_cache.sqlite"
+CITATION_GRAPH_PATH = "citation_graph.npz"  # shared with make_dataset.py
+
+# Maximum number of works listed per venue and year, among which the control papers are drawn
+MAX_CANDIDATES = 1000
+# The index of the references' data is emptied when it gets this big, to bound the memory use.
+# The data of the papers seen before is then found in the HTTP cache.
+MAX_INDEXED_PAPERS = 200_000
+
+
+def work_metadata_batch(dois, batch_size=CROSSREF_BATCH_SIZE):
+    """
+    Get the venue (ISSN) and year of many DOIs, from Crossref.
+
+    Like names_from_xref_batch, the DOIs are looked up batch_size at a time, and DOIs found in
+    make_dataset.HTTP_CACHE aren't requested.
+
+    Inputs
+    ------
+    dois : list of strings
+        The DOIs of the papers.
+    batch_size : int
+        Maximum number of DOIs per request (default: CROSSREF_BATCH_SIZE).
+
+    Outputs
+    -------
+    metadata : dict
+        Maps each given DOI to a dict with its "issn" (the first ISSN listed by Crossref) and
+        "year" (of publication). Both are None if Crossref doesn't know them.
+    """
+    cache = make_dataset.HTTP_CACHE
+    unique_dois = list(dict.fromkeys(doi.lower() for doi in dois))
+    metadata = {}
+    if cache is not None:
+        for doi in unique_dois:
+            found, cached_metadata = cache.get("crossref", f"metadata/{doi}")
+            if found:
+                metadata[doi] = cached_metadata
+        unique_dois = [doi for doi in unique_dois if doi not in metadata]
+        if unique_dois and cache.cache_only:
+            raise CacheMiss(f"{len(unique_dois)} DOIs aren't cached and the cache is in cache-only mode.")
+    for start in range(0, len(unique_dois), batch_size):
+        batch = unique_dois[start:start + batch_size]
+        works = make_dataset._crossref_works(
+            select=["DOI", "ISSN", "issued"], limit=len(batch), filter={"doi": batch},
+            cursor="*", cursor_max=len(batch),
+        )
+        pages = works if isinstance(works, list) else [works]
+        batch_metadata = {doi: {"issn": None, "year": None} for doi in batch}
+        for page in pages:
+            for item in page["message"]["items"]:
+                date_parts = item.get("issued", {}).get("date-parts") or [[None]]
+                batch_metadata[item["DOI"].lower()] = {
+                    "issn": (item.get("ISSN") or [None])[0],
+                    "year": date_parts[0][0],
+                }
+        if cache is not None:
+            for doi in batch:
+                cache.set("crossref", f"metadata/{doi}", batch_metadata[doi])
+        metadata.update(batch_metadata)
+    return {doi: metadata[doi.lower()] for doi in dois}
+
+
+def venue_dois(issn, year, max_candidates=MAX_CANDIDATES):
+    """
+    List the DOIs of the works published in a venue in a given year, according to Crossref.
+
+    Inputs
+    ------
+    issn : string
+        ISSN of the venue.
+    year : int
+        Year of publication.
+    max_candidates : int
+        Maximum number of DOIs listed (default: MAX_CANDIDATES).
+
+    Outputs
+    -------
+    dois : list of strings
+        The DOIs, in lowercase and sorted, so that samples drawn from them are reproducible.
+    """
+    def fetch_dois():
+        works = make_dataset._crossref_works(
+            select=["DOI"], limit=min(max_candidates, 1000),
+            filter={"issn": issn, "from-pub-date": str(year), "until-pub-date": str(year)},
+            cursor="*", cursor_max=max_candidates,
+        )
+        pages = works if isinstance(works, list) else [works]
+        return sorted({item["DOI"].lower() for page in pages for item in page["message"]["items"]})
+
+    return make_dataset._cached("crossref", f"venue/{issn}/{year}/{max_candidates}", fetch_dois)
+
+
+def sample_control_papers(crawler, citing_dois, excluded_dois, n_per_paper=5, seed=0,
+                          max_candidates=MAX_CANDIDATES):
+    """
+    Sample control papers that are published in the same venues and years as the citing papers.
+
+    The citing papers are grouped by venue and year. For each group, n_per_paper papers per
+    citing paper are drawn at random from the works of that venue and year, excluding the
+    excluded_dois (e.g., all the papers citing the CITED_DOIS). Citing papers without an ISSN
+    or year (e.g., preprints) aren't matched.
+
+    Inputs
+    ------
+    crawler : Crawler
+        Crawler used for the Crossref requests.
+    citing_dois : list of strings
+        DOIs of the citing papers.
+    excluded_dois : set of strings
+        Normalized DOIs that can't be drawn.
+    n_per_paper : int
+        Number of control papers per citing paper (default: 5).
+    seed : int
+        Seed of the random draws. The draw of each venue and year only depends on the seed and
+        the candidate DOIs (default: 0).
+    max_candidates : int
+        Maximum number of works listed per venue and year (default: MAX_CANDIDATES).
+
+    Outputs
+    -------
+    sample : pandas DataFrame
+        One row per control paper, with its "doi", "issn", and "year".
+    """
+    citing_dois = list(dict.fromkeys(citing_dois))
+    metadata = {}
+    batches = [citing_dois[i:i + CROSSREF_BATCH_SIZE] for i in range(0, len(citing_dois), CROSSREF_BATCH_SIZE)]
+    for batch_metadata in crawler.map(work_metadata_batch, batches, host=urlparse(make_dataset.CROSSREF_API).netloc):
+        metadata.update(batch_metadata)
+
+    n_citing = {}
+    for doi in citing_dois:
+        if metadata[doi]["issn"] is not None and metadata[doi]["year"] is not None:
+            venue = (metadata[doi]["issn"], metadata[doi]["year"])
+            n_citing[venue] = n_citing.get(venue, 0) + 1
+    print(f"{sum(n_citing.values())} / {len(citing_dois)} citing papers have a venue and year")
+
+    venues = sorted(n_citing)
+    all_candidates = crawler.map(lambda venue: venue_dois(*venue, max_candidates), venues,
+                                 host=urlparse(make_dataset.CROSSREF_API).netloc)
+    rows = []
+    for (issn, year), candidates in zip(venues, all_candidates):
+        candidates = [doi for doi in candidates if normalize_doi(doi) not in excluded_dois]
+        rng = random.Random(f"{seed}/{issn}/{year}")
+        for doi in rng.sample(candidates, min(len(candidates), n_per_paper * n_citing[issn, year])):
+            rows.append({"doi": doi, "issn": issn, "year": year})
+            excluded_dois.add(normalize_doi(doi))
+    return pd.DataFrame(rows, columns=["doi", "issn", "year"])
+
+
+def crawl_control_references(crawler, control_dois, sink, api_key=None, name_dict={}, api_client=None,
+                             chunk_size=20):
+    """
+    Crawl the references of the control papers, streaming their rows to a CsvSink.
+
+    The control papers are crawled chunk_size at a time with crawl_references, so that only the
+    rows of one chunk are in memory. The control papers that already have rows in the sink's
+    file are skipped, so an interrupted crawl picks up where it stopped.
+
+    Inputs
+    ------
+    crawler : Crawler
+        Crawler used for the opencitations.net and Crossref requests.
+    control_dois : list of strings
+        DOIs of the control papers.
+    sink : CsvSink
+        Sink of the reference rows, whose "citing_entity" is "control paper".
+    api_key: string
+        The API key for the gender API. Optional.
+    name_dict: dict
+        Dictionary containing name gender data. Optional.
+    api_client: GenderApiClient
+        Client used for the gender API, see names_to_genders. Optional.
+    chunk_size : int
+        Number of control papers crawled together (default: 20).
+    """
+    done_dois = set()
+    if os.path.isfile(sink.path) and os.path.getsize(sink.path) > 0:
+        for chunk in pd.read_csv(sink.path, usecols=["citing_doi"], chunksize=CHUNK_SIZE):
+            done_dois.update(chunk["citing_doi"].dropna())
+    pending_dois = [doi for doi in control_dois if doi not in done_dois]
+    papers_index = DoiIndex()
+    for start in range(0, len(pending_dois), chunk_size):
+        chunk = pending_dois[start:start + chunk_size]
+        print("\tDOI %d / %d    \r" % (len(control_dois) - len(pending_dois) + start + len(chunk),
+                                       len(control_dois)), end="")
+        if len(papers_index) > MAX_INDEXED_PAPERS:
+            papers_index = DoiIndex()
+        ref_papers = make_dataset.crawl_references(
+            crawler, {doi: [] for doi in chunk}, papers_index, api_key, name_dict, api_client,
+            citing_label="control paper",
+        )
+        sink.write(ref_papers)
+    print()
+
+
+def class_distribution(path, citing_only=False, include_mostly=False, min_accuracy=None):
+    """
+    Compute the class distribution of the references in a citation data file, chunk by chunk.
+
+    Inputs
+    ------
+    path : string
+        Path of the CSV file (e.g., citing_papers.csv or control_papers.csv). A missing file
+        has no references.
+    citing_only : bool
+        Whether to only count the rows with a "citing_doi" (i.e., references, not the citing
+        papers themselves) (default: False).
+    include_mostly : bool
+        Whether "mostly_male" and "mostly_female" count as man and woman genders (default: False).
+    min_accuracy : float
+        Minimum accuracy of the gender guesses that are used, see citation_classes.gender_codes.
+        Optional.
+
+    Outputs
+    -------
+    distribution : dict
+        The number of citing papers ("n_papers") and classified references ("n_references"),
+        and the percentage of the references in each of the CLASSES.
+    """
+    counts = pd.Series(0, index=CLASSES)
+    citing_dois = set()
+    columns = ["citing_doi", "first_author_gender", "first_author_gender_accuracy",
+               "last_author_gender", "last_author_gender_accuracy"]
+    chunks = pd.read_csv(path, usecols=columns, chunksize=CHUNK_SIZE) if os.path.isfile(path) else []
+    for chunk in chunks:
+        if citing_only:
+            chunk = chunk[chunk["citing_doi"].notna()]
+        counts += class_counts(chunk, include_mostly, min_accuracy)
+        citing_dois.update(chunk["citing_doi"].dropna())
+    n_references = int(counts.sum())
+    distribution = {"n_papers": len(citing_dois), "n_references": n_references}
+    for cls in CLASSES:
+        distribution[cls] = 100 * counts[cls] / n_references if n_references else float("nan")
+    return distribution
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Crawl the references of control papers that don't cite cleanBib, and compare the "
+                    "class distributions of the citing and control papers' references.")
+    parser.add_argument("--per-paper", type=int, default=5,
+                        help="number of control papers sampled per citing paper")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the control sample")
+    parser.add_argument("--max-candidates", type=int, default=MAX_CANDIDATES,
+                        help="maximum number of works listed per venue and year")
+    parser.add_argument("--resample", action="store_true",
+                        help="draw a new control sample instead of reusing the saved one")
+    parser.add_argument("--include-mostly", action="store_true",
+                        help="count the mostly_male and mostly_female genders as man and woman genders")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="minimum accuracy (in percent) of the gender API guesses that are used")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="number of concurrent requests to opencitations.net and Crossref")
+    parser.add_argument("--rate-limit", type=float, default=10,
+                        help="maximum number of requests per second to each host (0 for no limit)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="number of times a failed request is retried")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't cache the opencitations.net and Crossref responses")
+    parser.add_argument("--offline", action="store_true",
+                        help="only use cached responses, without making any requests")
+    parser.add_argument("--gender-api-quota", type=int, default=None,
+                        help="maximum number of gender API credits to use (default: no limit)")
+    parser.add_argument("--checkpoint-every", type=int, default=20,
+                        help="number of control papers whose references are saved together")
+    parser.add_argument("--no-gender-table", action="store_true",
+                        help="guess genders with the gender-guesser detector instead of the precompiled table")
+    parser.add_argument("--opencitations-api", default=make_dataset.OPENCITATIONS_API,
+                        help="base URL of the opencitations.net API, e.g. of a local mock server (default: %(default)s)")
+    parser.add_argument("--crossref-api", default=make_dataset.CROSSREF_API,
+                        help="base URL of the Crossref API (default: %(default)s)")
+    parser.add_argument("--gender-api", default=make_dataset.GENDER_API_URL,
+                        help="URL of the gender API's get endpoint (default: %(default)s)")
+    args = parser.parse_args()
+    make_dataset.OPENCITATIONS_API = args.opencitations_api
+    make_dataset.CROSSREF_API = args.crossref_api
+    make_dataset.GENDER_API_URL = args.gender_api
+
+    # Get path from working dir to src/data and join it to the relative paths
+    path_to_src_data = os.path.dirname(sys.argv[0])
+    for path_name in ["GENDER_API_KEY_PATH", "NAME_DICT_PATH", "NAME_CACHE_PATH", "DATAFILE_PATH",
+                      "CONTROL_SAMPLE_PATH", "CONTROL_DATAFILE_PATH", "DISTRIBUTIONS_PATH", "HTTP_CACHE_PATH",
+                      "CITATION_GRAPH_PATH", "GENDER_TABLE_PATH"]:
+        globals()[path_name] = os.path.join(path_to_src_data, globals()[path_name])
+
+    if not os.path.isfile(DATAFILE_PATH):
+        sys.exit(f"{DATAFILE_PATH} not found, run make_dataset.py first.")
+    if os.path.isfile(GENDER_API_KEY_PATH):
+        api_key = open(GENDER_API_KEY_PATH, "r").read().strip()
+    else:
+        api_key = None
+        print(f"{GENDER_API_KEY_PATH} not found, gender-api won't be used.")
+    name_dict = NameCache(NAME_CACHE_PATH, json_path=NAME_DICT_PATH)
+    if not args.no_gender_table:
+        make_dataset.GENDER_TABLE = open_gender_table(GENDER_TABLE_PATH, name_dict)
+    gender_api = GenderApiClient(api_key, url=make_dataset.GENDER_API_URL,
+                                 transport=RequestsTransport(retries=args.retries),
+                                 quota=args.gender_api_quota) if api_key else None
+    if not args.no_cache:
+        make_dataset.HTTP_CACHE = ResponseCache(HTTP_CACHE_PATH, cache_only=args.offline)
+        # the reference lists already fetched (e.g., by make_dataset.py) are reused
+        if os.path.isfile(CITATION_GRAPH_PATH):
+            make_dataset.CITATION_GRAPH = CitationGraph.load(CITATION_GRAPH_PATH)
+        else:
+            make_dataset.CITATION_GRAPH = CitationGraph()
+    crawler = Crawler(max_workers=args.workers, requests_per_second=args.rate_limit or None,
+                      retries=args.retries)
+
+    # the citing papers are the rows of citing_papers.csv that aren't references
+    citing_dois = []
+    for chunk in pd.read_csv(DATAFILE_PATH, usecols=["doi", "citing_doi"], chunksize=CHUNK_SIZE):
+        citing_dois.extend(chunk.loc[chunk["citing_doi"].isna(), "doi"])
+    citing_dois = list(dict.fromkeys(citing_dois))
+
+    control_sink = CsvSink(CONTROL_DATAFILE_PATH)
+    if os.path.isfile(CONTROL_SAMPLE_PATH) and not args.resample:
+        print(f"\n--------------\nUsing the control sample in {CONTROL_SAMPLE_PATH}")
+        sample = pd.read_csv(CONTROL_SAMPLE_PATH)
+    else:
+        print("\n--------------\nSampling control papers")
+        # none of the papers citing cleanBib can be a control paper
+        all_citing_dois = crawler.map(lambda doi: make_dataset.get_dois(doi, citing=True), CITED_DOIS.values(),
+                                      host=urlparse(make_dataset.OPENCITATIONS_API).netloc)
+        excluded_dois = {normalize_doi(doi) for dois in all_citing_dois for doi in dois}
+        excluded_dois.update(normalize_doi(doi) for doi in citing_dois)
+        excluded_dois.update(normalize_doi(doi) for doi in CITED_DOIS.values())
+        sample = sample_control_papers(crawler, citing_dois, excluded_dois, args.per_paper, args.seed,
+                                       args.max_candidates)
+        sample.to_csv(CONTROL_SAMPLE_PATH, index=False)
+        if os.path.isfile(control_sink.path):
+            os.remove(control_sink.path)
+    print(f"{len(sample)} control papers")
+
+    print("\n--------------\nLooking in the references of the control papers")
+    crawl_control_references(crawler, list(sample["doi"]), control_sink, api_key, name_dict, gender_api,
+                             args.checkpoint_every)
+    if make_dataset.CITATION_GRAPH is not None:
+        make_dataset.CITATION_GRAPH.save(CITATION_GRAPH_PATH)
+    n_duplicates = control_sink.compact()
+    if n_duplicates:
+        print(f"Dropped {n_duplicates} duplicated rows")
+
+    distributions = pd.DataFrame([
+        dict(group="citing", **class_distribution(DATAFILE_PATH, True, args.include_mostly, args.min_accuracy)),
+        dict(group="control", **class_distribution(CONTROL_DATAFILE_PATH, False, args.include_mostly,
+                                                   args.min_accuracy)),
+    ])
+    print(f"\nSaving the class distributions to {DISTRIBUTIONS_PATH}\n")
+    print(distributions.to_string(index=False))
+    distributions.to_csv(DISTRIBUTIONS_PATH, index=False)
+
+    name_dict.close()
+    if gender_api is not None:
+        print(f"Gender API: {gender_api.n_requests} requests, {gender_api.credits_used} credits used")
+    if make_dataset.HTTP_CACHE is not None:
+        print(f"HTTP cache: {make_dataset.HTTP_CACHE.hits} hits, {make_dataset.HTTP_CACHE.misses} misses")
+        make_dataset.HTTP_CACHE.close()
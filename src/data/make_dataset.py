@@ -1,17 +1,62 @@
+import argparse
+import atexit
+import cProfile
+import multiprocessing
 import requests
 import sys
 import os
-import json
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
 from habanero import Crossref
+from habanero.exceptions import RequestError
 import numpy as np
 import pandas as pd
 import gender_guesser.detector as gender_detecor
 
+from citation_graph import CitationGraph
+from crawl import RETRY_STATUSES, Crawler
+from crawl_state import CrawlState
+from csv_sink import CHUNK_SIZE, CsvSink
+from doi_index import DATA_FIELDS, DoiIndex, normalize_doi
+from gender_api import GENDER_API_URL, GenderApiClient, RequestsTransport
+from gender_table import GenderTable, open_gender_table
+from http_cache import CacheMiss, ResponseCache
+from instrumentation import STATS
+from name_cache import NameCache
+from name_normalization import fold, normalize
+from opencitations import OpenCitationsReader
+from parquet_store import csv_to_parquet
+from rows import RowAccumulator
+
 
 # Relative paths from src/data
 GENDER_API_KEY_PATH = "gender_api_key.txt"
-NAME_DICT_PATH = "name_dict.json"
+NAME_DICT_PATH = "name_dict.json"  # only read to create the name cache
+NAME_CACHE_PATH = "name_cache.sqlite"
+GENDER_TABLE_PATH = "gender_table"  # built from gender-guesser and the name cache
 DATAFILE_PATH = "../../data/citing_papers.csv"
+DATAFILE_PARQUET_PATH = "../../data/citing_papers.parquet"
+HTTP_CACHE_PATH = "http_cache.sqlite"
+CRAWL_STATE_PATH = "crawl_state.sqlite"
+CITATION_GRAPH_PATH = "citation_graph.npz"
+STATS_PATH = "crawl_stats.json"  # timers and counters of the last run
+
+# APIs used to crawl the citations and author names (the gender API's is GENDER_API_URL). These can
+# be pointed at a local stub server with --opencitations-api, --crossref-api and --gender-api.
+OPENCITATIONS_API = "https://opencitations.net/index/coci/api/v1"
+CROSSREF_API = "https://api.crossref.org"
+
+# Number of DOIs resolved per Crossref request by names_from_xref_batch
+CROSSREF_BATCH_SIZE = 50
+# Fields of the opencitations.net items that are kept in HTTP_CACHE
+CACHED_ITEM_FIELDS = ["citing", "cited", "creation"]
+
+# ResponseCache used by get_dois and the Crossref lookups. None means every response is fetched.
+HTTP_CACHE = None
+# CitationGraph of the edges fetched so far, reused by get_dois. None means no graph is kept.
+CITATION_GRAPH = None
+# GenderTable used instead of the gender-guesser detector. None means the detector is used.
+GENDER_TABLE = None
 
 # list the cited dois. we're interested in which papers cite these dois
 CITED_DOIS = {
@@ -21,6 +66,100 @@ CITED_DOIS = {
 }
 
 
+def _cached(source, key, fetch_func):
+    """Get a response through HTTP_CACHE if there is one, otherwise fetch it."""
+    if HTTP_CACHE is None:
+        return fetch_func()
+    return HTTP_CACHE.fetch(source, key, fetch_func)
+
+
+def _get_json(url):
+    """
+    Make a GET request and decode its JSON response, counting it in STATS.
+
+    The requests share a RequestsTransport, so they are retried like the GenderApiClient's.
+    """
+    # use the _transport as a global variable to share its connections
+    global _transport
+    if not "_transport" in globals():
+        _transport = RequestsTransport()
+    STATS.count_request(url)
+    return _transport(url)
+
+
+def _get_opencitations():
+    """Get the opencitations.net reader shared by all requests, creating it on first use."""
+    # use the _opencitations reader as a global variable to share its connections
+    global _opencitations
+    if not "_opencitations" in globals():
+        _opencitations = OpenCitationsReader(OPENCITATIONS_API, on_request=STATS.count_request)
+    return _opencitations
+
+
+def iter_citation_items(doi, citing=True, retries=0, backoff=1.0):
+    """
+    Get the citations of or by a given doi as listed by opencitations.net, as they are downloaded.
+
+    The citations are streamed (see OpenCitationsReader), so they can be processed before the
+    whole list is downloaded. With HTTP_CACHE, cached lists are replayed, and the CACHED_ITEM_FIELDS
+    of a new list are cached once it is complete.
+
+    Inputs
+    ------
+    doi : string
+        The DOI of the paper whose citations or references you want to list.
+    citing : bool,
+        Wether to get the citations of the given DOI or by the given DOI (default: True).
+    retries : int
+        Number of times a failed request is resumed, see OpenCitationsReader.iter_items
+        (default: 0).
+    backoff : float
+        Delay in seconds before the first retry (default: 1).
+
+    Outputs
+    -------
+    items : generator of dicts
+        The citations, with "citing" and "cited" DOIs, and the "creation" date of the citing
+        paper, among other fields.
+    """
+    type = "citations" if citing else "references"
+    items = None
+    if HTTP_CACHE is not None:
+        found, cached_items = HTTP_CACHE.get("opencitations", f"{type}/{doi}")
+        if found:
+            yield from cached_items or []
+            return
+        if HTTP_CACHE.cache_only:
+            raise CacheMiss(f"opencitations:{type}/{doi} isn't cached and the cache is in cache-only mode.")
+        items = []
+    for item in _get_opencitations().iter_items(doi, citing, retries, backoff):
+        if items is not None:
+            items.append({field: item[field] for field in CACHED_ITEM_FIELDS if field in item})
+        yield item
+    if items is not None:
+        HTTP_CACHE.set("opencitations", f"{type}/{doi}", items)
+
+
+def get_citation_items(doi, citing=True):
+    """
+    Get the citations of or by a given doi as listed by opencitations.net.
+
+    Inputs
+    ------
+    doi : string
+        The DOI of the paper whose citations or references you want to list.
+    citing : bool,
+        Wether to get the citations of the given DOI or by the given DOI (default: True).
+
+    Outputs
+    -------
+    items : list of dicts
+        The citations, see iter_citation_items.
+    """
+    return list(iter_citation_items(doi, citing))
+
+
+@STATS.timed("get_dois")
 def get_dois(doi, citing=True):
     """
     Get the dois of papers citing or cited by a given doi using opencitations.net
@@ -42,14 +181,17 @@ def get_dois(doi, citing=True):
     citing_dois : list of strings
         List of DOIs of papers that cite the given DOI.
     """
-    type = "citations" if citing else "references"
+    # reference lists don't change, so the ones already in the graph are reused
+    if not citing and CITATION_GRAPH is not None and CITATION_GRAPH.has_references(doi):
+        return CITATION_GRAPH.references(doi)
     key = "citing" if citing else "cited"
-    url = f"https://opencitations.net/index/coci/api/v1/{type}/{doi}"
-    items = requests.get(url).json()
-    found_dois = []
-    if items:  # if opencitations.net lists citing items
-        for item in items:
-            found_dois.append(item[key])
+    # only the DOIs are kept, not the whole items
+    found_dois = [item[key] for item in iter_citation_items(doi, citing)]
+    if CITATION_GRAPH is not None:
+        if citing:
+            CITATION_GRAPH.add_citations(doi, found_dois)
+        else:
+            CITATION_GRAPH.add_references(doi, found_dois)
     return found_dois
 
 
@@ -75,14 +217,72 @@ def get_name_from_author_dict(author_dict):
     name : string
         First name of the given author.
     """
-    if "given" not in author_dict:
-        name = ""
-    else:
-        # trim initials
-        name = author_dict["given"].replace(".", " ").split()[0]
-    return name
+    # skip initials, and fix the spelling (see name_normalization.normalize)
+    return normalize(author_dict.get("given", ""))
+
+
+def _get_crossref():
+    """Get the Crossref client shared by all lookups, creating it on first use."""
+    # use the _crossref client as a global variable to avoid re-generating it each time
+    global _crossref
+    if not "_crossref" in globals():
+        _crossref = Crossref(base_url=CROSSREF_API)
+    return _crossref
+
+
+def _crossref_works(**kwargs):
+    """
+    Call the works endpoint of the shared Crossref client, with the arguments of habanero's works.
+
+    habanero doesn't raise requests errors (depending on its version, it raises its own
+    RequestError, httpx errors, or RuntimeErrors wrapping them), so its network errors and the
+    errors with a RETRY_STATUSES status are raised as requests errors, which a Crawler retries.
+    """
+    try:
+        return _get_crossref().works(**kwargs)
+    except RequestError as error:
+        if error.status_code in RETRY_STATUSES:
+            raise requests.exceptions.HTTPError(str(error)) from error
+        raise
+    except RuntimeError as error:
+        # habanero >= 1.0 wraps the httpx network errors
+        if error.__cause__ is None or not type(error.__cause__).__module__.startswith("httpx"):
+            raise
+        raise requests.exceptions.ConnectionError(str(error)) from error
+    except Exception as error:
+        if not type(error).__module__.startswith("httpx"):
+            raise
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+        if status_code is None:
+            raise requests.exceptions.ConnectionError(str(error)) from error
+        if status_code in RETRY_STATUSES:
+            raise requests.exceptions.HTTPError(str(error)) from error
+        raise
+
+
+def names_from_author_list(authors):
+    """
+    Get the first names of the first and last authors from a Crossref author list.
 
+    Inputs
+    ------
+    authors : list of dicts
+        The "author" field of a Crossref work. See get_name_from_author_dict.
 
+    Outputs
+    -------
+    first_author : string
+        The first name of the first author ("" if there are no authors).
+
+    last_author : string
+        The first name of the last author ("" if there are no authors).
+    """
+    if not authors:
+        return "", ""
+    return get_name_from_author_dict(authors[0]), get_name_from_author_dict(authors[-1])
+
+
+@STATS.timed("names_from_xref")
 def names_from_xref(doi):
     """
     Get the first names of the first and last authors for a given DOI.
@@ -100,21 +300,103 @@ def names_from_xref(doi):
     last_author : string
         The first name of the last author of the given paper.
     """
-    cr = Crossref()
-    title = ""
-    works = cr.works(
-        query=title, select=["DOI", "author"], limit=1, filter={"doi": doi}
-    )
-    first_author = ""
-    last_author = ""
-    if works["message"]["total-results"] > 0:
-        item = works["message"]["items"][0]
-        if "author" in item.keys():
-            first_author = get_name_from_author_dict(item["author"][0])
-            last_author = get_name_from_author_dict(item["author"][-1])
+    def fetch_authors():
+        title = ""
+        STATS.count_request(CROSSREF_API)
+        works = _crossref_works(
+            query=title, select=["DOI", "author"], limit=1, filter={"doi": doi}
+        )
+        if works["message"]["total-results"] > 0:
+            return works["message"]["items"][0].get("author")
+        return None
+
+    authors = _cached("crossref", f"works/{doi.lower()}", fetch_authors)
+    first_author, last_author = names_from_author_list(authors)
     return first_author, last_author
 
 
+@STATS.timed("names_from_xref_batch")
+def names_from_xref_batch(dois, batch_size=CROSSREF_BATCH_SIZE):
+    """
+    Get the first names of the first and last authors for many DOIs at once.
+
+    The DOIs are looked up batch_size at a time with Crossref's multi-DOI filter (a single
+    request per batch, paged with a cursor if needed), using the shared Crossref client. DOIs
+    found in HTTP_CACHE aren't requested.
+
+    Inputs
+    ------
+    dois : list of strings
+        The DOIs of the papers whose first and last author names you want to know. Here, it's
+        usually the reference list of a citing paper.
+    batch_size : int
+        Maximum number of DOIs per request (default: CROSSREF_BATCH_SIZE).
+
+    Outputs
+    -------
+    names : dict
+        Maps each given DOI to a (first_author, last_author) tuple of first names. DOIs that
+        Crossref doesn't know map to ("", "").
+    """
+    # Crossref returns lowercase DOIs, so match them case-insensitively
+    unique_dois = list(dict.fromkeys(doi.lower() for doi in dois))
+    authors = {}
+    if HTTP_CACHE is not None:
+        for doi in unique_dois:
+            found, cached_authors = HTTP_CACHE.get("crossref", f"works/{doi}")
+            if found:
+                authors[doi] = cached_authors
+        unique_dois = [doi for doi in unique_dois if doi not in authors]
+        if unique_dois and HTTP_CACHE.cache_only:
+            raise CacheMiss(f"{len(unique_dois)} DOIs aren't cached and the cache is in cache-only mode.")
+    for start in range(0, len(unique_dois), batch_size):
+        batch = unique_dois[start:start + batch_size]
+        STATS.count_request(CROSSREF_API)
+        works = _crossref_works(
+            select=["DOI", "author"], limit=len(batch), filter={"doi": batch},
+            cursor="*", cursor_max=len(batch),
+        )
+        pages = works if isinstance(works, list) else [works]
+        batch_authors = dict.fromkeys(batch)
+        for page in pages:
+            for item in page["message"]["items"]:
+                batch_authors[item["DOI"].lower()] = item.get("author")
+        if HTTP_CACHE is not None:
+            for doi in batch:
+                HTTP_CACHE.set("crossref", f"works/{doi}", batch_authors[doi])
+        authors.update(batch_authors)
+    return {doi: names_from_author_list(authors.get(doi.lower())) for doi in dois}
+
+
+def _get_gender_detector():
+    """Get the gender-guesser detector, creating it on first use."""
+    # use the _gender_detector as a global variable to avoid re-generating it each time
+    global _gender_detector
+
+    # create gender-guesser detcetor if it doesn't already exist
+    if not "_gender_detector" in globals():
+        _gender_detector = gender_detecor.Detector(case_sensitive=False)
+    return _gender_detector
+
+
+def _guess_gender(name):
+    """
+    Get gender-guesser's guess for a name, or its GENDER_TABLE entry if there is a table.
+
+    Names it doesn't know are looked up again without their accents (e.g., "Soren" for "Søren"),
+    and compound names without their hyphens (e.g., "Hyunjin" for "Hyun-Jin").
+    """
+    for variant in dict.fromkeys([name, fold(name), fold(name).replace("-", "")]):
+        if GENDER_TABLE is not None:
+            gender, accuracy = GENDER_TABLE.get(variant, ("unknown", None))
+        else:
+            gender, accuracy = _get_gender_detector().get_gender(variant), None
+        if gender != "unknown":
+            break
+    return gender, accuracy
+
+
+@STATS.timed("name_to_gender")
 def name_to_gender(name, api_key=None, name_dict={}):
     f"""
     This function uses the gender-guesser pip package (https://pypi.org/project/gender-guesser/)
@@ -129,13 +411,15 @@ def name_to_gender(name, api_key=None, name_dict={}):
     Inputs
     ------
     name : string
-        The first name whose gender you want to guess.
+        The first name whose gender you want to guess. It is normalized first, see
+        name_normalization.normalize.
     api_key : string
         The API key for the gender API. You can sign up for a free account and get an API key on
         the gender-api.com website. Optional.
-    name_dict : dict
+    name_dict : dict or NameCache
         Dictionary containing gender guesses and accuracy, the dictionary is used if the gender-guesser
-        package returns 'unknown'. It is updated if a gender-api request is made.
+        package returns 'unknown'. It is updated if a gender-api request is made (a NameCache saves
+        the new entry right away).
 
     Outputs
     -------
@@ -145,39 +429,102 @@ def name_to_gender(name, api_key=None, name_dict={}):
     accuracy : int
         The accuracy of the gender guess, in percent.
     """
-    # use the _gender_detector as a global variable to avoid re-generating it each time
-    global _gender_detector
-
+    # the same name is looked up whatever its spelling, e.g. "MARIA" or "maria"
+    name = normalize(name)
     # If the name is just an initial, return unknown
     if len(name) < 2:
         return "unknown", 0
 
-    # create gender-guesser detcetor if it doesn't already exist
-    if not "_gender_detector" in globals():
-        _gender_detector = gender_detecor.Detector(case_sensitive=False)
-
-    gender = _gender_detector.get_gender(name)
-    accuracy = None
+    gender, accuracy = _guess_gender(name)
+    STATS.count("gender_guesser/unknown" if gender == "unknown" else "gender_guesser/known")
     if gender == "unknown":
-        if name in name_dict.keys():
+        in_name_dict = name in name_dict.keys()
+        STATS.count("name_dict/hits" if in_name_dict else "name_dict/misses")
+        if in_name_dict:
             gender = name_dict[name]["gender"]
             accuracy = name_dict[name]["accuracy"]
         elif api_key:
-            url = f"https://gender-api.com/get?key={api_key}&name={name}"
-            response = requests.get(url).json()
+            url = f"{GENDER_API_URL}?key={api_key}&name={name}"
+            response = _get_json(url)
             gender = response["gender"]
             accuracy = response["accuracy"]
             name_dict[name] = {"gender": gender, "accuracy": accuracy}
-            # save the updated names_dict
-            with open(NAME_DICT_PATH, 'w') as name_dict_file:
-                json.dump(name_dict, name_dict_file, indent=2)
         # if still unknown and there is a dash in the name, try on the first part of the name
         if gender == "unknown" and "-" in name:
-            return name_to_gender(name.split("-")[0], api_key, dict)
+            return name_to_gender(name.split("-")[0], api_key, name_dict)
     return gender, accuracy
 
 
-def get_data(doi, df=None, api_key=None, name_dict={}):
+@STATS.timed("names_to_genders")
+def names_to_genders(names, api_key=None, name_dict={}, api_client=None):
+    """
+    Guess the genders of many names at once.
+
+    Each distinct name is resolved only once (i.e., with gender-guesser, then name_dict, then the
+    gender API), which saves most of the work since reference lists repeat first names a lot.
+    The names that need the gender API are all sent together with a GenderApiClient, and the
+    results are merged into name_dict in one step.
+
+    Inputs
+    ------
+    names : sequence of strings
+        The first names whose genders you want to guess, e.g. a column of citing_papers.csv.
+        Missing names (None or NaN) are unknown.
+    api_key : string
+        The API key for the gender API. Optional.
+    name_dict : dict
+        Dictionary containing name gender data, see name_to_gender. Optional.
+    api_client : GenderApiClient
+        Client used for the gender API, e.g. to share its quota across calls. By default, a
+        client is created if api_key is given. Optional.
+
+    Outputs
+    -------
+    genders : numpy array of strings
+        The guessed gender of each name.
+
+    accuracies : numpy array of floats
+        The accuracy of each gender guess, in percent (NaN if gender-guesser made the guess).
+    """
+    # different spellings of a name are resolved once, see name_normalization.normalize (missing
+    # names are normalized to "", not to "nan")
+    unique_names, inverse = np.unique(
+        np.array([normalize(name) for name in np.asarray(names, dtype=object)], dtype=str),
+        return_inverse=True,
+    )
+    if api_client is None and api_key:
+        api_client = GenderApiClient(api_key, url=GENDER_API_URL)
+    if api_client is not None:
+        pending = unique_names
+        while len(pending):
+            for name in pending:
+                if len(name) >= 2 and name not in name_dict and _guess_gender(name)[0] == "unknown":
+                    api_client.queue(name)
+            if not api_client.flush(name_dict):
+                break
+            # like name_to_gender, try the first part of the hyphenated names that are still unknown
+            pending = [name.split("-")[0] for name in pending
+                       if "-" in name and name_dict.get(name, {}).get("gender") == "unknown"]
+
+    if GENDER_TABLE is not None:
+        # look up all the names at once, and only the ones the table doesn't resolve one by one
+        _, unique_genders, unique_accuracies = GENDER_TABLE.lookup(unique_names)
+        pending = np.flatnonzero((unique_genders == "unknown") | (np.char.str_len(unique_names) < 2))
+    else:
+        unique_genders = np.empty(len(unique_names), dtype=object)
+        unique_accuracies = np.full(len(unique_names), np.nan)
+        pending = range(len(unique_names))
+    for i in pending:
+        name = unique_names[i]
+        gender, accuracy = name_to_gender(name, None, name_dict)
+        unique_genders[i] = gender
+        if accuracy is not None:
+            unique_accuracies[i] = accuracy
+    return unique_genders[inverse], unique_accuracies[inverse]
+
+
+@STATS.timed("get_data")
+def get_data(doi, df=None, api_key=None, name_dict={}, names=None):
     """
     For a given doi, get the names, genders, and gender accuracies of the first and last authors.
 
@@ -185,27 +532,30 @@ def get_data(doi, df=None, api_key=None, name_dict={}):
     ------
     doi: string
         The DOI of the paper whose authers' names and gender you want to get.
-    df: pandas DataFrame
-        DataFrame containing the data of already found DOIs, to avoid having to generate the
-        data again. Optional.
+    df: DoiIndex or pandas DataFrame
+        Index (or DataFrame) of the data of already found DOIs, to avoid having to generate the
+        data again. Looking up a DOI in a DoiIndex takes constant time, while a DataFrame is
+        indexed again on every call. Optional.
     api_key: string
         The API key for the gender API. You can sign up for a free account and get an API key on
         the gender-api.com website. Optional.
     name_dict: dict
         Dictionary containing name gender data. Optional.
+    names: tuple of strings
+        The first names of the first and last authors, if they were already looked up with
+        names_from_xref or names_from_xref_batch (e.g., concurrently by a Crawler). Optional.
 
     Outputs
     -------
-    data : dict or pandas.series
-        dict or pandas.series with fields for first and last authors' names, guessed genders,
-        and guess accuracies.
-    """
-    if df is not None and doi in df["doi"].values:
-        data = df[df["doi"]==doi].iloc[0]
-        data = data[["doi","first_author_name","first_author_gender","first_author_gender_accuracy",
-                     "last_author_name","last_author_gender","last_author_gender_accuracy"]]
-    else:
-        fa_name, la_name = names_from_xref(doi)
+    data : dict
+        dict with fields for first and last authors' names, guessed genders, and guess
+        accuracies.
+    """
+    if isinstance(df, pd.DataFrame):
+        df = DoiIndex.from_frame(df)
+    data = df.get(doi) if df is not None else None
+    if data is None:
+        fa_name, la_name = names if names is not None else names_from_xref(doi)
         fa_gender, fa_accuracy = name_to_gender(fa_name, api_key, name_dict)
         la_gender, la_accuracy = name_to_gender(la_name, api_key, name_dict)
         data = {"doi": doi,
@@ -216,11 +566,347 @@ def get_data(doi, df=None, api_key=None, name_dict={}):
     return data
 
 
+@STATS.timed("get_data_batch")
+def get_data_batch(dois, names=None, api_key=None, name_dict={}, api_client=None):
+    """
+    For many dois, get the names, genders, and gender accuracies of the first and last authors.
+
+    The names are looked up with names_from_xref_batch and all their genders are guessed at once
+    with names_to_genders.
+
+    Inputs
+    ------
+    dois: list of strings
+        The DOIs of the papers whose authors' names and gender you want to get.
+    names: dict
+        Maps DOIs to the first names of their first and last authors, if they were already
+        looked up with names_from_xref_batch. Optional.
+    api_key: string
+        The API key for the gender API. Optional.
+    name_dict: dict
+        Dictionary containing name gender data. Optional.
+    api_client: GenderApiClient
+        Client used for the gender API, see names_to_genders. Optional.
+
+    Outputs
+    -------
+    data : pandas DataFrame
+        One row per DOI, with the same fields as get_data.
+    """
+    if names is None:
+        names = names_from_xref_batch(dois)
+    data = pd.DataFrame({
+        "doi": dois,
+        "first_author_name": [names[doi][0] for doi in dois],
+        "last_author_name": [names[doi][1] for doi in dois],
+    })
+    genders, accuracies = names_to_genders(
+        np.concatenate([data["first_author_name"].values, data["last_author_name"].values]),
+        api_key, name_dict, api_client,
+    )
+    data["first_author_gender"] = genders[:len(data)]
+    data["first_author_gender_accuracy"] = accuracies[:len(data)]
+    data["last_author_gender"] = genders[len(data):]
+    data["last_author_gender_accuracy"] = accuracies[len(data):]
+    return data[DATA_FIELDS]
+
+
+def _crawl_names(crawler, batches):
+    """Look up the names of batches of DOIs concurrently with names_from_xref_batch."""
+    names = {}
+    for batch_names in crawler.map(names_from_xref_batch, batches, host=urlparse(CROSSREF_API).netloc):
+        names.update(batch_names)
+    return names
+
+
+def find_citing_papers(crawler, papers_index, api_key=None, name_dict={}, api_client=None, since=None):
+    """
+    Find the new papers citing the CITED_DOIS, and get their name/gender data.
+
+    Inputs
+    ------
+    crawler: Crawler
+        Crawler used for the opencitations.net and Crossref requests.
+    papers_index: DoiIndex
+        Index of the papers already found, which are skipped.
+    api_key: string
+        The API key for the gender API. Optional.
+    name_dict: dict
+        Dictionary containing name gender data. Optional.
+    api_client: GenderApiClient
+        Client used for the gender API, see names_to_genders. Optional.
+    since: string
+        Date (YYYY-MM-DD) before which citing papers are skipped, according to their creation
+        (i.e., publication) date on opencitations.net. Since opencitations.net lists papers
+        months after they are published, the papers published before since but listed later are
+        never processed, so this is a filter, not a way to only get the papers listed since the
+        last run (the papers already in papers_index are always skipped). Optional.
+
+    Outputs
+    -------
+    new_papers : pandas DataFrame
+        One row per new citing paper and cited entity, with the fields of get_data and the
+        "cited_entity" and "cited_doi" columns.
+    """
+    all_citing_dois = []
+    lookup_dois = []
+    lookup_dois_set = set()
+
+    def lookup_batches():
+        # the citations are streamed, and the names of each batch of new citing papers are looked
+        # up as soon as the batch is full, while the next citations are downloaded
+        batch = []
+        for doi in CITED_DOIS.values():
+            crawler.rate_limiter.wait(urlparse(OPENCITATIONS_API).netloc)
+            found_dois, citing_dois = [], []
+            all_citing_dois.append(citing_dois)
+            for item in iter_citation_items(doi, True, crawler.retries, crawler.backoff):
+                found_dois.append(item["citing"])
+                creation = item.get("creation", "")
+                if since is None or creation >= since[:len(creation)]:
+                    citing_dois.append(item["citing"])
+                    if item["citing"] not in papers_index and item["citing"] not in lookup_dois_set:
+                        lookup_dois_set.add(item["citing"])
+                        lookup_dois.append(item["citing"])
+                        batch.append(item["citing"])
+                        if len(batch) == CROSSREF_BATCH_SIZE:
+                            yield batch
+                            batch = []
+            if CITATION_GRAPH is not None:
+                CITATION_GRAPH.add_citations(doi, found_dois)
+        if batch:
+            yield batch
+
+    names = _crawl_names(crawler, lookup_batches())
+    # guess the genders of all the new citing papers' authors at once
+    labels_index = DoiIndex.from_frame(get_data_batch(lookup_dois, names, api_key, name_dict, api_client))
+
+    new_rows = RowAccumulator(["doi", "cited_entity"])
+    for (cited_entity, doi), citing_dois in zip(CITED_DOIS.items(), all_citing_dois):
+        print("\n--------------\nLabelling citations of the ", cited_entity)
+        if not citing_dois:
+            print("    No citations found :( \n")
+        for n, citing_doi in enumerate(citing_dois):
+            print("\tDOI %d / %d\r" % (n + 1, len(citing_dois)), end="")
+            if not citing_doi in papers_index:
+                new_row = get_data(citing_doi, labels_index, api_key, name_dict)
+                new_row["cited_entity"] = cited_entity
+                new_row["cited_doi"] = doi
+                new_rows.append(new_row)
+    return new_rows.to_frame()
+
+
+def crawl_references(crawler, citing_entities, papers_index, api_key=None, name_dict={}, api_client=None,
+                     citing_label="paper citing cleanBib"):
+    """
+    Get the references of some citing papers, and their name/gender data.
+
+    Inputs
+    ------
+    crawler: Crawler
+        Crawler used for the opencitations.net and Crossref requests.
+    citing_entities: dict
+        Maps the citing DOIs to the list of cited entities they cite (e.g., ["paper", "preprint"]).
+    papers_index: DoiIndex
+        Index of the papers already found, whose data is reused. The new references are added
+        to it.
+    api_key: string
+        The API key for the gender API. Optional.
+    name_dict: dict
+        Dictionary containing name gender data. Optional.
+    api_client: GenderApiClient
+        Client used for the gender API, see names_to_genders. Optional.
+    citing_label: string
+        Start of the "citing_entity" of the rows, followed by the cited entities (default:
+        "paper citing cleanBib").
+
+    Outputs
+    -------
+    ref_papers : pandas DataFrame
+        One row per reference, with the fields of get_data and the "citing_entity" and
+        "citing_doi" columns.
+    """
+    citing_dois = list(citing_entities)
+    all_ref_dois = crawler.map(lambda doi: get_dois(doi, citing=False), citing_dois,
+                               host=urlparse(OPENCITATIONS_API).netloc)
+    known_dois = set(normalize_doi(doi) for doi in CITED_DOIS.values())
+    # one batched Crossref lookup per citing paper, for the references not seen before
+    batches = []
+    for ref_dois in all_ref_dois:
+        batches.append([doi for doi in dict.fromkeys(ref_dois)
+                        if doi not in papers_index and normalize_doi(doi) not in known_dois])
+        known_dois.update(normalize_doi(doi) for doi in batches[-1])
+    names = _crawl_names(crawler, batches)
+    papers_index.update(get_data_batch(list(names), names, api_key, name_dict, api_client))
+
+    ref_rows = RowAccumulator()
+    for citing_doi, ref_dois in zip(citing_dois, all_ref_dois):
+        for ref_doi in ref_dois:
+            if ref_doi not in CITED_DOIS.values():
+                new_row = get_data(ref_doi, papers_index, api_key, name_dict)
+                new_row["citing_entity"] = " ".join([citing_label] + citing_entities[citing_doi])
+                new_row["citing_doi"] = citing_doi
+                ref_rows.append(new_row)
+    return ref_rows.to_frame()
+
+
+def _init_reference_worker(settings, papers_index):
+    """Set up a worker process of crawl_references_in_processes, see there for the settings."""
+    global HTTP_CACHE, CITATION_GRAPH, GENDER_TABLE, OPENCITATIONS_API, CROSSREF_API, GENDER_API_URL
+    global _reference_worker
+    OPENCITATIONS_API = settings.get("opencitations_api") or OPENCITATIONS_API
+    CROSSREF_API = settings.get("crossref_api") or CROSSREF_API
+    GENDER_API_URL = settings.get("gender_api_url") or GENDER_API_URL
+    if settings.get("http_cache_path"):
+        HTTP_CACHE = ResponseCache(settings["http_cache_path"], cache_only=settings.get("offline", False))
+    if settings.get("citation_graph_path"):
+        if os.path.isfile(settings["citation_graph_path"]):
+            CITATION_GRAPH = CitationGraph.load(settings["citation_graph_path"])
+        else:
+            CITATION_GRAPH = CitationGraph()
+    if settings.get("gender_table_path"):
+        GENDER_TABLE = GenderTable.load(settings["gender_table_path"])
+    api_key = settings.get("api_key")
+    _reference_worker = {
+        "crawler": Crawler(max_workers=settings.get("workers", 8),
+                           requests_per_second=settings.get("requests_per_second"),
+                           retries=settings.get("retries", 3)),
+        "name_dict": NameCache(settings["name_cache_path"]),
+        "api_key": api_key,
+        "api_client": GenderApiClient(api_key, url=GENDER_API_URL,
+                                      transport=RequestsTransport(retries=settings.get("retries", 3)),
+                                      quota=settings.get("gender_api_quota")) if api_key else None,
+        "papers_index": papers_index,
+        "citing_label": settings.get("citing_label", "paper citing cleanBib"),
+    }
+
+
+def _crawl_references_chunk(citing_entities):
+    """Run crawl_references in a worker process, and return its rows with what the main process merges."""
+    worker = _reference_worker
+    # get the gender API results saved by the other workers since the last chunk
+    worker["name_dict"].refresh()
+    api_client = worker["api_client"]
+    before = (HTTP_CACHE.hits, HTTP_CACHE.misses) if HTTP_CACHE is not None else (0, 0)
+    credits_before = (api_client.n_requests, api_client.credits_used) if api_client is not None else (0, 0)
+    ref_papers = crawl_references(worker["crawler"], citing_entities, worker["papers_index"], worker["api_key"],
+                                  worker["name_dict"], api_client, worker["citing_label"])
+    references = None
+    if CITATION_GRAPH is not None:
+        references = {doi: CITATION_GRAPH.references(doi) for doi in citing_entities}
+    if HTTP_CACHE is not None:
+        STATS.count("http_cache/hits", HTTP_CACHE.hits - before[0])
+        STATS.count("http_cache/misses", HTTP_CACHE.misses - before[1])
+    if api_client is not None:
+        STATS.count("gender_api/requests", api_client.n_requests - credits_before[0])
+        STATS.count("gender_api/credits_used", api_client.credits_used - credits_before[1])
+    stats = STATS.summary()
+    STATS.reset()
+    return ref_papers, references, stats
+
+
+def crawl_references_in_processes(chunks, n_processes, settings, papers_index, api_client=None):
+    """
+    Run crawl_references on chunks of citing papers in a pool of worker processes.
+
+    Each worker opens its own HTTP cache, citation graph, gender table, and Crawler (from the
+    saved files), and shares the name cache through its SQLite file: the gender API results of a
+    worker are saved right away, and the other workers load them before their next chunk. The
+    rows are returned in the order of the chunks, so the output is the same as running
+    crawl_references on the chunks one after the other. The edges found by the workers are added
+    to CITATION_GRAPH, their timers and counters to STATS, and their cache hits to HTTP_CACHE.
+
+    Inputs
+    ------
+    chunks : list of dicts
+        The citing_entities of each call of crawl_references.
+    n_processes : int
+        Number of worker processes.
+    settings : dict
+        How the workers are set up: "name_cache_path" (required), "http_cache_path",
+        "offline", "citation_graph_path", "gender_table_path", "api_key", "gender_api_quota"
+        (of each worker), "workers", "requests_per_second" and "retries" (of each worker's
+        Crawler), "citing_label", and the URLs "opencitations_api", "crossref_api" and
+        "gender_api_url". Optional settings that are missing or None aren't used.
+    papers_index : DoiIndex
+        Index of the papers already found, copied to each worker.
+    api_client : GenderApiClient
+        Client of the main process, whose usage is increased by the workers'. Optional.
+
+    Outputs
+    -------
+    ref_papers : generator of pandas DataFrames
+        The rows of crawl_references for each chunk, in order, as soon as they are ready.
+    """
+    # spawn, since forking a process that runs threads and holds SQLite connections isn't safe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=n_processes, mp_context=context, initializer=_init_reference_worker,
+                             initargs=(settings, papers_index)) as executor:
+        for ref_papers, references, stats in executor.map(_crawl_references_chunk, chunks):
+            if CITATION_GRAPH is not None and references is not None:
+                for citing_doi, ref_dois in references.items():
+                    CITATION_GRAPH.add_references(citing_doi, ref_dois)
+            STATS.merge(stats)
+            if HTTP_CACHE is not None:
+                HTTP_CACHE.hits += stats["counters"].get("http_cache/hits", 0)
+                HTTP_CACHE.misses += stats["counters"].get("http_cache/misses", 0)
+            if api_client is not None:
+                api_client.n_requests += stats["counters"].get("gender_api/requests", 0)
+                api_client.credits_used += stats["counters"].get("gender_api/credits_used", 0)
+            yield ref_papers
+
+
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="List the papers citing cleanBib and their references.")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="number of concurrent requests to opencitations.net and Crossref")
+    parser.add_argument("--rate-limit", type=float, default=10,
+                        help="maximum number of requests per second to each host (0 for no limit)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="number of times a failed request is retried")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't cache the opencitations.net and Crossref responses")
+    parser.add_argument("--offline", action="store_true",
+                        help="only use cached responses, without making any requests")
+    parser.add_argument("--gender-api-quota", type=int, default=None,
+                        help="maximum number of gender API credits to use (default: no limit)")
+    parser.add_argument("--resume", action="store_true",
+                        help="resume the last crawl if it didn't finish, instead of starting over")
+    parser.add_argument("--since", default=None,
+                        help="only process citing papers published on or after this date (YYYY-MM-DD), according "
+                             "to opencitations.net. Papers listed months after their publication are skipped too. "
+                             "'last' doesn't filter by date: like every run, only the citing papers that aren't in "
+                             "the data file (or the checkpoint) yet are processed")
+    parser.add_argument("--checkpoint-every", type=int, default=20,
+                        help="number of citing papers whose references are saved together")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="number of worker processes crawling the references of the citing papers, each with "
+                             "--workers threads (default: 1, i.e. no worker processes)")
+    parser.add_argument("--parquet", action="store_true",
+                        help="also save the data as a Parquet file (needs pyarrow)")
+    parser.add_argument("--no-gender-table", action="store_true",
+                        help="guess genders with the gender-guesser detector instead of the precompiled table "
+                             "(see gender_table.py)")
+    parser.add_argument("--profile", default=None,
+                        help="save a cProfile dump of the run to this file, e.g. to open with pstats or "
+                             "snakeviz (only the main thread is profiled, not the crawler's threads)")
+    parser.add_argument("--opencitations-api", default=OPENCITATIONS_API,
+                        help="base URL of the opencitations.net API, e.g. of a local mock server (default: %(default)s)")
+    parser.add_argument("--crossref-api", default=CROSSREF_API,
+                        help="base URL of the Crossref API (default: %(default)s)")
+    parser.add_argument("--gender-api", default=GENDER_API_URL,
+                        help="URL of the gender API's get endpoint (default: %(default)s)")
+    args = parser.parse_args()
+    OPENCITATIONS_API = args.opencitations_api
+    CROSSREF_API = args.crossref_api
+    GENDER_API_URL = args.gender_api
+
     # Get path from working dir to src/data and join it to the relative paths
     path_to_src_data = os.path.dirname(sys.argv[0])
-    for path_name in ["GENDER_API_KEY_PATH", "NAME_DICT_PATH", "DATAFILE_PATH"]:
+    for path_name in ["GENDER_API_KEY_PATH", "NAME_DICT_PATH", "NAME_CACHE_PATH", "DATAFILE_PATH",
+                      "DATAFILE_PARQUET_PATH", "HTTP_CACHE_PATH", "CRAWL_STATE_PATH",
+                      "CITATION_GRAPH_PATH", "STATS_PATH", "GENDER_TABLE_PATH"]:
         globals()[path_name] = os.path.join(path_to_src_data, globals()[path_name])
 
     # look for the gender_api_key and name_dict
@@ -230,61 +916,159 @@ if __name__ == "__main__":
         api_key = None
         print(f"{GENDER_API_KEY_PATH} not found, gender-api won't be used.")
 
-    if os.path.isfile(NAME_DICT_PATH):
-        with open(NAME_DICT_PATH, 'r') as name_dict_file:
-            name_dict = json.load(name_dict_file)
-    else:
-        name_dict = {}
-        print(f"{NAME_DICT_PATH} not found, a new one will be created.")
+    if not os.path.isfile(NAME_CACHE_PATH):
+        print(f"{NAME_CACHE_PATH} not found, it will be created from {NAME_DICT_PATH}.")
+    name_dict = NameCache(NAME_CACHE_PATH, json_path=NAME_DICT_PATH)
+    if not args.no_gender_table:
+        GENDER_TABLE = open_gender_table(GENDER_TABLE_PATH, name_dict)
 
     # look for the citing_paper.csv file
+    sink = CsvSink(DATAFILE_PATH)
+    if not sink.has_schema():
+        print(f"Rewriting {DATAFILE_PATH} with the current columns")
+        sink.compact()
+    papers_index = DoiIndex()
     if os.path.isfile(DATAFILE_PATH):
-        old_papers = pd.read_csv(DATAFILE_PATH)
+        for old_papers in pd.read_csv(DATAFILE_PATH, chunksize=CHUNK_SIZE):
+            papers_index.update(old_papers)
     else:
-        old_papers = pd.DataFrame(columns=["doi"])
         print(f"{DATAFILE_PATH} not found, it will be generated from scratch.")
 
+    gender_api = GenderApiClient(api_key, url=GENDER_API_URL, transport=RequestsTransport(retries=args.retries),
+                                 quota=args.gender_api_quota) if api_key else None
+
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def save_stats():
+        # saved at exit so that runs ending early (e.g., no new citing papers) are covered too
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        summary = STATS.summary()["counters"]
+        n_names = summary.get("name_dict/hits", 0) + summary.get("name_dict/misses", 0)
+        extra = {"name_dict_hit_ratio": summary.get("name_dict/hits", 0) / n_names if n_names else None}
+        if HTTP_CACHE is not None:
+            extra["http_cache"] = {"hits": HTTP_CACHE.hits, "misses": HTTP_CACHE.misses}
+        if gender_api is not None:
+            extra["gender_api"] = {"requests": gender_api.n_requests, "credits_used": gender_api.credits_used}
+        STATS.save(STATS_PATH, **extra)
+        print(f"\nTimers and counters saved to {STATS_PATH}")
+
+    atexit.register(save_stats)
+
+    if not args.no_cache:
+        HTTP_CACHE = ResponseCache(HTTP_CACHE_PATH, cache_only=args.offline)
+        if os.path.isfile(CITATION_GRAPH_PATH):
+            CITATION_GRAPH = CitationGraph.load(CITATION_GRAPH_PATH)
+        else:
+            CITATION_GRAPH = CitationGraph()
+
+    crawler = Crawler(max_workers=args.workers, requests_per_second=args.rate_limit or None,
+                      retries=args.retries)
+
+    state = CrawlState(CRAWL_STATE_PATH)
+    resumed = state.start(resume=args.resume)
+    # the references are streamed to a separate file until the crawl is done
+    references_sink = CsvSink(DATAFILE_PATH + ".part")
+    if not resumed and os.path.isfile(references_sink.path):
+        os.remove(references_sink.path)
+    # the citing papers found by the previous runs are in papers_index, so they are skipped anyway,
+    # while a publication date would skip the papers that opencitations.net listed late
+    since = None if args.since == "last" else args.since
+
     # for each cited doi, get the citing dois and their name/gender data
-    new_papers = pd.DataFrame(columns=["doi", "cited_entity"])
-    for cited_entity, doi in CITED_DOIS.items():
-        print("\n--------------\nLooking for citations of the ", cited_entity)
-        citing_dois = get_dois(doi, citing=True)
-        if not citing_dois:
-            print("    No citations found :( \n")
-        for n, citing_doi in enumerate(citing_dois):
-            print("\tDOI %d / %d\r" % (n + 1, len(citing_dois)), end="")
-            if not citing_doi in list(old_papers["doi"].values):
-                new_row = get_data(citing_doi, new_papers, api_key, name_dict)
-                new_row["cited_entity"] = cited_entity
-                new_row["cited_doi"] = doi
-                new_papers = new_papers.append(new_row, ignore_index=True)
+    if resumed and state.has_citing_rows():
+        print("\n--------------\nResuming the last crawl")
+        new_papers = state.citing_rows()
+    else:
+        print("\n--------------\nLooking for citations of cleanBib")
+        with STATS.timer("stage/citing_papers"):
+            new_papers = find_citing_papers(crawler, papers_index, api_key, name_dict, gender_api, since)
+        state.save_citing_rows(new_papers)
 
     # If no new citations found, terminate
     if len(new_papers) == 0:
         print("\n--------------\nNo new citing paper founds :(\n")
+        if CITATION_GRAPH is not None:
+            CITATION_GRAPH.save(CITATION_GRAPH_PATH)
+        state.finish()
         quit()
 
     # for each citing doi, get the dois of the refs and their name/gender data
     print("\n--------------\nLooking in the referrences of the citing papers newly found.")
-    citing_dois = new_papers.pivot(index="doi", columns="cited_entity", values="cited_entity")
-    all_papers = old_papers.append(new_papers)
-    for n, citing_doi_row in enumerate(citing_dois.itertuples()):
-        print("\tDOI %d / %d                    \r" % (n + 1, len(citing_dois)), end="")
-        ref_dois = get_dois(citing_doi_row.Index, citing=False)
-        for k, ref_doi in enumerate(ref_dois):
-            print("\tDOI %d / %d, reference %d / %d    \r" % (n + 1, len(citing_dois), k+1, len(ref_dois)), end="")
-            if ref_doi not in CITED_DOIS.values():
-                new_row = get_data(ref_doi, all_papers, api_key, name_dict)
-                citing_entities = [entity for entity in CITED_DOIS.keys()
-                                   if isinstance(getattr(citing_doi_row, entity, None), str)]
-                new_row["citing_entity"] = " ".join(["paper citing cleanBib"]+citing_entities)
-                new_row["citing_doi"] = citing_doi_row.Index
-                all_papers = all_papers.append(new_row, ignore_index=True)
+    citing_entities = {}
+    for citing_doi, cited_entity in zip(new_papers["doi"], new_papers["cited_entity"]):
+        citing_entities.setdefault(citing_doi, set()).add(cited_entity)
+    citing_entities = {citing_doi: [entity for entity in CITED_DOIS if entity in citing_entities[citing_doi]]
+                       for citing_doi in sorted(citing_entities)}
+    papers_index.update(new_papers)
+    if os.path.isfile(references_sink.path):
+        for ref_papers in pd.read_csv(references_sink.path, chunksize=CHUNK_SIZE):
+            papers_index.update(ref_papers)
+    done_dois = state.done_citing_dois()
+    pending_dois = [citing_doi for citing_doi in citing_entities if citing_doi not in done_dois]
+    chunks = [{citing_doi: citing_entities[citing_doi] for citing_doi in pending_dois[start:start + args.checkpoint_every]}
+              for start in range(0, len(pending_dois), args.checkpoint_every)]
+    if args.processes > 1 and len(chunks) > 1:
+        # the workers load the graph, so save the citation edges found so far
+        if CITATION_GRAPH is not None:
+            CITATION_GRAPH.save(CITATION_GRAPH_PATH)
+        settings = {
+            "name_cache_path": NAME_CACHE_PATH,
+            "http_cache_path": HTTP_CACHE_PATH if HTTP_CACHE is not None else None,
+            "offline": args.offline,
+            "citation_graph_path": CITATION_GRAPH_PATH if CITATION_GRAPH is not None else None,
+            "gender_table_path": GENDER_TABLE_PATH if GENDER_TABLE is not None else None,
+            "api_key": api_key,
+            "gender_api_quota": None if gender_api is None or gender_api.quota is None
+                                else gender_api.credits_left // args.processes,
+            "workers": args.workers,
+            "requests_per_second": args.rate_limit / args.processes if args.rate_limit else None,
+            "retries": args.retries,
+            "opencitations_api": OPENCITATIONS_API,
+            "crossref_api": CROSSREF_API,
+            "gender_api_url": GENDER_API_URL,
+        }
+        all_ref_papers = crawl_references_in_processes(chunks, args.processes, settings, papers_index, gender_api)
+    else:
+        all_ref_papers = (crawl_references(crawler, chunk, papers_index, api_key, name_dict, gender_api)
+                          for chunk in chunks)
+    n_done = len(done_dois)
+    for chunk in chunks:
+        n_done += len(chunk)
+        print("\tDOI %d / %d    \r" % (n_done, len(citing_entities)), end="")
+        with STATS.timer("stage/references"):
+            ref_papers = next(all_ref_papers)
+        with STATS.timer("stage/write_references"):
+            references_sink.write(ref_papers)
+        state.save_done(list(chunk))
+    all_ref_papers.close()  # shuts the worker processes down
+    if CITATION_GRAPH is not None:
+        CITATION_GRAPH.save(CITATION_GRAPH_PATH)
 
     # save the data as a .csv file
     print(f"\n\nSaving data to {DATAFILE_PATH}\n")
-    all_papers.to_csv(DATAFILE_PATH)
+    with STATS.timer("stage/save"):
+        sink.write(new_papers)
+        sink.write_csv(references_sink.path)
+        n_duplicates = sink.compact()
+    if n_duplicates:
+        print(f"Dropped {n_duplicates} duplicated rows")
+    if args.parquet:
+        print(f"Saving data to {DATAFILE_PARQUET_PATH}\n")
+        csv_to_parquet(DATAFILE_PATH, DATAFILE_PARQUET_PATH)
+    state.finish()
+    if os.path.isfile(references_sink.path):
+        os.remove(references_sink.path)
+    state.close()
 
-    # save the potentially updated name_dict
-    with open(NAME_DICT_PATH, 'w') as name_dict_file:
-        json.dump(name_dict, name_dict_file, indent=2)
+    name_dict.close()
+    if gender_api is not None:
+        print(f"Gender API: {gender_api.n_requests} requests, {gender_api.credits_used} credits used")
+    if HTTP_CACHE is not None:
+        print(f"HTTP cache: {HTTP_CACHE.hits} hits, {HTTP_CACHE.misses} misses")
+        HTTP_CACHE.close()
+    print("\n" + STATS.report())
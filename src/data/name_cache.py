@@ -0,0 +1,120 @@
+import json
+import os
+import sqlite3
+import threading
+
+from name_normalization import normalize
+
+
+class NameCache:
+    """
+    Persistent store of gender API results, used as the name_dict of make_dataset.py.
+
+    It behaves like a dict mapping names to {"gender": ..., "accuracy": ...} dicts, but every
+    new entry is written to a SQLite database (in WAL mode) as soon as it is added, so adding a
+    name doesn't rewrite the whole cache and nothing is lost if a crawl crashes. All entries are
+    loaded into memory when the cache is opened. Several processes can share the database, and
+    see each other's new entries with refresh.
+
+    Names are looked up normalized (see name_normalization.normalize), so the names of an
+    imported name_dict.json (e.g., "SHIN'YA") are normalized too ("Shin'ya"), and so are those of
+    databases created before they were. Names that normalize to an initial (e.g., "LJ") are kept
+    as they are, since they are never looked up.
+
+    Inputs
+    ------
+    path : string
+        Path of the SQLite file.
+    json_path : string
+        Path of a name_dict.json file whose entries are imported when the database is created.
+        Optional.
+    """
+
+    def __init__(self, path, json_path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS names (name TEXT PRIMARY KEY, gender TEXT, accuracy INTEGER)")
+        self._db.commit()
+        self._names = {}
+        self._last_rowid = 0
+        self.refresh()
+        if not self._names and json_path is not None and os.path.isfile(json_path):
+            with open(json_path, "r") as name_dict_file:
+                self.update({_key(name): value for name, value in json.load(name_dict_file).items()})
+        else:
+            self._normalize_names()
+
+    def _normalize_names(self):
+        """Rename the entries whose name isn't normalized, unless the normalized name has its own entry."""
+        renamed = {name: _key(name) for name in self._names if _key(name) != name}
+        if not renamed:
+            return
+        with self._lock:
+            with self._db:
+                self._db.executemany("DELETE FROM names WHERE name = ?", [(name,) for name in renamed])
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO names VALUES (?, ?, ?)",
+                    [(key, self._names[name]["gender"], self._names[name]["accuracy"])
+                     for name, key in renamed.items()],
+                )
+            for name, key in renamed.items():
+                value = self._names.pop(name)
+                self._names.setdefault(key, value)
+
+    def refresh(self):
+        """Load the entries added to the database (e.g., by other processes) since the last refresh."""
+        with self._lock:
+            # INSERT OR REPLACE gives replaced entries a new rowid too
+            rows = self._db.execute("SELECT rowid, name, gender, accuracy FROM names WHERE rowid > ? ORDER BY rowid",
+                                    (self._last_rowid,)).fetchall()
+            for rowid, name, gender, accuracy in rows:
+                self._names[name] = {"gender": gender, "accuracy": accuracy}
+                self._last_rowid = rowid
+            return len(rows)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __getitem__(self, name):
+        return self._names[name]
+
+    def __setitem__(self, name, value):
+        self.update({name: value})
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def keys(self):
+        return self._names.keys()
+
+    def items(self):
+        return self._names.items()
+
+    def get(self, name, default=None):
+        return self._names.get(name, default)
+
+    def update(self, entries):
+        """Add or replace many entries in a single transaction."""
+        entries = dict(entries)
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO names VALUES (?, ?, ?)",
+                    [(name, value["gender"], value["accuracy"]) for name, value in entries.items()],
+                )
+            self._names.update(entries)
+
+    def close(self):
+        self._db.close()
+
+
+def _key(name):
+    # the name looked up by name_to_gender, unless it is just an initial
+    key = normalize(name)
+    return key if len(key) >= 2 else name
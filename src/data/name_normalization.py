@@ -0,0 +1,87 @@
+import functools
+import re
+import unicodedata
+
+
+# Number of given names whose normalization is memoized
+NORMALIZE_CACHE_SIZE = 100_000
+
+# Letters that don't decompose into a base letter and an accent
+_FOLDED_LETTERS = str.maketrans({
+    "ø": "o", "Ø": "O", "ł": "l", "Ł": "L", "đ": "d", "Đ": "D", "ð": "d", "Ð": "D", "þ": "th", "Þ": "Th",
+    "æ": "ae", "Æ": "Ae", "œ": "oe", "Œ": "Oe", "ß": "ss", "ı": "i",
+})
+# Characters separating the parts of a compound name (hyphens and dashes)
+_HYPHENS = re.compile(r"\s*[-‐‑‒–—]+\s*")
+# Anything but letters, hyphens, apostrophes, and whitespace, e.g. dots, commas, brackets, digits
+_NOT_NAME = re.compile(r"[^\w\s'’\-‐‑‒–—]|[\d_]")
+
+
+def is_initial(part, all_caps=False):
+    """
+    Whether a part of a given name is an initial or a group of initials, e.g. "J" or "JD".
+
+    In names written in capitals (all_caps), only the groups of two letters without vowels are
+    initials, so that e.g. "LI" is a name but "MW" isn't.
+    """
+    if len(part) == 1:
+        return True
+    if len(part) == 2 and part.isupper():
+        return not all_caps or not any(vowel in part for vowel in "AEIOUY")
+    return False
+
+
+def _capitalize(part):
+    # "MARIA" or "maria" -> "Maria", but "McKenzie" and "DeAnna" are kept
+    if part.isupper() or part.islower():
+        return part.capitalize()
+    return part[0].upper() + part[1:]
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(given):
+    """
+    Normalize a given name to the first name used to guess the gender, e.g. in name_to_gender.
+
+    The name is put in Unicode NFC form (so that "László" is always spelled with the same
+    characters), dots and other punctuation are removed, and initials are skipped: the first
+    name is the first word that isn't an initial, with the parts of a compound name that aren't
+    initials (e.g., "J.-Donald" -> "Donald"). Its casing is fixed ("MARIA" -> "Maria",
+    "jean-paul" -> "Jean-Paul"), but accents are kept, since gender-guesser knows many accented
+    names (see fold). Results are memoized, as reference lists repeat the same given names a lot.
+
+    Inputs
+    ------
+    given : string
+        The given name(s), e.g. the "given" field of a Crossref author ("J. Daniel",
+        "Albert-László", "MARIA JOSÉ"). Missing names (None or NaN) are treated as "".
+
+    Outputs
+    -------
+    name : string
+        The first name (e.g., "Daniel", "Albert-László", "Maria"), or the first initial if the
+        given names are all initials (e.g., "J" for "J. D."), or "" if there is no name.
+    """
+    if not isinstance(given, str):
+        given = ""
+    given = _NOT_NAME.sub(" ", unicodedata.normalize("NFC", given))
+    all_caps = given.isupper()
+    initial = ""
+    for word in given.split():
+        parts = [part for part in _HYPHENS.split(word) if part]
+        names = [part for part in parts if not is_initial(part, all_caps)]
+        if names:
+            return "-".join(_capitalize(part) for part in names)
+        if parts and not initial:
+            initial = parts[0][0].upper()
+    return initial
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def fold(name):
+    """
+    Remove the accents of a name, e.g. "Søren" -> "Soren", to look up names that are only known
+    without their accents.
+    """
+    name = unicodedata.normalize("NFKD", name.translate(_FOLDED_LETTERS))
+    return "".join(char for char in name if not unicodedata.combining(char))
@@ -0,0 +1,177 @@
+import codecs
+import json
+import re
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Timeouts of the requests, in seconds: to connect, and between two bytes of the response
+TIMEOUT = (10, 60)
+# Number of bytes read at a time from a response
+READ_CHUNK_SIZE = 64 * 1024
+# Number of pooled connections, at least the number of threads of a Crawler
+POOL_SIZE = 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(chunks):
+    """
+    Parse a JSON array incrementally, yielding its values as soon as they are complete.
+
+    Only the values that are being parsed are kept in memory, not the whole array, so this works
+    on arrays of any size, e.g. streamed from an HTTP response.
+
+    Inputs
+    ------
+    chunks : iterable of bytes
+        The UTF-8 encoded JSON array, in chunks of any size (e.g., response.iter_content()).
+
+    Outputs
+    -------
+    values : generator
+        The values of the array, decoded with the json module.
+
+    Raises ValueError if the input isn't a JSON array, or ends before the array does (e.g., a
+    truncated response).
+    """
+    # the scanner of the json module, without the checks of JSONDecoder.raw_decode
+    scan = json.JSONDecoder().scan_once
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    expected = "["  # then "first" value (or "]"), then "," (or "]") and the next "value"
+    done = False
+    while True:
+        if pos < len(buffer) and buffer[pos] in " \t\n\r":
+            pos = _WHITESPACE.match(buffer, pos).end()
+        progressed = False
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expected == "[":
+                if char != "[":
+                    raise ValueError(f"Expected a JSON array, found {buffer[pos:pos + 20]!r}")
+                pos += 1
+                expected = "first"
+                progressed = True
+            elif expected == "first" and char == "]":
+                return
+            elif expected in ("first", "value"):
+                try:
+                    value, end = scan(buffer, pos)
+                except (StopIteration, json.JSONDecodeError):
+                    pass  # the value isn't complete yet
+                else:
+                    # the value is complete once it is followed by "," or "]", e.g. "12" could be
+                    # the start of "12.5"
+                    if end < len(buffer) and buffer[end] in " \t\n\r":
+                        end = _WHITESPACE.match(buffer, end).end()
+                    if end < len(buffer) and buffer[end] in ",]":
+                        pos = end
+                        expected = ","
+                        progressed = True
+                        yield value
+            elif char == ",":
+                pos += 1
+                expected = "value"
+                progressed = True
+            elif char == "]":
+                return
+            else:
+                raise ValueError(f"Expected ',' or ']' in a JSON array, found {buffer[pos:pos + 20]!r}")
+        if not progressed:
+            if done:
+                raise ValueError("Invalid JSON array, or it ended early (e.g., the response was truncated)")
+            chunk = next(chunks, None)
+            buffer = buffer[pos:]
+            pos = 0
+            if chunk is None:
+                done = True
+                buffer += text_decoder.decode(b"", final=True)
+            else:
+                buffer += text_decoder.decode(chunk)
+
+
+class OpenCitationsReader:
+    """
+    Streaming reader of the citation lists of opencitations.net.
+
+    The responses are parsed as they are downloaded (see iter_json_array), so a citation list is
+    never held in memory as a whole, and its first citations are available right away. The
+    requests share a pool of connections (a requests.Session), have timeouts, and raise an
+    HTTPError if their status is an error.
+
+    Inputs
+    ------
+    api_url : string
+        Base URL of the API, e.g. "https://opencitations.net/index/coci/api/v1".
+    timeout : float or tuple
+        Timeouts of the requests, see requests.get (default: TIMEOUT).
+    pool_size : int
+        Number of pooled connections (default: POOL_SIZE).
+    on_request : callable
+        Called with the URL of each request, e.g. to count them. Optional.
+    """
+
+    def __init__(self, api_url, timeout=TIMEOUT, pool_size=POOL_SIZE, on_request=None):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.on_request = on_request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _stream(self, url):
+        if self.on_request is not None:
+            self.on_request(url)
+        with self.session.get(url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            yield from iter_json_array(response.iter_content(READ_CHUNK_SIZE))
+
+    def iter_items(self, doi, citing=True, retries=0, backoff=1.0):
+        """
+        Get the citations of or by a given doi, as they are downloaded.
+
+        If a response fails or is cut short, the request is made again and the citations
+        already yielded are skipped (opencitations.net always lists them in the same order).
+
+        Inputs
+        ------
+        doi : string
+            The DOI of the paper whose citations or references you want to list.
+        citing : bool
+            Whether to get the citations of the given DOI or by the given DOI (default: True).
+        retries : int
+            Number of times a failed request is made again (default: 0).
+        backoff : float
+            Delay in seconds before the first retry, doubled for each following retry (default: 1).
+
+        Outputs
+        -------
+        items : generator of dicts
+            The citations, with "citing" and "cited" DOIs, and the "creation" date of the citing
+            paper, among other fields.
+        """
+        url = f"{self.api_url}/{'citations' if citing else 'references'}/{doi}"
+        n_yielded = 0
+        for attempt in range(retries + 1):
+            try:
+                for i, item in enumerate(self._stream(url)):
+                    if i >= n_yielded:
+                        n_yielded += 1
+                        yield item
+                return
+            except (requests.exceptions.RequestException, ValueError):
+                if attempt == retries:
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+
+    def iter_dois(self, doi, citing=True, retries=0, backoff=1.0):
+        """Get the DOIs of the papers citing or cited by a given doi, as they are downloaded. See iter_items."""
+        key = "citing" if citing else "cited"
+        for item in self.iter_items(doi, citing, retries, backoff):
+            yield item[key]
@@ -0,0 +1,125 @@
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from csv_sink import COLUMNS
+from records import compact_frame
+
+
+# Low-cardinality columns, stored dictionary-encoded and loaded as categoricals
+CATEGORICAL_COLUMNS = ["cited_doi", "cited_entity", "first_author_gender", "last_author_gender",
+                       "citing_entity"]
+ACCURACY_COLUMNS = ["first_author_gender_accuracy", "last_author_gender_accuracy"]
+# Rows are sorted by these columns, so that the row groups of a citing DOI are contiguous
+SORT_COLUMNS = ["citing_doi", "doi"]
+ROW_GROUP_SIZE = 100_000
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The Parquet storage needs pyarrow, install it with `pip install pyarrow`.")
+
+
+def _schema():
+    fields = []
+    for column in COLUMNS:
+        if column in ACCURACY_COLUMNS:
+            fields.append(pa.field(column, pa.float32()))
+        elif column in CATEGORICAL_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def write_parquet(df, path):
+    """
+    Save citation data (e.g., citing_papers.csv) as a Parquet file.
+
+    The low-cardinality columns are dictionary-encoded, the accuracies are stored as float32,
+    and the rows are sorted by citing DOI and DOI so that reads filtered on a citing DOI only
+    touch a few row groups.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        The citation data, with the columns of citing_papers.csv.
+    path : string
+        Path of the Parquet file.
+    """
+    _require_pyarrow()
+    df = df.reindex(columns=COLUMNS)
+    df = df.sort_values(SORT_COLUMNS, na_position="first", kind="stable")
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype("category")
+    table = pa.Table.from_pandas(df, schema=_schema(), preserve_index=False)
+    pq.write_table(table, path, row_group_size=ROW_GROUP_SIZE, use_dictionary=CATEGORICAL_COLUMNS,
+                   compression="zstd")
+
+
+def csv_to_parquet(csv_path, parquet_path):
+    """Convert a citing_papers.csv file to Parquet, see write_parquet."""
+    dtypes = {column: "category" for column in CATEGORICAL_COLUMNS}
+    dtypes.update({column: "float32" for column in ACCURACY_COLUMNS})
+    write_parquet(pd.read_csv(csv_path, dtype=dtypes), parquet_path)
+
+
+def read_parquet(path, columns=None, citing_doi=None, doi=None):
+    """
+    Load citation data from a Parquet file, only reading the rows and columns that are needed.
+
+    Inputs
+    ------
+    path : string
+        Path of the Parquet file.
+    columns : list of strings
+        Columns to read. By default, all columns are read.
+    citing_doi : string or list of strings
+        Only read the references of this or these citing DOIs. Optional.
+    doi : string or list of strings
+        Only read the rows of this or these DOIs. Optional.
+
+    Outputs
+    -------
+    df : pandas DataFrame
+        The citation data, with categorical columns for the low-cardinality columns.
+    """
+    _require_pyarrow()
+    filters = []
+    for column, values in [("citing_doi", citing_doi), ("doi", doi)]:
+        if isinstance(values, str):
+            filters.append((column, "==", values))
+        elif values is not None:
+            filters.append((column, "in", list(values)))
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    return table.to_pandas()
+
+
+def load_citing_papers(csv_path, parquet_path=None):
+    """
+    Load citing_papers.csv, from its Parquet copy if there is an up-to-date one.
+
+    Inputs
+    ------
+    csv_path : string
+        Path of the CSV file.
+    parquet_path : string
+        Path of the Parquet copy (default: csv_path with a .parquet extension).
+
+    Outputs
+    -------
+    df : pandas DataFrame
+        The citation data, in the compact representation of compact_frame.
+    """
+    if parquet_path is None:
+        parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    if (pa is not None and os.path.isfile(parquet_path)
+            and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)):
+        return compact_frame(read_parquet(parquet_path))
+    return compact_frame(pd.read_csv(csv_path))
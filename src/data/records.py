@@ -0,0 +1,80 @@
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# Fixed categories, so that the codes of the gender columns mean the same in every frame
+GENDERS = ["female", "mostly_female", "andy", "mostly_male", "male", "unknown"]
+GENDER_COLUMNS = ["first_author_gender", "last_author_gender"]
+ACCURACY_COLUMNS = ["first_author_gender_accuracy", "last_author_gender_accuracy"]
+# Low-cardinality or repeated string columns, stored as categoricals (i.e., interned IDs)
+CATEGORY_COLUMNS = ["first_author_name", "last_author_name", "cited_doi", "cited_entity",
+                    "citing_doi", "citing_entity"]
+
+
+def intern_string(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass
+class AuthorRecord:
+    """
+    Name/gender data of the first and last authors of a DOI, as kept in memory during a crawl.
+
+    It has the same fields as the dicts returned by get_data, but uses __slots__ and interned
+    strings so that the many records of a large crawl take little memory.
+    """
+
+    __slots__ = ("doi", "first_author_name", "first_author_gender", "first_author_gender_accuracy",
+                 "last_author_name", "last_author_gender", "last_author_gender_accuracy")
+
+    doi: str
+    first_author_name: str
+    first_author_gender: str
+    first_author_gender_accuracy: float
+    last_author_name: str
+    last_author_gender: str
+    last_author_gender_accuracy: float
+
+    @classmethod
+    def from_row(cls, row):
+        """Create a record from a dict or pandas Series with (at least) the record's fields."""
+        return cls(*(intern_string(row.get(field)) for field in cls.__slots__))
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+def compact_frame(df):
+    """
+    Convert citation data to a compact representation.
+
+    The gender columns become categoricals with the fixed GENDERS categories (int8 codes), the
+    names, entities, and citing/cited DOIs become categoricals, and the accuracies become
+    float32. Other columns are left as they are.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        Citation data, e.g. loaded from citing_papers.csv.
+
+    Outputs
+    -------
+    df : pandas DataFrame
+        A compact copy of df.
+    """
+    df = df.copy()
+    for column in GENDER_COLUMNS:
+        if column in df.columns:
+            # keep the values that aren't in GENDERS as extra categories rather than dropping them
+            extra = sorted(set(df[column].dropna()) - set(GENDERS))
+            df[column] = pd.Categorical(df[column], categories=GENDERS + extra)
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    for column in ACCURACY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(np.float32)
+    return df
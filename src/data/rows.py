@@ -0,0 +1,46 @@
+import pandas as pd
+
+
+class RowAccumulator:
+    """
+    Collects rows column by column, so adding a row takes constant time.
+
+    Growing a DataFrame with DataFrame.append copies the whole frame for every row, which makes
+    a crawl quadratic in the number of rows. Instead, append the rows here and build the
+    DataFrame once with to_frame.
+
+    Inputs
+    ------
+    columns : list of strings
+        Columns known in advance, in the order they should have in the DataFrame. Columns of
+        appended rows that aren't listed are added after them. Optional.
+    """
+
+    def __init__(self, columns=()):
+        self._columns = {column: [] for column in columns}
+        self._n_rows = 0
+
+    def __len__(self):
+        return self._n_rows
+
+    def append(self, row):
+        """
+        Add a row.
+
+        Inputs
+        ------
+        row : dict or pandas Series
+            Maps column names to values. Missing columns are filled with None.
+        """
+        for column, value in row.items():
+            if column not in self._columns:
+                self._columns[column] = [None] * self._n_rows
+            self._columns[column].append(value)
+        self._n_rows += 1
+        for values in self._columns.values():
+            if len(values) < self._n_rows:
+                values.append(None)
+
+    def to_frame(self):
+        """Build a DataFrame from the rows added so far."""
+        return pd.DataFrame(self._columns, columns=list(self._columns))
@@ -0,0 +1,146 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+CLASSES = ["mm", "wm", "mw", "ww"]
+RELATIVE_CLASSES = ["rel_" + cls for cls in CLASSES]
+# Percentages of each class in neuroscience reference lists, the benchmarks reported in
+# Dworkin et al. (2020), https://doi.org/10.1038/s41593-020-0658-y
+EXPECTED_PERCENTAGES = {
+    "mm": 58.4,
+    "wm": 25.5,
+    "mw": 9.4,
+    "ww": 6.7,
+}
+# Number of resamples per batch in bootstrap_ci is chosen so that a batch's resampling matrix
+# has at most this many entries
+MAX_RESAMPLING_ENTRIES = 10_000_000
+
+
+def relative_percentages(df, expected=EXPECTED_PERCENTAGES):
+    """
+    Compute the percentages of each class relative to the benchmarks.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        One row per paper, with the percentages of its references in each class (e.g., the mm,
+        wm, mw, and ww columns of the manually gathered data).
+    expected : dict
+        Maps the class columns to their expected percentages (default: EXPECTED_PERCENTAGES).
+
+    Outputs
+    -------
+    relative_df : pandas DataFrame
+        The difference between each paper's percentages and the expected ones, with the same
+        index as df and a "rel_" column per class (e.g., rel_mm).
+    """
+    columns = list(expected)
+    values = df[columns].to_numpy(dtype=float) - np.array([expected[column] for column in columns])
+    return pd.DataFrame(values, index=df.index, columns=["rel_" + column for column in columns])
+
+
+def _group_keys(df, by):
+    # a single group (0) when there's no grouping column
+    return np.zeros(len(df), dtype=int) if by is None else df[by]
+
+
+def _value_columns(df, columns, by):
+    return [column for column in df.columns if column != by] if columns is None else list(columns)
+
+
+def stats_table(df, columns=None, by=None, ci=95):
+    """
+    Compute the min, max, mean, and normal-approximation confidence interval of each column.
+
+    All the columns (and groups) are computed at once with a groupby. NaNs are skipped.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        One row per paper, e.g. with class percentages and relative percentages.
+    columns : list of strings
+        Columns to describe. By default, all columns except by.
+    by : string
+        Column to group the papers by (e.g., "citing_entity", or a cohort column). Optional.
+    ci : float
+        Level of the confidence interval, in percent (default: 95).
+
+    Outputs
+    -------
+    stats : pandas DataFrame
+        One column per described column, and the rows "Max", "<ci>% CI upper bound", "Mean",
+        "<ci>% CI lower bound", and "Min" (for each group if by is given, as a (group, stat)
+        MultiIndex).
+    """
+    columns = _value_columns(df, columns, by)
+    z = NormalDist().inv_cdf(0.5 + ci / 200)
+    grouped = df[columns].astype(float).groupby(_group_keys(df, by))
+    mean = grouped.mean()
+    half_width = z * grouped.std(ddof=0) / np.sqrt(grouped.count())
+    stats = {
+        "Max": grouped.max(),
+        f"{ci:g}% CI upper bound": mean + half_width,
+        "Mean": mean,
+        f"{ci:g}% CI lower bound": mean - half_width,
+        "Min": grouped.min(),
+    }
+    stats = pd.concat(stats).swaplevel().reindex(pd.MultiIndex.from_product([mean.index, list(stats)]))
+    return stats.droplevel(0) if by is None else stats
+
+
+def bootstrap_ci(df, columns=None, by=None, ci=95, n_boot=1000, seed=0):
+    """
+    Compute bootstrap confidence intervals of the mean of each column.
+
+    The resamples are drawn as one matrix of resampling counts (resamples x papers), shared by
+    all the columns, so the means of all the resamples and columns are a single matrix product.
+    With many papers, the resamples are drawn in batches, so that a batch's matrix has at most
+    MAX_RESAMPLING_ENTRIES entries. NaNs are skipped.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        One row per paper, e.g. with class percentages and relative percentages.
+    columns : list of strings
+        Columns whose mean is bootstrapped. By default, all columns except by.
+    by : string
+        Column to group the papers by (e.g., "citing_entity", or a cohort column). Optional.
+    ci : float
+        Level of the confidence interval, in percent (default: 95).
+    n_boot : int
+        Number of resamples (default: 1000).
+    seed : int
+        Seed of the resampling (default: 0).
+
+    Outputs
+    -------
+    stats : pandas DataFrame
+        One column per column, and the rows "<ci>% bootstrap CI upper bound" and "<ci>%
+        bootstrap CI lower bound" (for each group if by is given, as a (group, stat) MultiIndex).
+    """
+    columns = _value_columns(df, columns, by)
+    rng = np.random.default_rng(seed)
+    percentiles = [100 - (100 - ci) / 2, (100 - ci) / 2]
+    stat_names = [f"{ci:g}% bootstrap CI upper bound", f"{ci:g}% bootstrap CI lower bound"]
+    tables = {}
+    for group, group_df in df.groupby(_group_keys(df, by)):
+        values = group_df[columns].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0)
+        n = len(values)
+        batch_size = max(1, MAX_RESAMPLING_ENTRIES // n)
+        means = []
+        for start in range(0, n_boot, batch_size):
+            size = min(batch_size, n_boot - start)
+            # count how many times each paper is drawn in each resample, with a single bincount
+            draws = rng.integers(0, n, size=(size, n)) + n * np.arange(size)[:, None]
+            counts = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n).astype(float)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means.append((counts @ values) / (counts @ present))
+        bounds = np.nanpercentile(np.concatenate(means), percentiles, axis=0)
+        tables[group] = pd.DataFrame(bounds, index=stat_names, columns=columns)
+    stats = pd.concat(tables)
+    return stats.droplevel(0) if by is None else stats
@@ -0,0 +1,242 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")  # render without a display, e.g. on a server or in CI
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib import pyplot as plt
+
+import diversity_stats
+from diversity_stats import CLASSES, bootstrap_ci, relative_percentages
+
+
+# Relative paths from src/visualization
+DATAFILE_PATH = "../../data/citing_papers__manually_gathered.csv"
+FIGURES_PATH = "../../reports/figures"
+# Hashes of the data each figure was last rendered from, saved in the figures directory
+HASHES_FILENAME = "figure_hashes.json"
+
+# Above this many papers, the swarms are replaced by strip plots of a random sample of the papers
+MAX_SWARM_POINTS = 500
+MAX_STRIP_POINTS = 2000
+
+TICKS = ["MM", "WM", "MW", "WW"]
+BAR_PALETTE = ["midnightblue", "teal", "skyblue", "chocolate"]
+BAR_ALPHA = 0.7
+
+
+def _set_style():
+    matplotlib.rc("font", **{"size": 14})
+    matplotlib.rc("axes", **{"edgecolor": "grey"})
+    sns.set_context(rc={"patch.linewidth": 1.5})
+
+
+def _plot_points(ax, df, seed=0):
+    """Plot one point per paper and column: a swarm, or a strip of a sample of the papers if there are many."""
+    if len(df) > MAX_SWARM_POINTS:
+        df = df.sample(min(len(df), MAX_STRIP_POINTS), random_state=seed)
+        sns.stripplot(data=df, color="k", alpha=0.1, size=2, jitter=0.3, ax=ax)
+    else:
+        sns.swarmplot(data=df, color="k", alpha=0.3, ax=ax)
+
+
+def _plot_bars(ax, df):
+    """Plot the mean of each column, with its bootstrap 95% confidence interval."""
+    means = df.mean()
+    bounds = bootstrap_ci(df)
+    errors = np.abs(bounds.to_numpy() - means.to_numpy())[::-1]  # lower error first
+    ax.bar(range(len(means)), means, yerr=errors, color=BAR_PALETTE, alpha=BAR_ALPHA, edgecolor="k",
+           ecolor="k", capsize=8, width=0.8)
+
+
+def _diversity_figure(df, ylabel, title=None):
+    fig, ax = plt.subplots(figsize=(6, 6))
+    _plot_points(ax, df)
+    _plot_bars(ax, df)
+
+    # grid
+    ax.grid(alpha=0.3)
+    ax.hlines(y=0, xmin=-0.5, xmax=3.5)
+    ax.set_axisbelow(True)
+
+    # labels
+    ax.set_ylabel(ylabel)
+    ax.set_xticks(range(len(TICKS)))
+    ax.set_xticklabels(TICKS)
+    ax.set_xlabel("Cited author gender (first and last)")
+    if title is not None:
+        ax.set_title(title)
+    fig.tight_layout()
+    return fig
+
+
+def reported_diversity(df, up_to):
+    """Percentages reported in the papers with diversity statements, with swarm overlayed."""
+    return _diversity_figure(
+        df, "Citations (% with 95% confidence interval)",
+        "Gendered citations\nreported in papers with diversity statements, \nup to %s (n=%d)" % (up_to, len(df)),
+    )
+
+
+def relative_diversity(df, up_to):
+    """Percentages relative to the benchmarks, with swarm overlayed."""
+    return _diversity_figure(relative_percentages(df), "Relative citation diversity\n(% with 95% confidence interval)")
+
+
+def relative_diversity_with_title(df, up_to):
+    """Same as relative_diversity, with a title."""
+    return _diversity_figure(
+        relative_percentages(df), "Relative citation diversity\n(% with 95% confidence interval)",
+        "Relative proportions of gendered citations\nreported in papers with diversity statements, "
+        "\nup to %s (n=%d)" % (up_to, len(df)),
+    )
+
+
+# Figures rendered by this script, by file name (without the .png extension)
+FIGURES = {
+    "reported_diversity__with_swarm": reported_diversity,
+    "relative_diversity__with_swarm": relative_diversity,
+    "relative_diversity__with_swarm__with_title": relative_diversity_with_title,
+}
+
+
+def load_data(path):
+    """
+    Load the class percentages of the papers that report them.
+
+    Inputs
+    ------
+    path : string
+        Path of a CSV file with one row per paper and mm, wm, mw, and ww columns (e.g., the
+        manually gathered data, or the output of src/data/citation_classes.py).
+
+    Outputs
+    -------
+    df : pandas DataFrame
+        The mm, wm, mw, and ww columns, as floats, for the papers with all four values.
+    """
+    return pd.read_csv(path, usecols=CLASSES)[CLASSES].astype(float).dropna()
+
+
+def figure_hash(name, df, up_to):
+    """
+    Hash the inputs of a figure: its name, data, and date, and the code of this script and of
+    diversity_stats.
+
+    Outputs
+    -------
+    hash : string
+        Hex digest, which changes whenever the figure would look different.
+    """
+    digest = hashlib.sha256()
+    digest.update(name.encode())
+    digest.update(str(up_to).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    for module in [sys.modules[__name__], diversity_stats]:
+        with open(os.path.abspath(module.__file__), "rb") as source_file:
+            digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+def render_figure(name, df, path, up_to):
+    """Render one figure and save it as a .png file (run in a worker process by render_figures)."""
+    _set_style()
+    fig = FIGURES[name](df, up_to)
+    fig.savefig(path)
+    plt.close(fig)
+    return name
+
+
+def render_figures(df, figures_path, names=None, up_to=None, max_workers=None, force=False):
+    """
+    Render figures headless, one per worker process, skipping the ones whose inputs didn't change.
+
+    Inputs
+    ------
+    df : pandas DataFrame
+        Class percentages of the papers, see load_data.
+    figures_path : string
+        Directory of the figures. The hashes of the rendered figures are saved in it, in
+        HASHES_FILENAME.
+    names : list of strings
+        Names of the figures to render (default: all the FIGURES).
+    up_to : string
+        Date (e.g., "2021-06") of the data, shown in the titles (default: the current month).
+    max_workers : int
+        Number of worker processes (default: one per figure, up to the number of CPUs).
+    force : bool
+        Whether to render the figures even if their inputs didn't change (default: False).
+
+    Outputs
+    -------
+    rendered : list of strings
+        Names of the figures that were rendered.
+    """
+    names = list(FIGURES) if names is None else names
+    up_to = time.strftime("%Y-%m") if up_to is None else up_to
+    hashes_path = os.path.join(figures_path, HASHES_FILENAME)
+    hashes = {}
+    if os.path.isfile(hashes_path):
+        with open(hashes_path, "r") as hashes_file:
+            hashes = json.load(hashes_file)
+
+    todo = {}
+    for name in names:
+        path = os.path.join(figures_path, name + ".png")
+        new_hash = figure_hash(name, df, up_to)
+        if force or hashes.get(name) != new_hash or not os.path.isfile(path):
+            todo[name] = (path, new_hash)
+    if not todo:
+        return []
+
+    max_workers = max_workers or min(len(todo), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(render_figure, name, df, path, up_to) for name, (path, _) in todo.items()]
+        rendered = [future.result() for future in futures]
+
+    hashes.update({name: todo[name][1] for name in rendered})
+    with open(hashes_path + ".tmp", "w") as hashes_file:
+        json.dump(hashes, hashes_file, indent=2, sort_keys=True)
+    os.replace(hashes_path + ".tmp", hashes_path)
+    return rendered
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Render the figures of reports/figures.")
+    parser.add_argument("--data", default=None,
+                        help=f"CSV file with the mm, wm, mw, and ww percentages of each paper "
+                             f"(default: {DATAFILE_PATH})")
+    parser.add_argument("--up-to", default=None,
+                        help="date of the data shown in the titles, e.g. 2021-06 (default: the current month)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: one per figure, up to the number of CPUs)")
+    parser.add_argument("--force", action="store_true",
+                        help="render the figures even if their data didn't change")
+    parser.add_argument("figures", nargs="*", help=f"figures to render, among {', '.join(FIGURES)} (default: all)")
+    args = parser.parse_args()
+    unknown_figures = set(args.figures) - set(FIGURES)
+    if unknown_figures:
+        parser.error(f"unknown figures: {', '.join(sorted(unknown_figures))}")
+
+    # Get path from working dir to src/visualization and join it to the relative paths
+    path_to_src_visualization = os.path.dirname(sys.argv[0])
+    for path_name in ["DATAFILE_PATH", "FIGURES_PATH"]:
+        globals()[path_name] = os.path.join(path_to_src_visualization, globals()[path_name])
+
+    df = load_data(args.data or DATAFILE_PATH)
+    start = time.perf_counter()
+    rendered = render_figures(df, FIGURES_PATH, args.figures or None, args.up_to, args.workers, args.force)
+    skipped = len(args.figures or FIGURES) - len(rendered)
+    print(f"Rendered {len(rendered)} figures in {time.perf_counter() - start:.1f} s "
+          f"({skipped} unchanged figures skipped)")
+    for name in rendered:
+        print(f"    {os.path.join(FIGURES_PATH, name + '.png')}")
@@ -0,0 +1,158 @@
+import csv
+import glob
+import os
+import pickle
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+
+# Columns of the manually gathered data, in order
+COLUMNS = ["title", "authors", "doi", "arxiv", "mm", "wm", "mw", "ww", "other"]
+PERCENTAGE_COLUMNS = ["mm", "wm", "mw", "ww", "other"]
+# Names used for the columns in the annotator spreadsheets, after _normalize_name
+COLUMN_VARIANTS = {
+    "title": ["title", "paper title", "paper", "citing paper"],
+    "authors": ["authors", "author", "author(s)", "author list"],
+    "doi": ["doi", "doi/url", "doi or url"],
+    "arxiv": ["arxiv", "arxiv id", "preprint", "preprint id"],
+    "mm": ["mm", "m/m", "m&m", "man/man", "man & man", "male/male", "man(first)/man(last)"],
+    "wm": ["wm", "w/m", "w&m", "woman/man", "woman & man", "female/male", "woman(first)/man(last)"],
+    "mw": ["mw", "m/w", "m&w", "man/woman", "man & woman", "male/female", "man(first)/woman(last)"],
+    "ww": ["ww", "w/w", "w&w", "woman/woman", "woman & woman", "female/female", "woman(first)/woman(last)"],
+    "other": ["other", "unknown", "other/unknown", "unknown/other", "unknown categorization"],
+}
+# Annotator files in a data directory
+FILE_PATTERN = "cleanBibImpact_manual_data__*.csv"
+# Number of rows searched for the header
+MAX_HEADER_ROW = 20
+
+_VARIANT_TO_COLUMN = {variant: column for column, variants in COLUMN_VARIANTS.items() for variant in variants}
+
+
+def _normalize_name(name):
+    return re.sub(r"\s+", " ", str(name).replace("%", "")).strip().lower()
+
+
+def find_header_row(path, max_rows=MAX_HEADER_ROW):
+    """
+    Find the header row of an annotator spreadsheet, i.e. the first row naming most of the columns.
+
+    The spreadsheets start with a few rows of notes, so the header isn't always the first row.
+
+    Inputs
+    ------
+    path : string
+        Path of the CSV file.
+    max_rows : int
+        Number of rows searched (default: MAX_HEADER_ROW).
+
+    Outputs
+    -------
+    header_row : int
+        Index of the header row (e.g., 3 if it is the 4th row), as expected by pandas.read_csv.
+    """
+    with open(path, "r", newline="", encoding="utf-8-sig") as csv_file:
+        for i, row in enumerate(csv.reader(csv_file)):
+            if i >= max_rows:
+                break
+            columns = {_VARIANT_TO_COLUMN.get(_normalize_name(cell)) for cell in row}
+            # at least the four classes and one more column
+            if len(columns & set(COLUMNS)) >= 5 and {"mm", "wm", "mw", "ww"} <= columns:
+                return i
+    raise ValueError(f"No header with the {COLUMNS} columns found in the first {max_rows} rows of {path}")
+
+
+def _to_percentage(values):
+    # e.g. "58.6%" or " 58.6 " -> 58.6, and anything that isn't a number -> NaN
+    # floats even if every percentage is a whole number
+    values = values.astype(str).str.replace("%", "", regex=False).str.strip()
+    return pd.to_numeric(values, errors="coerce").astype(float)
+
+
+def read_annotator_file(path):
+    """
+    Read an annotator spreadsheet with the canonical columns.
+
+    Inputs
+    ------
+    path : string
+        Path of the CSV file.
+
+    Outputs
+    -------
+    df : pandas DataFrame
+        The rows of the spreadsheet, with the COLUMNS (missing ones are empty) as strings,
+        except for the percentages which are floats. Empty rows are dropped.
+    """
+    df = pd.read_csv(path, header=find_header_row(path), dtype=str, encoding="utf-8-sig")
+    renamed = {}
+    for name in df.columns:
+        column = _VARIANT_TO_COLUMN.get(_normalize_name(name))
+        if column is not None and column not in renamed.values():
+            renamed[name] = column
+    df = df[list(renamed)].rename(columns=renamed).reindex(columns=COLUMNS)
+    df = df.dropna(how="all")
+    for column in PERCENTAGE_COLUMNS:
+        df[column] = _to_percentage(df[column])
+    for column in ["title", "authors", "doi", "arxiv"]:
+        df[column] = df[column].astype("string").str.strip().replace({"": pd.NA, "0": pd.NA})
+    return df
+
+
+def _dedup_key(df):
+    # the DOI identifies a paper, otherwise its arXiv ID or title
+    key = df["doi"].str.lower().str.replace(r"^https?://(dx\.)?doi\.org/", "", regex=True)
+    key = key.fillna("arxiv:" + df["arxiv"].str.lower())
+    return key.fillna("title:" + df["title"].str.lower())
+
+
+def load_manual_data(directory, pattern=FILE_PATTERN, cache_path=None, max_workers=None):
+    """
+    Load all the annotator spreadsheets of a directory as one table.
+
+    The files are read in parallel, concatenated once, and deduplicated by DOI, keeping the row
+    of the last file (by file name, so the latest spreadsheet when the names contain dates). The
+    result can be cached in a pickle file, which is reused as long as the files and their
+    modification times are the same.
+
+    Inputs
+    ------
+    directory : string
+        Directory of the spreadsheets.
+    pattern : string
+        Glob pattern of the spreadsheets in the directory (default: FILE_PATTERN).
+    cache_path : string
+        Path of the cache file. Optional.
+    max_workers : int
+        Number of threads reading files (default: one per file, up to 8).
+
+    Outputs
+    -------
+    df : pandas DataFrame
+        One row per paper, with the COLUMNS and the name of the file it comes from ("source").
+    """
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    cache_key = [(os.path.basename(path), os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths]
+    if cache_path is not None and os.path.isfile(cache_path):
+        with open(cache_path, "rb") as cache_file:
+            cached = pickle.load(cache_file)
+        if cached["key"] == cache_key:
+            return cached["data"]
+
+    if paths:
+        with ThreadPoolExecutor(max_workers=max_workers or min(len(paths), 8)) as executor:
+            frames = list(executor.map(read_annotator_file, paths))
+        df = pd.concat([frame.assign(source=os.path.basename(path)) for path, frame in zip(paths, frames)],
+                       ignore_index=True)
+        paper_key = _dedup_key(df)
+        df = df[~paper_key.duplicated(keep="last") | paper_key.isna()].reset_index(drop=True)
+    else:
+        df = pd.DataFrame(columns=COLUMNS + ["source"])
+
+    if cache_path is not None:
+        with open(cache_path + ".tmp", "wb") as cache_file:
+            pickle.dump({"key": cache_key, "data": df}, cache_file)
+        os.replace(cache_path + ".tmp", cache_path)
+    return df
@@ -24,7 +24,6 @@
 
 # +
 import pandas as pd
-import numpy as np
 from matplotlib import pyplot as plt
 import matplotlib
 import re
@@ -32,6 +31,9 @@ import scipy.stats as st
 import seaborn as sns
 from matplotlib.lines import Line2D
 
+from diversity_stats import RELATIVE_CLASSES, bootstrap_ci, relative_percentages, stats_table
+from manual_data import load_manual_data
+
 
 # %matplotlib inline
 # -
@@ -54,28 +56,9 @@ from matplotlib.lines import Line2D
 year = 2021
 month = 6
 
-# NOTE - before we load the data, we need to go into the csv's
-# and change the column names so they include these columns
-columns = ["title","authors","doi","arxiv","mm","wm","mw","ww","other"]
-
-datafile0 = "../../data/cleanBibImpact_manual_data__2021_06 - Isil.csv"
-datafile1 = "../../data/cleanBibImpact_manual_data__2021_06 - Lea.csv"
-datafile2 = "../../data/cleanBibImpact_manual_data__2021_01 - new_format.csv"
-
-df0 = pd.read_csv(datafile0, header=3)
-df1 = pd.read_csv(datafile1, header=3)
-df2 = pd.read_csv(datafile2, header=3)
-
-df0 = df0[columns]
-df1 = df1[columns]
-df2 = df2[columns]
-
-
-# combine old and new data
-df = df2.append(df1)
-df = df.append(df0)
-df = df.reset_index()
-df[["mm", "wm", "mw", "ww"]] = df[["mm", "wm", "mw", "ww"]].astype(float)
+# the annotator spreadsheets (data/cleanBibImpact_manual_data__*.csv) are read with their
+# columns renamed to title, authors, doi, arxiv, mm, wm, mw, ww, and other, and each paper is kept once
+df = load_manual_data("../../data", cache_path="../../data/manual_data.pkl")
 len(df)
 # -
 
@@ -245,19 +228,9 @@ plt.savefig("../../reports/figures/reported_diversity__with_swarm.png")
 # Calculate relative percentages and select data
 
 # +
-expected_percentages = {
-    "mm": 58.4,
-    "wm": 25.5,
-    "mw": 9.4,
-    "ww": 6.7,
-}
-
-relative_cols = ["rel_mm", "rel_wm", "rel_mw", "rel_ww"]
-for i_col, column in enumerate(list(df_with_ds.columns)):
-    col_vals = []
-    for index, row in df_with_ds.iterrows():
-        col_vals.append(row[column] - expected_percentages[column])
-    df_with_ds[relative_cols[i_col]] = col_vals
+# the expected percentages are the benchmarks in diversity_stats.EXPECTED_PERCENTAGES
+relative_cols = RELATIVE_CLASSES
+df_with_ds = df_with_ds.join(relative_percentages(df_with_ds))
 
 
 rel_df_with_ds = df_with_ds[relative_cols]
@@ -390,22 +363,8 @@ plt.savefig("../../reports/figures/relative_diversity__with_swarm__with_title.pn
 # to check if visualizations are correct
 
 # +
-z = 1.96  # for 95% CI
 stat_cols = cols + relative_cols
-df_stats = pd.DataFrame(columns=df_with_ds.columns)
-for column, vals in df_with_ds.iteritems():
-    mean = np.mean(vals)  # mean
-    st = np.std(vals)  # standard deviation
-    n = len(vals)  # sample size
-    se = st / np.sqrt(n)  # standard error
-    lcb = mean - z * se  # lower limit of CI
-    ucb = mean + z * se  # upper limit of CI
-
-    df_stats.loc["Max", column] = np.max(vals)
-    df_stats.loc["95% CI upper bound", column] = ucb
-    df_stats.loc["Mean", column] = mean
-    df_stats.loc["95% CI lower bound", column] = lcb
-    df_stats.loc["Min", column] = np.min(vals)
+df_stats = pd.concat([stats_table(df_with_ds[stat_cols]), bootstrap_ci(df_with_ds[stat_cols])])
 
 df_stats.to_csv("../../reports/manual_data_stats__%d-%02d.csv" %(year, month))
 df_stats
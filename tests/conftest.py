@@ -0,0 +1,123 @@
+import http.server
+import json
+import os
+import socket
+import sys
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import habanero
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "data"))
+import make_dataset  # noqa: E402
+
+
+class StubServer:
+    """
+    Local HTTP server standing in for opencitations.net, Crossref and the gender API.
+
+    routes maps paths (e.g., "/works") to the JSON response, or to a function of the query
+    parameters returning it. failures maps paths to the number of HTTP 503 errors answered
+    before the response. cuts maps paths to the numbers of bytes after which the next responses
+    are cut short, by dropping the connection. The paths of the requests are listed in requests.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.failures = {}
+        self.cuts = {}
+        self.requests = []
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def respond(self, path, query):
+        self.requests.append(path)
+        if self.failures.get(path):
+            self.failures[path] -= 1
+            return 503, {"status": "error"}
+        if path not in self.routes:
+            return 404, {"status": "error"}
+        response = self.routes[path]
+        return 200, response(query) if callable(response) else response
+
+    def cut(self, path):
+        """Number of bytes of the body sent before dropping the connection, or None to send it all."""
+        return self.cuts[path].pop(0) if self.cuts.get(path) else None
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _handler(server):
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            status, response = server.respond(url.path, parse_qs(url.query))
+            body = json.dumps(response, ensure_ascii=False).encode()
+            cut = server.cut(url.path)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body if cut is None else body[:cut])
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def stub_apis(stub_server, monkeypatch):
+    """Point make_dataset at the stub server, without HTTP cache, citation graph or gender table."""
+    monkeypatch.setattr(make_dataset, "OPENCITATIONS_API", f"{stub_server.url}/oc")
+    monkeypatch.setattr(make_dataset, "CROSSREF_API", stub_server.url)
+    monkeypatch.setattr(make_dataset, "GENDER_API_URL", f"{stub_server.url}/get")
+    for name in ["HTTP_CACHE", "CITATION_GRAPH", "GENDER_TABLE"]:
+        monkeypatch.setattr(make_dataset, name, None)
+    # the shared clients are created again with the stub's URLs
+    for name in ["_opencitations", "_crossref", "_transport"]:
+        monkeypatch.delattr(make_dataset, name, raising=False)
+    return stub_server
+
+
+def crossref_works(authors):
+    """Route of Crossref's /works answering the multi-DOI filter with the given authors of each DOI."""
+    def works(query):
+        dois = [f.split(":", 1)[1] for f in query["filter"][0].split(",") if f.startswith("doi:")]
+        items = [{"DOI": doi, "author": authors[doi]} for doi in dois if doi in authors]
+        message = {"total-results": len(items), "items": items}
+        if "cursor" in query:
+            message["next-cursor"] = "next"
+        return {"status": "ok", "message-type": "work-list", "message": message}
+    return works
+
+
+def author(given):
+    return {"given": given, "family": "Doe"}
+
+
+@pytest.fixture
+def no_network(monkeypatch):
+    """Make every connection, and every Crossref call, fail."""
+    def fail(*args, **kwargs):
+        raise AssertionError("The network is disabled in this test")
+
+    monkeypatch.setattr(socket.socket, "connect", fail)
+    monkeypatch.setattr(habanero.Crossref, "works", fail)
@@ -0,0 +1,53 @@
+import make_dataset
+from citation_graph import CitationGraph
+
+
+def test_added_references_are_answered_without_compiling(monkeypatch):
+    graph = CitationGraph()
+    graph.add_references("10.1/A", ["10.2/r0", "10.2/r1"])
+    assert graph.references("10.1/a") == ["10.2/r0", "10.2/r1"]
+
+    compilations = []
+    build_csr = CitationGraph._build_csr
+    monkeypatch.setattr(CitationGraph, "_build_csr",
+                        staticmethod(lambda *args: compilations.append(args) or build_csr(*args)))
+    graph.add_references("10.1/b", ["10.2/r1", "10.2/r2"])
+    graph.add_references("10.1/a", ["10.2/r1", "10.2/r3"])
+
+    assert graph.references("10.1/b") == ["10.2/r1", "10.2/r2"]
+    assert graph.references("10.1/a") == ["10.2/r0", "10.2/r1", "10.2/r3"]
+    assert graph.citations("10.2/r1") == ["10.1/A", "10.1/b"]
+    assert graph.references("10.2/r3") == []
+    assert not compilations
+    # queries over many DOIs compile the new edges in
+    assert graph.citing_any(["10.2/r2", "10.2/r3"]) == ["10.1/A", "10.1/b"]
+    assert len(compilations) == 2
+    assert graph.references("10.1/a") == ["10.2/r0", "10.2/r1", "10.2/r3"]
+
+
+def test_saved_graph_is_loaded(tmp_path):
+    graph = CitationGraph()
+    graph.add_references("10.1/a", ["10.2/r0"])
+    graph.references("10.1/a")
+    graph.add_citations("10.2/r0", ["10.1/a", "10.1/c"])
+    # as older versions recorded empty reference lists
+    graph.references_fetched.add(graph.doi_id("10.1/empty"))
+    graph.save(tmp_path / "graph.npz")
+
+    loaded = CitationGraph.load(tmp_path / "graph.npz")
+
+    assert loaded.citations("10.2/r0") == ["10.1/a", "10.1/c"]
+    assert loaded.has_references("10.1/a") and loaded.has_citations("10.2/r0")
+    assert not loaded.has_references("10.1/empty")
+
+
+def test_empty_reference_lists_are_fetched_again(stub_apis, monkeypatch):
+    monkeypatch.setattr(make_dataset, "CITATION_GRAPH", CitationGraph())
+    stub_apis.routes["/oc/references/10.1/c0"] = []
+
+    assert make_dataset.get_dois("10.1/c0", citing=False) == []
+    stub_apis.routes["/oc/references/10.1/c0"] = [{"citing": "10.1/c0", "cited": "10.2/r0"}]
+    assert make_dataset.get_dois("10.1/c0", citing=False) == ["10.2/r0"]
+    # non-empty lists are reused
+    assert make_dataset.get_dois("10.1/c0", citing=False) == ["10.2/r0"]
+    assert stub_apis.requests.count("/oc/references/10.1/c0") == 2
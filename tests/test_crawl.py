@@ -0,0 +1,80 @@
+import pytest
+import requests
+
+import make_dataset
+from conftest import author, crossref_works
+from crawl import Crawler
+from doi_index import DoiIndex
+from gender_api import RequestsTransport
+
+PAPER_DOI = make_dataset.CITED_DOIS["paper"]
+
+
+def test_crawl_references(stub_apis):
+    stub_apis.routes["/oc/references/10.1/c0"] = [
+        {"citing": "10.1/c0", "cited": doi} for doi in ["10.2/r0", PAPER_DOI, "10.2/r1"]
+    ]
+    stub_apis.routes["/works"] = crossref_works({
+        "10.2/r0": [author("Maria"), author("J. John")],
+        "10.2/r1": [author("JOHN")],
+    })
+
+    rows = make_dataset.crawl_references(Crawler(max_workers=4, retries=0), {"10.1/c0": ["paper"]}, DoiIndex())
+
+    assert rows["doi"].tolist() == ["10.2/r0", "10.2/r1"]
+    assert rows["first_author_name"].tolist() == ["Maria", "John"]
+    assert rows["first_author_gender"].tolist() == ["female", "male"]
+    assert rows["last_author_name"].tolist() == ["John", "John"]
+    assert set(rows["citing_entity"]) == {"paper citing cleanBib paper"}
+
+
+def test_crossref_errors_are_retried(stub_apis):
+    stub_apis.routes["/works"] = crossref_works({"10.2/r0": [author("Maria")]})
+    stub_apis.failures["/works"] = 2
+
+    names = Crawler(retries=2, backoff=0).call(make_dataset.names_from_xref_batch, ["10.2/r0"], "stub")
+
+    assert names == {"10.2/r0": ("Maria", "Maria")}
+    assert stub_apis.requests.count("/works") == 3
+
+
+def test_opencitations_errors_are_retried(stub_apis):
+    stub_apis.routes["/oc/references/10.1/c0"] = [{"citing": "10.1/c0", "cited": "10.2/r0"}]
+    stub_apis.failures["/oc/references/10.1/c0"] = 1
+
+    dois = Crawler(retries=1, backoff=0).call(lambda doi: make_dataset.get_dois(doi, citing=False), "10.1/c0", "stub")
+
+    assert dois == ["10.2/r0"]
+
+
+def test_gender_api_transport_retries(stub_server):
+    stub_server.routes["/get"] = {"name": "kim", "gender": "female", "accuracy": 60}
+    stub_server.failures["/get"] = 2
+
+    assert RequestsTransport(retries=2, backoff=0)(f"{stub_server.url}/get", {"name": "Kim"})["gender"] == "female"
+    assert stub_server.requests.count("/get") == 3
+
+
+def test_gender_api_transport_raises_other_errors(stub_server):
+    with pytest.raises(requests.exceptions.HTTPError):
+        RequestsTransport(retries=2, backoff=0)(f"{stub_server.url}/missing", {})
+    assert stub_server.requests == ["/missing"]
+
+
+def test_find_citing_papers_skips_known_papers(stub_apis):
+    for doi in make_dataset.CITED_DOIS.values():
+        stub_apis.routes[f"/oc/citations/{doi}"] = []
+    stub_apis.routes[f"/oc/citations/{PAPER_DOI}"] = [
+        {"citing": doi, "cited": PAPER_DOI, "creation": creation}
+        for doi, creation in [("10.1/c0", "2020-01-01"), ("10.1/c1", "2020-05"), ("10.1/c2", "2019-12-01")]
+    ]
+    stub_apis.routes["/works"] = crossref_works({doi: [author("Maria")] for doi in ["10.1/c0", "10.1/c1", "10.1/c2"]})
+    # 10.1/c0 was found by a previous run
+    papers_index = DoiIndex()
+    papers_index.update(make_dataset.get_data_batch(["10.1/c0"], {"10.1/c0": ("Maria", "Maria")}))
+    crawler = Crawler(retries=0)
+
+    # papers listed late are found whatever their publication date, as long as they are new
+    assert make_dataset.find_citing_papers(crawler, papers_index)["doi"].tolist() == ["10.1/c1", "10.1/c2"]
+    # since is a publication date filter
+    assert make_dataset.find_citing_papers(crawler, papers_index, since="2020-03-01")["doi"].tolist() == ["10.1/c1"]
@@ -0,0 +1,25 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import csv_sink
+from csv_sink import CsvSink
+
+
+def test_compact_drops_duplicates_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_sink, "CHUNK_SIZE", 2)
+    reference = {"doi": "10.2/r0", "cited_doi": np.nan, "first_author_name": "Maria",
+                 "first_author_gender_accuracy": 50.0, "citing_doi": "10.1/c0"}
+    citing = {"doi": "10.1/c0", "cited_doi": "10.1038/s41593-020-0658-y", "first_author_name": np.nan}
+    sink = CsvSink(str(tmp_path / "citing_papers.csv"))
+    # cited_doi is all empty in the second chunk (float64) but not in the first (object)
+    sink.write(pd.DataFrame([citing, reference, reference, dict(reference, doi="10.2/r1"), reference]))
+
+    assert sink.compact() == 2
+
+    rows = pd.read_csv(sink.path)
+    assert rows["doi"].tolist() == ["10.1/c0", "10.2/r0", "10.2/r1"]
+    assert rows["first_author_gender_accuracy"].tolist()[1:] == [50.0, 50.0]
+    assert sorted(os.listdir(tmp_path)) == ["citing_papers.csv"]
+    assert sink.compact() == 0
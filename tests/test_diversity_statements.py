@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+
+from diversity_statements import CLASSES, MIN_AGREEMENT, extract_percentages, validate
+
+MANUAL_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data",
+                                "citing_papers__manually_gathered.csv")
+# Rows whose hand-entered values don't match their statement: row 2 has the unknown share as
+# ww, and the statement of row 37 reports "female/male" twice (the second is male/female)
+KNOWN_TYPOS = [2, 37]
+
+STATEMENTS = pd.DataFrame([
+    {"diversity_statement": "our references contain 58.6% man(first)/man(last), 18% woman(first)/man(last), "
+                            "12% man(first)/woman(last), and 11.4% woman(first)/woman(last)",
+     "mm": 58.6, "wm": 18, "mw": 12, "ww": 11.4},
+    # the genders are given last author first
+    {"diversity_statement": "10% woman(last)/man(first), 20% man(last)/woman(first), 30% man/man, "
+                            "40% woman/woman",
+     "mm": 30, "wm": 20, "mw": 10, "ww": 40},
+    {"diversity_statement": "our references contain 55% M/M, 15% W/M, 20% M/W, and 10% W/W",
+     "mm": 55, "wm": 15, "mw": 20, "ww": 10},
+    {"diversity_statement": "47% male/male, 21% female/male, 20% male/female, 7% female/female, "
+                            "and 5% unknown categorization",
+     "mm": 47, "wm": 21, "mw": 20, "ww": 7},
+    {"diversity_statement": "42% MM, 18% WM, 25% MW and 15% WW", "mm": 42, "wm": 18, "mw": 25, "ww": 15},
+])
+
+
+def test_statements_agree_with_the_hand_entered_values():
+    comparison = validate(STATEMENTS)
+
+    assert comparison["agrees"].all()
+    assert (comparison["confidence"] == "high").all()
+
+
+def test_lowercase_letters_are_not_genders():
+    percentages = extract_percentages(pd.Series(["50% w/ men and 30% m/w"]))
+
+    assert percentages[CLASSES].isna().all(axis=None)
+    assert percentages["confidence"].tolist() == ["none"]
+
+
+def test_manually_gathered_statements_agree_with_the_hand_entered_values():
+    comparison = validate(pd.read_csv(MANUAL_DATA_PATH))
+
+    assert comparison["agrees"].mean() >= MIN_AGREEMENT
+    assert comparison.index[~comparison["agrees"]].tolist() == KNOWN_TYPOS
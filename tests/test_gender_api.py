@@ -0,0 +1,71 @@
+import threading
+import time
+
+from gender_api import GenderApiClient
+
+
+class FakeTransport:
+    """Transport answering like the gender API's multi-name form, and recording the requests."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, params):
+        with self._lock:
+            self.requests.append(params)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        names = params["name"].split(";")
+        return {"result": [{"name": name.lower(), "gender": "female", "accuracy": 90} for name in names],
+                "credits_used": len(names)}
+
+
+def test_names_are_batched_and_merged():
+    transport = FakeTransport(delay=0.05)
+    client = GenderApiClient("key", transport=transport, max_workers=2, batch_size=3)
+    for name in ["Ana", "Bea", "Cid", "Ana", "Dee", "Eve", "Fay", "Gus"]:
+        client.queue(name)
+    name_dict = {"Known": {"gender": "male", "accuracy": 99}}
+
+    results = client.flush(name_dict)
+
+    assert [params["name"] for params in transport.requests] == ["Ana;Bea;Cid", "Dee;Eve;Fay", "Gus"]
+    assert all(params["multi"] == "true" and params["key"] == "key" for params in transport.requests)
+    assert transport.max_running <= 2
+    assert set(results) == {"Ana", "Bea", "Cid", "Dee", "Eve", "Fay", "Gus"}
+    assert name_dict["Gus"] == {"gender": "female", "accuracy": 90}
+    assert name_dict["Known"] == {"gender": "male", "accuracy": 99}
+    assert (client.n_requests, client.credits_used) == (3, 7)
+    assert client.flush(name_dict) == {}
+
+
+def test_quota_stops_the_lookups():
+    transport = FakeTransport()
+    client = GenderApiClient("key", transport=transport, batch_size=2, quota=3)
+
+    results = client.lookup(["Ana", "Bea", "Cid", "Dee"])
+
+    assert len(results) == 3
+    assert "Dee" not in results
+    assert (client.credits_used, client.credits_left) == (3, 0)
+    assert client.lookup(["Dee"]) == {}
+    assert len(transport.requests) == 2
+
+
+def test_client_against_a_fake_server(stub_server):
+    stub_server.routes["/get"] = lambda query: {
+        "result": [{"name": name.lower(), "gender": "male", "accuracy": 70} for name in query["name"][0].split(";")],
+        "credits_used": len(query["name"][0].split(";")),
+    }
+    client = GenderApiClient("key", url=f"{stub_server.url}/get")
+
+    assert client.lookup(["Pat", "Sam"]) == {"Pat": {"gender": "male", "accuracy": 70},
+                                             "Sam": {"gender": "male", "accuracy": 70}}
+    assert stub_server.requests == ["/get"]
@@ -0,0 +1,13 @@
+import numpy as np
+import pandas as pd
+
+import make_dataset
+
+
+def test_names_to_genders_of_a_column_with_missing_names():
+    names = pd.Series(["Maria", np.nan, "John", None, ""], dtype=object)
+
+    genders, accuracies = make_dataset.names_to_genders(names)
+
+    assert genders.tolist() == ["female", "unknown", "male", "unknown", "unknown"]
+    assert accuracies[[1, 3, 4]].tolist() == [0, 0, 0]
@@ -0,0 +1,57 @@
+import pytest
+
+import make_dataset
+from conftest import author, crossref_works
+from http_cache import CacheMiss, ResponseCache
+
+REFERENCES = [{"citing": "10.1/c0", "cited": "10.2/r0"}, {"citing": "10.1/c0", "cited": "10.2/r1"}]
+AUTHORS = {"10.2/r0": [author("Maria"), author("John")], "10.2/r1": [author("Kim")]}
+
+
+@pytest.fixture
+def http_cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "http_cache.sqlite"))
+    monkeypatch.setattr(make_dataset, "HTTP_CACHE", cache)
+    yield cache
+    cache.close()
+
+
+def test_cache_only_makes_no_requests(http_cache, no_network):
+    http_cache.set("opencitations", "references/10.1/c0", REFERENCES)
+    for doi, authors in AUTHORS.items():
+        http_cache.set("crossref", f"works/{doi}", authors)
+    http_cache.cache_only = True
+
+    assert make_dataset.get_dois("10.1/c0", citing=False) == ["10.2/r0", "10.2/r1"]
+    assert make_dataset.names_from_xref_batch(["10.2/r0", "10.2/R1"]) == {
+        "10.2/r0": ("Maria", "John"), "10.2/R1": ("Kim", "Kim"),
+    }
+    assert make_dataset.names_from_xref("10.2/r1") == ("Kim", "Kim")
+    assert http_cache.misses == 0
+
+    with pytest.raises(CacheMiss):
+        make_dataset.get_dois("10.1/c1", citing=False)
+    with pytest.raises(CacheMiss):
+        make_dataset.names_from_xref_batch(["10.2/r2"])
+
+
+def test_second_run_is_served_from_the_cache(stub_apis, http_cache):
+    stub_apis.routes["/oc/references/10.1/c0"] = REFERENCES
+    stub_apis.routes["/works"] = crossref_works(AUTHORS)
+
+    for _ in range(2):
+        assert make_dataset.get_dois("10.1/c0", citing=False) == ["10.2/r0", "10.2/r1"]
+        assert make_dataset.names_from_xref_batch(["10.2/r0", "10.2/r1"]) == {
+            "10.2/r0": ("Maria", "John"), "10.2/r1": ("Kim", "Kim"),
+        }
+    assert stub_apis.requests == ["/oc/references/10.1/c0", "/works"]
+
+
+def test_expired_entries_are_fetched_again(stub_apis, http_cache):
+    http_cache.ttls = {"opencitations": -1}
+    stub_apis.routes["/oc/references/10.1/c0"] = REFERENCES
+
+    make_dataset.get_dois("10.1/c0", citing=False)
+    make_dataset.get_dois("10.1/c0", citing=False)
+
+    assert stub_apis.requests == ["/oc/references/10.1/c0"] * 2
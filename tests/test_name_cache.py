@@ -0,0 +1,54 @@
+import json
+import sqlite3
+
+import pytest
+
+import make_dataset
+from name_cache import NameCache
+
+# name_dict.json entries whose names aren't normalized
+NAME_DICT = {
+    "SHIN'YA": {"gender": "male", "accuracy": 99},
+    "Jing‐Gang": {"gender": "male", "accuracy": 97},
+    "RE": {"gender": "female", "accuracy": 60},
+    "IP": {"gender": "male", "accuracy": 75},
+    "LJ": {"gender": "female", "accuracy": 80},
+}
+NORMALIZED_NAMES = ["Shin'ya", "Jing-Gang", "Re", "Ip"]
+
+
+@pytest.fixture
+def name_dict_path(tmp_path):
+    path = tmp_path / "name_dict.json"
+    path.write_text(json.dumps(NAME_DICT))
+    return str(path)
+
+
+def test_imported_names_are_found_without_the_gender_api(tmp_path, name_dict_path, monkeypatch, no_network):
+    monkeypatch.setattr(make_dataset, "GENDER_TABLE", None)
+    name_dict = NameCache(str(tmp_path / "name_cache.sqlite"), json_path=name_dict_path)
+
+    genders, _ = make_dataset.names_to_genders(list(NAME_DICT)[:4], "key", name_dict)
+
+    assert genders.tolist() == ["male", "male", "female", "male"]
+    assert sorted(name_dict) == sorted(NORMALIZED_NAMES + ["LJ"])
+
+
+def test_existing_databases_are_migrated(tmp_path):
+    path = str(tmp_path / "name_cache.sqlite")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE names (name TEXT PRIMARY KEY, gender TEXT, accuracy INTEGER)")
+    db.executemany("INSERT INTO names VALUES (?, ?, ?)",
+                   [(name, value["gender"], value["accuracy"]) for name, value in NAME_DICT.items()]
+                   + [("Re", "male", 90)])
+    db.commit()
+    db.close()
+
+    name_dict = NameCache(path)
+    name_dict.close()
+    name_dict = NameCache(path)
+
+    assert sorted(name_dict) == sorted(NORMALIZED_NAMES + ["LJ"])
+    assert name_dict["Shin'ya"] == NAME_DICT["SHIN'YA"]
+    # entries of the normalized name are kept
+    assert name_dict["Re"] == {"gender": "male", "accuracy": 90}
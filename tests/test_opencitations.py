@@ -0,0 +1,93 @@
+import json
+
+import pytest
+import requests
+
+import opencitations
+from opencitations import OpenCitationsReader, iter_json_array
+
+# multibyte characters, string escapes, and numbers of several lengths
+VALUES = [
+    {"citing": "10.1/zoë", "author": "日本 😀", "cited": "10.2/r0"},
+    "quote \" backslash \\ newline \n unicode é 😀",
+    -12.5e-3, 1234567, 0, True, None, [], [1, [2, {"a": "]"}]], {},
+]
+DATA = json.dumps(VALUES, ensure_ascii=False, indent=1).encode()
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_chunks_of_any_size_are_parsed(size):
+    assert list(iter_json_array(chunked(DATA, size))) == VALUES
+
+
+def test_chunks_split_anywhere_are_parsed():
+    # every split of a multibyte character, an escape, or a number
+    for split in range(1, len(DATA)):
+        assert list(iter_json_array([DATA[:split], DATA[split:]])) == VALUES
+
+
+def test_escaped_json_is_parsed():
+    data = json.dumps(VALUES).encode()
+    assert list(iter_json_array(chunked(data, 3))) == VALUES
+
+
+def test_values_are_yielded_as_soon_as_they_are_complete():
+    values = iter_json_array(iter([b'[{"a": 1}, 2', b"5, ", b"3]"]))
+    assert next(values) == {"a": 1}
+    assert next(values) == 25
+    assert list(values) == [3]
+
+
+@pytest.mark.parametrize("data", [b"[]", b" [ ] ", b"[\n]"])
+def test_empty_arrays(data):
+    assert list(iter_json_array(chunked(data, 1))) == []
+
+
+def test_truncated_arrays_raise_value_errors():
+    for end in range(len(DATA)):
+        with pytest.raises(ValueError):
+            list(iter_json_array(chunked(DATA[:end], 4)))
+
+
+@pytest.mark.parametrize("data", [b"", b"{}", b'"a"', b"[1 2]", b"[1,]", b"[,1]", b"[1;2]", b'["\xff"]', b"[tru]"])
+def test_invalid_arrays_raise_value_errors(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(chunked(data, 2)))
+
+
+def items(n):
+    return [{"citing": f"10.1/c{i}", "cited": "10.2/r0", "creation": "2020-01-01"} for i in range(n)]
+
+
+@pytest.fixture
+def small_reads(monkeypatch):
+    # so that the items before a cut are yielded before the connection is dropped
+    monkeypatch.setattr(opencitations, "READ_CHUNK_SIZE", 64)
+
+
+@pytest.mark.parametrize("cuts", [[1], [700], [700, 1500]])
+def test_dropped_connections_are_resumed(stub_server, small_reads, cuts):
+    stub_server.routes["/oc/citations/10.2/r0"] = items(40)
+    stub_server.cuts["/oc/citations/10.2/r0"] = list(cuts)
+    reader = OpenCitationsReader(f"{stub_server.url}/oc")
+
+    assert list(reader.iter_items("10.2/r0", retries=len(cuts), backoff=0)) == items(40)
+    assert stub_server.requests == ["/oc/citations/10.2/r0"] * (len(cuts) + 1)
+
+
+def test_dropped_connections_raise_after_the_retries(stub_server, small_reads):
+    stub_server.routes["/oc/citations/10.2/r0"] = items(40)
+    stub_server.cuts["/oc/citations/10.2/r0"] = [700, 700]
+    reader = OpenCitationsReader(f"{stub_server.url}/oc")
+
+    found = []
+    with pytest.raises(requests.exceptions.RequestException):
+        for item in reader.iter_items("10.2/r0", retries=1, backoff=0):
+            found.append(item)
+    # the items before the cut were yielded once
+    assert found == items(len(found)) and 0 < len(found) < 40
+    assert len(stub_server.requests) == 2